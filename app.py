@@ -31,6 +31,7 @@ from config.database import (
 from utils.ai_resume_analyzer import AIResumeAnalyzer
 from utils.resume_builder import ResumeBuilder
 from utils.resume_analyzer import ResumeAnalyzer
+from utils.data_export import export_resume_data
 import traceback
 import plotly.express as px
 import pandas as pd
@@ -543,36 +544,15 @@ class ResumeApp:
 
     def export_to_excel(self):
         """Export resume data to Excel"""
-        conn = get_database_connection()
-
-        # Get resume data with analysis
-        query = """
-            SELECT
-                rd.name, rd.email, rd.phone, rd.linkedin, rd.github, rd.portfolio,
-                rd.summary, rd.target_role, rd.target_category,
-                rd.education, rd.experience, rd.projects, rd.skills,
-                ra.ats_score, ra.keyword_match_score, ra.format_score, ra.section_score,
-                ra.missing_skills, ra.recommendations,
-                rd.created_at
-            FROM resume_data rd
-            LEFT JOIN resume_analysis ra ON rd.id = ra.resume_id
-        """
-
+        # Rows are streamed into a write-only workbook (see utils/data_export.py),
+        # so only the finished, compressed file is held in memory
+        output = io.BytesIO()
         try:
-            # Read data into DataFrame
-            df = pd.read_sql_query(query, conn)
-
-            # Create Excel writer object
-            output = io.BytesIO()
-            with pd.ExcelWriter(output, engine='openpyxl') as writer:
-                df.to_excel(writer, index=False, sheet_name='Resume Data')
-
+            export_resume_data(output, fmt='xlsx')
             return output.getvalue()
         except Exception as e:
             print(f"Error exporting to Excel: {str(e)}")
             return None
-        finally:
-            conn.close()
 
     
     def render_empty_state(self, icon, message):
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Hammer config/database.py from many threads: inserts plus stats queries.
+
+Runs the same workload twice against fresh temporary databases:
+- legacy: a new sqlite3.connect() per call in rollback-journal mode, as the
+  module did before connections were pooled
+- pooled: the WAL-mode ConnectionPool behind get_database_connection()
+
+Failed calls ("database is locked" and friends) are counted rather than
+raised, since that is what concurrent Streamlit sessions used to hit.
+
+Usage:
+    python benchmarks/bench_database.py --threads 16 --operations 200
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+# Add project root to path for imports
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import config.database as database
+
+RESUME = {
+    'personal_info': {'full_name': 'Bench User', 'email': 'bench@example.com', 'phone': '555-0100'},
+    'summary': 'Backend engineer', 'target_role': 'Backend Developer', 'target_category': 'Software Development',
+    'skills': ['python', 'sql', 'docker']
+}
+ANALYSIS = {'ats_score': 72, 'keyword_match_score': 64, 'format_score': 80, 'section_score': 75,
+            'missing_skills': 'kubernetes', 'recommendations': 'Add metrics'}
+
+
+def legacy_connection():
+    """The original get_database_connection: a fresh connection every call"""
+    return sqlite3.connect(database.DB_PATH)
+
+
+def worker(operations, read_every, errors, latencies):
+    for i in range(operations):
+        start = time.perf_counter()
+        try:
+            if i % read_every == 0:
+                if database.get_resume_stats() is None:
+                    errors.append('stats')
+                database.get_ai_analysis_stats()
+            else:
+                resume_id = database.save_resume_data(RESUME)
+                if resume_id is None:
+                    errors.append('insert')
+                    continue
+                database.save_analysis_data(resume_id, ANALYSIS)
+                database.save_ai_analysis_data(resume_id, {'model_used': 'Bench', 'resume_score': 70,
+                                                           'job_role': 'Backend Developer'})
+        except Exception as e:
+            errors.append(str(e))
+        finally:
+            latencies.append(time.perf_counter() - start)
+
+
+def run(threads, operations, read_every):
+    """Run the workload; returns (elapsed seconds, operations, p95 latency ms, errors)"""
+    errors, latencies = [], []
+    workers = [threading.Thread(target=worker, args=(operations, read_every, errors, latencies))
+               for _ in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95)] * 1000 if latencies else 0
+    return elapsed, len(latencies), p95, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--operations", type=int, default=200, help="Operations per thread")
+    parser.add_argument("--read-every", type=int, default=4, help="Every Nth operation is a stats query")
+    args = parser.parse_args()
+
+    pooled_connection = database.get_database_connection
+    # The module prints every failure; keep the output to the summary lines
+    devnull = open(os.devnull, 'w')
+
+    print(f"{args.threads} threads x {args.operations} operations")
+    for label in ("legacy", "pooled"):
+        with tempfile.TemporaryDirectory() as tmp:
+            database.DB_PATH = os.path.join(tmp, 'bench.db')
+            database.init_database()
+            pool = database.get_connection_pool()
+            if label == "legacy":
+                conn = pool.acquire()
+                conn.execute('PRAGMA journal_mode=DELETE')
+                conn.close()
+                pool.close_all()
+                database.get_database_connection = legacy_connection
+            else:
+                database.get_database_connection = pooled_connection
+
+            stdout, sys.stdout = sys.stdout, devnull
+            try:
+                elapsed, count, p95, errors = run(args.threads, args.operations, args.read_every)
+            finally:
+                sys.stdout = stdout
+            print(f"{label:8} {elapsed:7.2f}s  {count / elapsed:8.0f} ops/s  p95 {p95:7.1f} ms  errors {len(errors)}")
+            if label == "pooled":
+                stats = pool.stats()
+                print(f"{'':8} {stats['created']} connections opened, {stats['reused']} reuses")
+            pool.close_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Compare the legacy DataFrame export with the streaming exports in utils/data_export.py.
+
+Builds a temporary database with --rows resume_data rows (each with one
+resume_analysis row), then runs every mode in its own child process and
+reports wall time, output size and the child's peak RSS (a child killed
+for running out of memory is reported as failed):
+- legacy: pd.read_sql_query of the whole join, then DataFrame.to_excel
+  (the original ResumeApp.export_to_excel; needs pandas and openpyxl)
+- csv / parquet / xlsx: export_resume_data, streamed in --chunk-size rows
+
+Modes whose libraries are not installed are reported as skipped.
+
+Usage:
+    python benchmarks/bench_export.py --rows 1000000
+    python benchmarks/bench_export.py --rows 200000 --modes legacy xlsx
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+
+# Add project root to path for imports
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import config.database as database
+from utils.data_export import EXPORT_QUERY, export_resume_data
+
+MODES = ("legacy", "csv", "parquet", "xlsx")
+ROLES = ["Backend Developer", "Data Scientist", "Frontend Developer", "DevOps Engineer", "QA Engineer"]
+
+
+def populate(rows, batch=50000):
+    """Fill the current DB_PATH with synthetic resumes and analyses"""
+    database.init_database()
+    conn = database.get_database_connection()
+    rnd = random.Random(0)
+    try:
+        for offset in range(0, rows, batch):
+            count = min(batch, rows - offset)
+            conn.executemany('''
+                INSERT INTO resume_data (id, name, email, phone, linkedin, summary, target_role, target_category,
+                                         education, experience, skills)
+                VALUES (?, ?, ?, ?, ?, ?, ?, 'Software Development', ?, ?, ?)
+            ''', [(i, f"Candidate {i}", f"candidate{i}@example.com", f"555-{i:07d}",
+                   f"https://linkedin.com/in/candidate{i}", "Engineer with experience in APIs and data. " * 3,
+                   rnd.choice(ROLES), '["B.Tech Computer Science"]',
+                   '["Software Engineer, 3 years"]', '["python", "sql", "docker", "aws"]')
+                  for i in range(offset + 1, offset + count + 1)])
+            conn.executemany('''
+                INSERT INTO resume_analysis (resume_id, ats_score, keyword_match_score, format_score, section_score,
+                                             missing_skills, recommendations)
+                VALUES (?, ?, ?, ?, ?, 'kubernetes, terraform', 'Quantify achievements')
+            ''', [(i, rnd.randint(30, 95), rnd.randint(20, 90), rnd.randint(50, 100), rnd.randint(40, 100))
+                  for i in range(offset + 1, offset + count + 1)])
+            conn.commit()
+    finally:
+        conn.close()
+
+
+def legacy_export(output_path):
+    import pandas as pd
+
+    conn = database.get_database_connection()
+    try:
+        df = pd.read_sql_query(EXPORT_QUERY, conn)
+        with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
+            df.to_excel(writer, index=False, sheet_name='Resume Data')
+        return len(df)
+    finally:
+        conn.close()
+
+
+def run_mode(mode, db_path, output_path, chunk_size, results):
+    database.DB_PATH = db_path
+    start = time.perf_counter()
+    try:
+        if mode == "legacy":
+            count = legacy_export(output_path)
+        else:
+            with open(output_path, 'wb') as output:
+                count = export_resume_data(output, mode, chunk_size)
+    except ImportError as e:
+        results.put((mode, None, str(e)))
+        return
+    elapsed = time.perf_counter() - start
+    # ru_maxrss is KiB on Linux
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    results.put((mode, (count, elapsed, peak_mb, os.path.getsize(output_path) / 1e6), None))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_PATH = os.path.join(tmp, 'bench.db')
+        start = time.perf_counter()
+        populate(args.rows)
+        database.get_connection_pool().close_all()
+        print(f"Populated {args.rows} rows in {time.perf_counter() - start:.1f}s")
+
+        for mode in args.modes:
+            results = context.Queue()
+            extension = 'xlsx' if mode == 'legacy' else mode
+            process = context.Process(target=run_mode, args=(mode, database.DB_PATH,
+                                                             os.path.join(tmp, f"{mode}.{extension}"),
+                                                             args.chunk_size, results))
+            process.start()
+            process.join()
+            if process.exitcode != 0:
+                # A negative exit code is the signal that killed it, e.g. -9 from the OOM killer
+                print(f"{mode:8} failed: child exited with code {process.exitcode}")
+                continue
+            mode, numbers, skipped = results.get()
+            if skipped:
+                print(f"{mode:8} skipped: {skipped}")
+                continue
+            count, elapsed, peak_mb, size_mb = numbers
+            print(f"{mode:8} {count} rows  {elapsed:7.1f}s  peak RSS {peak_mb:7.0f} MB  output {size_mb:7.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
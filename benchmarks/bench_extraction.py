@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Compare the legacy temp-file extraction path with the in-memory path.
+
+The legacy path mirrors the original AIResumeAnalyzer code: write every
+upload to a NamedTemporaryFile(delete=False), open it by name and unlink it.
+File system activity is counted with a sys.addaudithook hook (open, remove,
+mkstemp and friends), which maps one-to-one onto the syscalls we avoid.
+
+Usage:
+    python benchmarks/bench_extraction.py --iterations 50
+    python benchmarks/bench_extraction.py --pdf my_resume.pdf --docx my_resume.docx
+"""
+
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+
+# Add project root to path for imports
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from utils.document_ingestion import extract_pdf_pages_pdfplumber, extract_docx_text
+
+FS_EVENTS = {"open", "os.remove", "os.rename", "os.mkdir", "os.rmdir", "tempfile.mkstemp", "tempfile.mkdtemp"}
+fs_events = Counter()
+counting = False
+
+
+def audit_hook(event, args):
+    if counting and event in FS_EVENTS:
+        fs_events[event] += 1
+
+
+def sample_pdf_bytes():
+    """Build a small multi-page text PDF with reportlab"""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=letter)
+    for page in range(3):
+        y = 750
+        for line in range(40):
+            pdf.drawString(50, y, f"Page {page + 1} line {line + 1}: Python, SQL, Docker, led a team of 5 engineers")
+            y -= 18
+        pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
+
+
+def sample_docx_bytes():
+    """Build a small DOCX with python-docx"""
+    from docx import Document
+
+    doc = Document()
+    for line in range(120):
+        doc.add_paragraph(f"Line {line + 1}: Developed REST APIs in Flask and deployed them on AWS")
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def legacy_pdf(data):
+    import pdfplumber
+
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as temp_file:
+        temp_file.write(data)
+        temp_path = temp_file.name
+    text = ""
+    with pdfplumber.open(temp_path) as pdf:
+        for page in pdf.pages:
+            text += (page.extract_text() or "") + "\n"
+    os.unlink(temp_path)
+    return text
+
+
+def legacy_docx(data):
+    from docx import Document
+
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.docx') as temp_file:
+        temp_file.write(data)
+        temp_path = temp_file.name
+    doc = Document(temp_path)
+    text = "\n".join(paragraph.text for paragraph in doc.paragraphs)
+    os.unlink(temp_path)
+    return text
+
+
+def in_memory_pdf(data):
+    return "\n".join(extract_pdf_pages_pdfplumber(memoryview(data)))
+
+
+def in_memory_docx(data):
+    return extract_docx_text(memoryview(data))
+
+
+def measure(label, func, data, iterations):
+    global counting
+    func(data)  # Warm up imports and caches
+    fs_events.clear()
+    counting = True
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func(data)
+    elapsed = time.perf_counter() - start
+    counting = False
+    per_call = {event: count / iterations for event, count in fs_events.items()}
+    total = sum(per_call.values())
+    print(f"{label:<22} {elapsed / iterations * 1000:>9.2f} ms/call {total:>8.1f} fs ops/call  {dict(per_call)}")
+    return elapsed, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pdf", help="PDF to extract (defaults to a generated sample)")
+    parser.add_argument("--docx", help="DOCX to extract (defaults to a generated sample)")
+    parser.add_argument("--iterations", type=int, default=30)
+    args = parser.parse_args()
+
+    pdf_data = open(args.pdf, "rb").read() if args.pdf else sample_pdf_bytes()
+    docx_data = open(args.docx, "rb").read() if args.docx else sample_docx_bytes()
+
+    sys.addaudithook(audit_hook)
+
+    print(f"PDF: {len(pdf_data)} bytes, DOCX: {len(docx_data)} bytes, {args.iterations} iterations")
+    legacy_time, legacy_ops = measure("legacy pdf", legacy_pdf, pdf_data, args.iterations)
+    memory_time, memory_ops = measure("in-memory pdf", in_memory_pdf, pdf_data, args.iterations)
+    print(f"  pdf: {legacy_ops - memory_ops:.1f} fs ops saved per call, "
+          f"{(legacy_time - memory_time) / args.iterations * 1000:.2f} ms saved per call")
+
+    legacy_time, legacy_ops = measure("legacy docx", legacy_docx, docx_data, args.iterations)
+    memory_time, memory_ops = measure("in-memory docx", in_memory_docx, docx_data, args.iterations)
+    print(f"  docx: {legacy_ops - memory_ops:.1f} fs ops saved per call, "
+          f"{(legacy_time - memory_time) / args.iterations * 1000:.2f} ms saved per call")
+
+
+if __name__ == "__main__":
+    main()
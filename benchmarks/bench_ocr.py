@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Benchmark the parallel page-level OCR pipeline against the serial path.
+
+The serial path mirrors the original AIResumeAnalyzer fallback: rasterize the
+whole document with convert_from_path, then OCR one page at a time.
+
+Usage:
+    python benchmarks/bench_ocr.py --generate 3 --pages 4
+    python benchmarks/bench_ocr.py --fixtures path/to/scanned_pdfs --dpi 200
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+
+# Add project root to path for imports
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from utils.ocr_pipeline import ParallelOCR, find_poppler_path
+
+DEFAULT_FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "scanned")
+
+SAMPLE_LINES = [
+    "JOHN DOE",
+    "Senior Software Engineer",
+    "EXPERIENCE",
+    "- Developed microservices in Python and Go serving 2M requests per day",
+    "- Led a team of 5 engineers to migrate infrastructure to Kubernetes",
+    "EDUCATION",
+    "B.Tech in Computer Science, 2016",
+    "SKILLS",
+    "Python, Java, SQL, Docker, Kubernetes, AWS, React",
+]
+
+
+def generate_fixtures(directory, documents, pages):
+    """Render image-only PDFs so text extraction has to fall back to OCR"""
+    from PIL import Image, ImageDraw
+
+    os.makedirs(directory, exist_ok=True)
+    for doc_index in range(documents):
+        images = []
+        for page_index in range(pages):
+            image = Image.new("RGB", (1700, 2200), "white")
+            draw = ImageDraw.Draw(image)
+            y = 100
+            for repeat in range(6):
+                for line in SAMPLE_LINES:
+                    draw.text((100, y), f"{line} ({page_index + 1}.{repeat})", fill="black")
+                    y += 32
+            images.append(image)
+        path = os.path.join(directory, f"scanned_{doc_index + 1}.pdf")
+        images[0].save(path, save_all=True, append_images=images[1:], resolution=200)
+        print(f"Generated {path} ({pages} pages)")
+
+
+def serial_ocr(pdf_path, dpi, poppler_path):
+    """The original path: rasterize everything, then OCR page by page"""
+    from pdf2image import convert_from_path
+    import pytesseract
+
+    images = convert_from_path(pdf_path, dpi=dpi, poppler_path=poppler_path)
+    return "\n".join(pytesseract.image_to_string(image) for image in images)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURE_DIR, help="Directory of scanned PDFs")
+    parser.add_argument("--generate", type=int, default=0, help="Generate N synthetic scanned PDFs first")
+    parser.add_argument("--pages", type=int, default=4, help="Pages per generated PDF")
+    parser.add_argument("--dpi", type=int, default=200)
+    parser.add_argument("--timeout", type=float, default=60)
+    args = parser.parse_args()
+
+    if args.generate:
+        generate_fixtures(args.fixtures, args.generate, args.pages)
+
+    pdfs = sorted(glob.glob(os.path.join(args.fixtures, "*.pdf")))
+    if not pdfs:
+        print(f"No PDFs found in {args.fixtures}. Use --generate N to create fixtures.")
+        sys.exit(1)
+
+    poppler_path = find_poppler_path()
+    ocr = ParallelOCR(dpi=args.dpi, page_timeout=args.timeout, poppler_path=poppler_path)
+
+    # Warm up the process pool so worker start-up is not billed to the first file
+    ocr.extract_text(pdfs[0])
+
+    print(f"{'file':<30} {'pages':>5} {'serial (s)':>11} {'parallel (s)':>13} {'speedup':>8}")
+    total_serial = total_parallel = 0.0
+    for pdf_path in pdfs:
+        pages = ocr.page_count(pdf_path)
+
+        start = time.perf_counter()
+        serial_text = serial_ocr(pdf_path, args.dpi, poppler_path)
+        serial_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        parallel_text = ocr.extract_text(pdf_path)
+        parallel_time = time.perf_counter() - start
+
+        total_serial += serial_time
+        total_parallel += parallel_time
+        if len(serial_text.split()) != len(parallel_text.split()):
+            print(f"  warning: word counts differ for {pdf_path}")
+        print(f"{os.path.basename(pdf_path):<30} {pages:>5} {serial_time:>11.2f} "
+              f"{parallel_time:>13.2f} {serial_time / parallel_time:>7.2f}x")
+
+    print(f"{'total':<30} {'':>5} {total_serial:>11.2f} {total_parallel:>13.2f} "
+          f"{total_serial / total_parallel:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,129 @@
+import os
 import sqlite3
+import threading
 from datetime import datetime
 
+from config.migrations import SCORE_BUCKETS, apply_migrations
+from config.rollups import resume_daily_trend, resume_role_counts, resume_totals
+from config.skills import monthly_skill_trend, save_resume_skills, skill_gaps, top_skills, trending_skills
+
+DB_PATH = os.getenv('DB_PATH', 'resume_data.db')
+
+
+class PooledConnection(sqlite3.Connection):
+    """sqlite3 connection whose close() hands it back to its pool.
+
+    It is still a real sqlite3.Connection, so pandas.read_sql_query and the
+    existing conn = get_database_connection() ... conn.close() code work
+    unchanged, and the per-connection prepared statement cache survives
+    between calls.
+    """
+
+    pool = None
+
+    def close(self):
+        if self.pool is None:
+            super().close()
+        else:
+            self.pool.release(self)
+
+    def discard(self):
+        """Close the underlying connection for real"""
+        super().close()
+
+
+class ConnectionPool:
+    """Thread-safe pool of WAL-mode connections to one SQLite database.
+
+    Connections are handed to one thread at a time (check_same_thread is
+    off for that reason) and reset with a rollback when they come back. At
+    most max_idle connections are kept; extra ones are closed on release.
+    """
+
+    def __init__(self, db_path, max_idle=8, busy_timeout=5.0, cached_statements=256):
+        self.db_path = db_path
+        self.max_idle = max_idle
+        self.busy_timeout = busy_timeout
+        self.cached_statements = cached_statements
+        self._idle = []
+        self._lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout, check_same_thread=False,
+                               cached_statements=self.cached_statements, factory=PooledConnection)
+        # WAL lets readers run alongside the single writer; NORMAL sync is durable enough with WAL
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(f'PRAGMA busy_timeout={int(self.busy_timeout * 1000)}')
+        conn.pool = self
+        self.created += 1
+        return conn
+
+    def acquire(self):
+        with self._lock:
+            if self._idle:
+                self.reused += 1
+                return self._idle.pop()
+        return self._connect()
+
+    def release(self, conn):
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            conn.discard()
+            return
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+                return
+        conn.discard()
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.discard()
+
+    def stats(self):
+        with self._lock:
+            return {'created': self.created, 'reused': self.reused, 'idle': len(self._idle)}
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+_initialized_paths = set()
+_init_lock = threading.Lock()
+
+
+def get_connection_pool(db_path=None):
+    """Return the process-wide pool for a database path (DB_PATH by default)"""
+    db_path = db_path or DB_PATH
+    pool = _pools.get(db_path)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(db_path)
+            if pool is None:
+                pool = _pools[db_path] = ConnectionPool(db_path, max_idle=int(os.getenv('DB_POOL_SIZE', '8')))
+    return pool
+
 def get_database_connection():
-    """Create and return a database connection"""
-    conn = sqlite3.connect('resume_data.db')
-    return conn
+    """Return a pooled database connection; close() returns it to the pool"""
+    return get_connection_pool().acquire()
 
 def init_database():
-    """Initialize database tables"""
+    """Initialize database tables (once per process)"""
+    if DB_PATH in _initialized_paths:
+        return
+    with _init_lock:
+        if DB_PATH in _initialized_paths:
+            return
+        _create_schema()
+        _initialized_paths.add(DB_PATH)
+
+def _create_schema():
     conn = get_database_connection()
     cursor = conn.cursor()
     
@@ -92,13 +208,107 @@ def init_database():
     )
     ''')
 
+    # Create ai_analysis table
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS ai_analysis (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        resume_id INTEGER,
+        model_used TEXT,
+        resume_score INTEGER,
+        job_role TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (resume_id) REFERENCES resume_data (id)
+    )
+    ''')
+    
+    # Create analysis_jobs table for the background AI analysis queue
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS analysis_jobs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        fingerprint TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'queued',
+        payload TEXT NOT NULL,
+        progress TEXT,
+        result TEXT,
+        error TEXT,
+        worker TEXT,
+        attempts INTEGER DEFAULT 0,
+        created_at REAL NOT NULL,
+        started_at REAL,
+        updated_at REAL NOT NULL,
+        finished_at REAL
+    )
+    ''')
+
     # Add default admin user if it doesn't exist
     cursor.execute('SELECT * FROM admin WHERE email = ?', ('admin@example.com',))
     if cursor.fetchone() is None:
         cursor.execute('INSERT INTO admin (email, password) VALUES (?, ?)', ('admin@example.com', 'admin123'))
 
     conn.commit()
-    conn.close()
+    
+    # Indexes and later schema changes are versioned migrations
+    try:
+        apply_migrations(conn)
+    finally:
+        conn.close()
+
+RESUME_DATA_INSERT = '''
+INSERT INTO resume_data (
+    name, email, phone, linkedin, github, portfolio,
+    summary, target_role, target_category, education, 
+    experience, projects, skills, template
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+# Batch scoring keys resumes on their document hash (unique index from migration 7)
+RESUME_DATA_INSERT_BY_HASH = '''
+INSERT OR IGNORE INTO resume_data (
+    name, email, phone, linkedin, github, portfolio,
+    summary, target_role, target_category, education, 
+    experience, projects, skills, template, content_hash
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+RESUME_ANALYSIS_INSERT = '''
+INSERT INTO resume_analysis (
+    resume_id, ats_score, keyword_match_score,
+    format_score, section_score, missing_skills,
+    recommendations
+) VALUES (?, ?, ?, ?, ?, ?, ?)
+'''
+
+def _resume_data_row(data):
+    """Build the resume_data insert parameters for a resume dict"""
+    personal_info = data.get('personal_info', {})
+    return (
+        personal_info.get('full_name', ''),
+        personal_info.get('email', ''),
+        personal_info.get('phone', ''),
+        personal_info.get('linkedin', ''),
+        personal_info.get('github', ''),
+        personal_info.get('portfolio', ''),
+        data.get('summary', ''),
+        data.get('target_role', ''),
+        data.get('target_category', ''),
+        str(data.get('education', [])),
+        str(data.get('experience', [])),
+        str(data.get('projects', [])),
+        str(data.get('skills', [])),
+        data.get('template', '')
+    )
+
+def _resume_analysis_row(resume_id, analysis):
+    """Build the resume_analysis insert parameters for an analysis dict"""
+    return (
+        resume_id,
+        float(analysis.get('ats_score', 0)),
+        float(analysis.get('keyword_match_score', 0)),
+        float(analysis.get('format_score', 0)),
+        float(analysis.get('section_score', 0)),
+        analysis.get('missing_skills', ''),
+        analysis.get('recommendations', '')
+    )
 
 def save_resume_data(data):
     """Save resume data to database"""
@@ -106,33 +316,12 @@ def save_resume_data(data):
     cursor = conn.cursor()
     
     try:
-        personal_info = data.get('personal_info', {})
-        
-        cursor.execute('''
-        INSERT INTO resume_data (
-            name, email, phone, linkedin, github, portfolio,
-            summary, target_role, target_category, education, 
-            experience, projects, skills, template
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            personal_info.get('full_name', ''),
-            personal_info.get('email', ''),
-            personal_info.get('phone', ''),
-            personal_info.get('linkedin', ''),
-            personal_info.get('github', ''),
-            personal_info.get('portfolio', ''),
-            data.get('summary', ''),
-            data.get('target_role', ''),
-            data.get('target_category', ''),
-            str(data.get('education', [])),
-            str(data.get('experience', [])),
-            str(data.get('projects', [])),
-            str(data.get('skills', [])),
-            data.get('template', '')
-        ))
+        cursor.execute(RESUME_DATA_INSERT, _resume_data_row(data))
+        resume_id = cursor.lastrowid
+        save_resume_skills(cursor, resume_id, data)
         
         conn.commit()
-        return cursor.lastrowid
+        return resume_id
     except Exception as e:
         print(f"Error saving resume data: {str(e)}")
         conn.rollback()
@@ -146,21 +335,7 @@ def save_analysis_data(resume_id, analysis):
     cursor = conn.cursor()
     
     try:
-        cursor.execute('''
-        INSERT INTO resume_analysis (
-            resume_id, ats_score, keyword_match_score,
-            format_score, section_score, missing_skills,
-            recommendations
-        ) VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            resume_id,
-            float(analysis.get('ats_score', 0)),
-            float(analysis.get('keyword_match_score', 0)),
-            float(analysis.get('format_score', 0)),
-            float(analysis.get('section_score', 0)),
-            analysis.get('missing_skills', ''),
-            analysis.get('recommendations', '')
-        ))
+        cursor.execute(RESUME_ANALYSIS_INSERT, _resume_analysis_row(resume_id, analysis))
         
         conn.commit()
     except Exception as e:
@@ -169,19 +344,47 @@ def save_analysis_data(resume_id, analysis):
     finally:
         conn.close()
 
+def save_resume_analyses_bulk(records):
+    """Save many (resume_data, analyses) pairs in a single transaction.
+
+    Each resume_data carries the content_hash of its document and is stored
+    once, with all of its analyses; a resume whose hash is already stored is
+    skipped along with its analyses, so saving a batch twice is harmless.
+    Returns the new resume ids in order, or None if the batch was rolled back.
+    """
+    conn = get_database_connection()
+    cursor = conn.cursor()
+    
+    try:
+        resume_ids = []
+        analysis_rows = []
+        for data, analyses in records:
+            cursor.execute(RESUME_DATA_INSERT_BY_HASH, _resume_data_row(data) + (data['content_hash'],))
+            if cursor.rowcount == 0:
+                continue
+            resume_ids.append(cursor.lastrowid)
+            save_resume_skills(cursor, cursor.lastrowid, data)
+            analysis_rows.extend(_resume_analysis_row(cursor.lastrowid, analysis) for analysis in analyses)
+        cursor.executemany(RESUME_ANALYSIS_INSERT, analysis_rows)
+        
+        conn.commit()
+        return resume_ids
+    except Exception as e:
+        print(f"Error saving resume batch: {str(e)}")
+        conn.rollback()
+        return None
+    finally:
+        conn.close()
+
 def get_resume_stats():
     """Get statistics about resumes"""
     conn = get_database_connection()
     cursor = conn.cursor()
     
     try:
-        # Get total resumes
-        cursor.execute('SELECT COUNT(*) FROM resume_data')
-        total_resumes = cursor.fetchone()[0]
-        
-        # Get average ATS score
-        cursor.execute('SELECT AVG(ats_score) FROM resume_analysis')
-        avg_ats_score = cursor.fetchone()[0] or 0
+        # Totals come from the daily rollup plus a raw scan of today's rows
+        total_resumes, ats_scored, ats_sum = resume_totals(conn)
+        avg_ats_score = ats_sum / ats_scored if ats_scored else 0
         
         # Get recent activity
         cursor.execute('''
@@ -203,6 +406,70 @@ def get_resume_stats():
     finally:
         conn.close()
 
+def get_resume_trends(days=30, top_roles=10):
+    """Get daily resume/analysis counts and the most targeted roles"""
+    conn = get_database_connection()
+    
+    try:
+        daily = [
+            {
+                'date': day,
+                'resumes': resumes,
+                'analyses': analyses,
+                'avg_ats_score': round(ats_sum / ats_scored, 2) if ats_scored else None
+            } for day, resumes, analyses, ats_scored, ats_sum in resume_daily_trend(conn, days)
+        ]
+        roles = [{'role': role, 'count': count} for role, count in resume_role_counts(conn, top_roles)]
+        return {'daily_trend': daily, 'top_roles': roles}
+    except Exception as e:
+        print(f"Error getting resume trends: {str(e)}")
+        return {'daily_trend': [], 'top_roles': []}
+    finally:
+        conn.close()
+
+def get_skill_analytics(role=None, months=12, limit=15):
+    """Get the most listed skills (for one role, if given), its skill gaps and a monthly trend"""
+    conn = get_database_connection()
+    
+    try:
+        skills = [
+            {
+                'skill': skill,
+                'category': category,
+                'resumes': resumes,
+                'avg_proficiency': round(proficiency, 2) if proficiency is not None else None
+            } for skill, category, resumes, proficiency in top_skills(conn, role, limit)
+        ]
+        gaps = [
+            {
+                'skill': skill,
+                'missing': missing,
+                'resumes': resumes,
+                'missing_rate': round(missing / resumes * 100, 1) if resumes else 0
+            } for skill, missing, resumes in (skill_gaps(conn, role) if role else [])
+        ]
+        trend = [{'month': month, 'skill': skill, 'resumes': resumes}
+                 for month, skill, resumes in monthly_skill_trend(conn, months)]
+        return {'top_skills': skills, 'skill_gaps': gaps, 'monthly_trend': trend}
+    except Exception as e:
+        print(f"Error getting skill analytics: {str(e)}")
+        return {'top_skills': [], 'skill_gaps': [], 'monthly_trend': []}
+    finally:
+        conn.close()
+
+def get_trending_skills(days=90, limit=9):
+    """Get the skills most listed in recent resumes, with the count for the window before"""
+    conn = get_database_connection()
+    
+    try:
+        return [{'skill': skill, 'category': category, 'resumes': current, 'previous': previous}
+                for skill, category, current, previous in trending_skills(conn, days, limit)]
+    except Exception as e:
+        print(f"Error getting trending skills: {str(e)}")
+        return []
+    finally:
+        conn.close()
+
 def log_admin_action(admin_email, action):
     """Log admin login/logout actions"""
     conn = get_database_connection()
@@ -307,20 +574,7 @@ def save_ai_analysis_data(resume_id, analysis_data):
     cursor = conn.cursor()
     
     try:
-        # Check if the ai_analysis table exists
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS ai_analysis (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                resume_id INTEGER,
-                model_used TEXT,
-                resume_score INTEGER,
-                job_role TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (resume_id) REFERENCES resume_data (id)
-            )
-        """)
-        
-        # Insert the analysis data
+        # Insert the analysis data (the table is created by init_database)
         cursor.execute("""
             INSERT INTO ai_analysis (
                 resume_id, model_used, resume_score, job_role
@@ -341,58 +595,64 @@ def save_ai_analysis_data(resume_id, analysis_data):
     finally:
         conn.close()
 
+def _empty_ai_analysis_stats():
+    return {
+        "total_analyses": 0,
+        "model_usage": [],
+        "average_score": 0,
+        "top_job_roles": [],
+        "daily_trend": [],
+        "score_distribution": [],
+        "recent_analyses": []
+    }
+
+
+def _ai_rollup_stats(cursor):
+    """Aggregate AI analysis stats from the ai_analysis_rollup table in one query.
+
+    The rollup is kept current by triggers on ai_analysis (see config/migrations.py),
+    so this reads a few dozen rows however large ai_analysis grows.
+    """
+    cursor.execute("""
+        SELECT dimension, key, analyses, scored, score_sum
+        FROM (
+            SELECT dimension, key, analyses, scored, score_sum,
+                   ROW_NUMBER() OVER (PARTITION BY dimension ORDER BY analyses DESC, key) AS rank
+            FROM ai_analysis_rollup
+            WHERE dimension != 'day' OR key >= date('now', '-7 days')
+        )
+        WHERE dimension != 'role' OR rank <= 5
+        ORDER BY dimension, rank
+    """)
+    stats = _empty_ai_analysis_stats()
+    buckets = {}
+    for dimension, key, analyses, scored, score_sum in cursor.fetchall():
+        if dimension == 'total':
+            stats["total_analyses"] = analyses
+            stats["average_score"] = round(score_sum / scored, 1) if scored else 0
+        elif dimension == 'model':
+            stats["model_usage"].append({"model": key, "count": analyses})
+        elif dimension == 'role':
+            stats["top_job_roles"].append({"role": key, "count": analyses})
+        elif dimension == 'day':
+            stats["daily_trend"].append({"date": key, "count": analyses})
+        elif dimension == 'bucket':
+            buckets[key] = analyses
+    stats["daily_trend"].sort(key=lambda day: day["date"])
+    stats["score_distribution"] = [
+        {"range": f"{low}-{high}", "count": buckets.get(f"{low}-{high}", 0)}
+        for low, high in SCORE_BUCKETS
+    ]
+    return stats
+
 def get_ai_analysis_stats():
     """Get statistics about AI analyzer usage"""
     conn = get_database_connection()
     cursor = conn.cursor()
     
     try:
-        # Check if the ai_analysis table exists
-        cursor.execute("""
-            SELECT name FROM sqlite_master WHERE type='table' AND name='ai_analysis'
-        """)
-        
-        if not cursor.fetchone():
-            return {
-                "total_analyses": 0,
-                "model_usage": [],
-                "average_score": 0,
-                "top_job_roles": []
-            }
-        
-        # Get total number of analyses
-        cursor.execute("SELECT COUNT(*) FROM ai_analysis")
-        total_analyses = cursor.fetchone()[0]
-        
-        # Get model usage statistics
-        cursor.execute("""
-            SELECT model_used, COUNT(*) as count
-            FROM ai_analysis
-            GROUP BY model_used
-            ORDER BY count DESC
-        """)
-        model_usage = [{"model": row[0], "count": row[1]} for row in cursor.fetchall()]
-        
-        # Get average resume score
-        cursor.execute("SELECT AVG(resume_score) FROM ai_analysis")
-        average_score = cursor.fetchone()[0] or 0
-        
-        # Get top job roles
-        cursor.execute("""
-            SELECT job_role, COUNT(*) as count
-            FROM ai_analysis
-            GROUP BY job_role
-            ORDER BY count DESC
-            LIMIT 5
-        """)
-        top_job_roles = [{"role": row[0], "count": row[1]} for row in cursor.fetchall()]
-        
-        return {
-            "total_analyses": total_analyses,
-            "model_usage": model_usage,
-            "average_score": round(average_score, 1),
-            "top_job_roles": top_job_roles
-        }
+        stats = _ai_rollup_stats(cursor)
+        return {key: stats[key] for key in ("total_analyses", "model_usage", "average_score", "top_job_roles")}
     except Exception as e:
         print(f"Error getting AI analysis stats: {e}")
         return {
@@ -410,85 +670,16 @@ def get_detailed_ai_analysis_stats():
     cursor = conn.cursor()
     
     try:
-        # Check if the ai_analysis table exists
-        cursor.execute("""
-            SELECT name FROM sqlite_master WHERE type='table' AND name='ai_analysis'
-        """)
-        
-        if not cursor.fetchone():
-            return {
-                "total_analyses": 0,
-                "model_usage": [],
-                "average_score": 0,
-                "top_job_roles": [],
-                "daily_trend": [],
-                "score_distribution": [],
-                "recent_analyses": []
-            }
-        
-        # Get total number of analyses
-        cursor.execute("SELECT COUNT(*) FROM ai_analysis")
-        total_analyses = cursor.fetchone()[0]
-        
-        # Get model usage statistics
-        cursor.execute("""
-            SELECT model_used, COUNT(*) as count
-            FROM ai_analysis
-            GROUP BY model_used
-            ORDER BY count DESC
-        """)
-        model_usage = [{"model": row[0], "count": row[1]} for row in cursor.fetchall()]
-        
-        # Get average resume score
-        cursor.execute("SELECT AVG(resume_score) FROM ai_analysis")
-        average_score = cursor.fetchone()[0] or 0
-        
-        # Get top job roles
-        cursor.execute("""
-            SELECT job_role, COUNT(*) as count
-            FROM ai_analysis
-            GROUP BY job_role
-            ORDER BY count DESC
-            LIMIT 5
-        """)
-        top_job_roles = [{"role": row[0], "count": row[1]} for row in cursor.fetchall()]
+        stats = _ai_rollup_stats(cursor)
         
-        # Get daily trend for the last 7 days
-        cursor.execute("""
-            SELECT DATE(created_at) as date, COUNT(*) as count
-            FROM ai_analysis
-            WHERE created_at >= date('now', '-7 days')
-            GROUP BY DATE(created_at)
-            ORDER BY date
-        """)
-        daily_trend = [{"date": row[0], "count": row[1]} for row in cursor.fetchall()]
-        
-        # Get score distribution
-        score_ranges = [
-            {"min": 0, "max": 20, "range": "0-20"},
-            {"min": 21, "max": 40, "range": "21-40"},
-            {"min": 41, "max": 60, "range": "41-60"},
-            {"min": 61, "max": 80, "range": "61-80"},
-            {"min": 81, "max": 100, "range": "81-100"}
-        ]
-        
-        score_distribution = []
-        for range_info in score_ranges:
-            cursor.execute("""
-                SELECT COUNT(*) FROM ai_analysis 
-                WHERE resume_score >= ? AND resume_score <= ?
-            """, (range_info["min"], range_info["max"]))
-            count = cursor.fetchone()[0]
-            score_distribution.append({"range": range_info["range"], "count": count})
-        
-        # Get recent analyses
+        # Get recent analyses (walks the created_at index backwards)
         cursor.execute("""
             SELECT model_used, resume_score, job_role, datetime(created_at) as date
             FROM ai_analysis
             ORDER BY created_at DESC
             LIMIT 5
         """)
-        recent_analyses = [
+        stats["recent_analyses"] = [
             {
                 "model": row[0],
                 "score": row[1],
@@ -496,27 +687,10 @@ def get_detailed_ai_analysis_stats():
                 "date": row[3]
             } for row in cursor.fetchall()
         ]
-        
-        return {
-            "total_analyses": total_analyses,
-            "model_usage": model_usage,
-            "average_score": round(average_score, 1),
-            "top_job_roles": top_job_roles,
-            "daily_trend": daily_trend,
-            "score_distribution": score_distribution,
-            "recent_analyses": recent_analyses
-        }
+        return stats
     except Exception as e:
         print(f"Error getting detailed AI analysis stats: {e}")
-        return {
-            "total_analyses": 0,
-            "model_usage": [],
-            "average_score": 0,
-            "top_job_roles": [],
-            "daily_trend": [],
-            "score_distribution": [],
-            "recent_analyses": []
-        }
+        return _empty_ai_analysis_stats()
     finally:
         conn.close()
 
@@ -534,6 +708,8 @@ def reset_ai_analysis_stats():
         if not cursor.fetchone():
             return {"success": False, "message": "AI analysis table does not exist"}
         
+        # Clear the rollup first so the per-row delete trigger has nothing to update
+        cursor.execute("DELETE FROM ai_analysis_rollup")
         # Delete all records from the ai_analysis table
         cursor.execute("DELETE FROM ai_analysis")
         conn.commit()
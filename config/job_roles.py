@@ -164,4 +164,16 @@ JOB_ROLES = {
             }
         }
     }
-}
\ No newline at end of file
+}
+
+
+def get_role_info(role_name, category=None):
+    """Return (category, role_name, role_info) for a case-insensitive role name, or (None, None, None)"""
+    role_key = role_name.strip().lower()
+    for role_category, roles in JOB_ROLES.items():
+        if category and role_category != category:
+            continue
+        for name, info in roles.items():
+            if name.lower() == role_key:
+                return role_category, name, info
+    return None, None, None
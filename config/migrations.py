@@ -0,0 +1,327 @@
+"""
+Versioned schema migrations for the resume SQLite database.
+
+Each migration has a version number, a description and either a list of
+SQL statements or a function taking the connection. Applied versions are
+recorded in the schema_version table, and init_database applies whatever
+is pending, in order, each migration in its own transaction. To change the
+schema, append a migration; never edit one that has shipped.
+
+Usage:
+    python -m config.migrations            # apply pending migrations
+    python -m config.migrations --status   # list applied and pending versions
+"""
+
+import argparse
+import time
+
+from config.skills import backfill_resume_skills
+
+SCORE_BUCKETS = [(0, 20), (21, 40), (41, 60), (61, 80), (81, 100)]
+
+
+def _score_bucket_sql(column):
+    """CASE expression naming the dashboard score bucket of a column (NULL outside them)"""
+    cases = ' '.join(f"WHEN {column} >= {low} AND {column} <= {high} THEN '{low}-{high}'"
+                     for low, high in SCORE_BUCKETS)
+    return f"CASE {cases} END"
+
+
+def _rollup_keys_sql(row):
+    """The (dimension, key) pairs an ai_analysis row counts towards, for a trigger's NEW/OLD row"""
+    return f'''
+        SELECT 'total' AS dimension, '' AS key
+        UNION ALL SELECT 'model', COALESCE({row}.model_used, '')
+        UNION ALL SELECT 'role', COALESCE({row}.job_role, '')
+        UNION ALL SELECT 'day', COALESCE(DATE({row}.created_at), '')
+        UNION ALL SELECT 'bucket', {_score_bucket_sql(f"{row}.resume_score")}
+    '''
+
+
+def _rollup_add_sql(row):
+    return f'''
+        INSERT INTO ai_analysis_rollup (dimension, key, analyses, scored, score_sum)
+        SELECT dimension, key, 1, {row}.resume_score IS NOT NULL, COALESCE({row}.resume_score, 0)
+        FROM ({_rollup_keys_sql(row)}) WHERE key IS NOT NULL
+        ON CONFLICT (dimension, key) DO UPDATE SET
+            analyses = analyses + excluded.analyses,
+            scored = scored + excluded.scored,
+            score_sum = score_sum + excluded.score_sum;
+    '''
+
+
+def _rollup_remove_sql(row):
+    return f'''
+        UPDATE ai_analysis_rollup SET
+            analyses = analyses - 1,
+            scored = scored - ({row}.resume_score IS NOT NULL),
+            score_sum = score_sum - COALESCE({row}.resume_score, 0)
+        WHERE (dimension, key) IN (SELECT dimension, key FROM ({_rollup_keys_sql(row)}) WHERE key IS NOT NULL);
+        DELETE FROM ai_analysis_rollup WHERE analyses <= 0;
+    '''
+
+
+def _rollup_backfill_sql():
+    bucket = _score_bucket_sql('resume_score')
+    aggregates = 'COUNT(*), COUNT(resume_score), COALESCE(SUM(resume_score), 0)'
+    return f'''
+        INSERT INTO ai_analysis_rollup (dimension, key, analyses, scored, score_sum)
+        SELECT 'total', '', {aggregates} FROM ai_analysis HAVING COUNT(*) > 0
+        UNION ALL SELECT 'model', COALESCE(model_used, ''), {aggregates} FROM ai_analysis GROUP BY 2
+        UNION ALL SELECT 'role', COALESCE(job_role, ''), {aggregates} FROM ai_analysis GROUP BY 2
+        UNION ALL SELECT 'day', COALESCE(DATE(created_at), ''), {aggregates} FROM ai_analysis GROUP BY 2
+        UNION ALL SELECT 'bucket', {bucket}, {aggregates} FROM ai_analysis WHERE {bucket} IS NOT NULL GROUP BY 2
+    '''
+
+
+SEARCH_COLUMNS = ['name', 'target_role', 'summary', 'skills', 'experience', 'projects']
+# bm25 weight per SEARCH_COLUMNS entry: a hit in the name, role or skills counts more
+SEARCH_WEIGHTS = [3.0, 2.0, 1.0, 2.0, 1.0, 1.0]
+
+
+def _create_resume_search(conn):
+    """Full-text index of resume_data (external content, synced by triggers); skipped without FTS5"""
+    columns = ', '.join(SEARCH_COLUMNS)
+    try:
+        # '+' and '#' are part of tokens so c++ and c# are searchable
+        conn.execute(f'''
+            CREATE VIRTUAL TABLE IF NOT EXISTS resume_search USING fts5(
+                {columns}, content='resume_data', content_rowid='id', prefix='2 3',
+                tokenize="unicode61 remove_diacritics 2 tokenchars '+#'"
+            )
+        ''')
+    except Exception as e:
+        if 'fts5' not in str(e):
+            raise
+        print(f"SQLite was built without FTS5; resume search falls back to LIKE: {e}")
+        return
+    new_values = ', '.join(f'new.{column}' for column in SEARCH_COLUMNS)
+    old_values = ', '.join(f'old.{column}' for column in SEARCH_COLUMNS)
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_resume_search_insert AFTER INSERT ON resume_data BEGIN
+            INSERT INTO resume_search (rowid, {columns}) VALUES (new.id, {new_values});
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_resume_search_delete AFTER DELETE ON resume_data BEGIN
+            INSERT INTO resume_search (resume_search, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_resume_search_update AFTER UPDATE OF {columns} ON resume_data BEGIN
+            INSERT INTO resume_search (resume_search, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+            INSERT INTO resume_search (rowid, {columns}) VALUES (new.id, {new_values});
+        END
+    ''')
+    conn.execute("INSERT INTO resume_search (resume_search) VALUES ('rebuild')")
+    # Persist the weights so ORDER BY rank uses them
+    conn.execute("INSERT INTO resume_search (resume_search, rank) VALUES ('rank', ?)",
+                 (f"bm25({', '.join(str(weight) for weight in SEARCH_WEIGHTS)})",))
+
+
+def _index_resume_skills(conn):
+    """One resume_skills row per resume and skill, filled from existing resumes, plus its daily rollup"""
+    conn.execute('DELETE FROM resume_skills')  # never written before this migration
+    conn.execute('DROP INDEX IF EXISTS idx_resume_skills_resume')  # a prefix of the unique index
+    conn.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_resume_skills_resume_skill ON resume_skills (resume_id, skill_name)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_resume_skills_created ON resume_skills (created_at)')
+    # Folded by config.rollups, like resume_daily_rollup
+    conn.execute('''CREATE TABLE IF NOT EXISTS skill_daily_rollup (
+        day TEXT NOT NULL,
+        target_role TEXT NOT NULL,
+        skill_name TEXT NOT NULL,
+        skill_category TEXT NOT NULL,
+        resumes INTEGER NOT NULL DEFAULT 0,
+        proficiency_sum REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (day, target_role, skill_name)
+    ) WITHOUT ROWID''')
+    backfill_resume_skills(conn)
+
+
+def _reindex_resume_skills(conn):
+    """Rebuild resume_skills with the current matching; the skill rollup refolds on next read"""
+    conn.execute('DELETE FROM resume_skills')
+    conn.execute('DELETE FROM skill_daily_rollup')
+    conn.execute("DELETE FROM rollup_watermarks WHERE name = 'skill_daily_rollup'")
+    backfill_resume_skills(conn)
+
+
+MIGRATIONS = [
+    (1, "Index the joins, orderings and groupings used by the dashboards", [
+        # get_all_resume_data joins resume_analysis on resume_id and reads the four scores
+        '''CREATE INDEX IF NOT EXISTS idx_resume_analysis_resume
+           ON resume_analysis (resume_id, ats_score, keyword_match_score, format_score, section_score)''',
+        'CREATE INDEX IF NOT EXISTS idx_resume_analysis_created ON resume_analysis (created_at)',
+        # Recent activity and the admin listing order by created_at
+        'CREATE INDEX IF NOT EXISTS idx_resume_data_created ON resume_data (created_at)',
+        'CREATE INDEX IF NOT EXISTS idx_resume_data_role ON resume_data (target_role, target_category)',
+        'CREATE INDEX IF NOT EXISTS idx_resume_skills_resume ON resume_skills (resume_id)',
+        'CREATE INDEX IF NOT EXISTS idx_resume_skills_skill ON resume_skills (skill_name, skill_category)',
+        # AI stats: GROUP BY model_used / job_role, AVG and ranges of resume_score, daily trend
+        'CREATE INDEX IF NOT EXISTS idx_ai_analysis_model ON ai_analysis (model_used)',
+        'CREATE INDEX IF NOT EXISTS idx_ai_analysis_role ON ai_analysis (job_role)',
+        'CREATE INDEX IF NOT EXISTS idx_ai_analysis_score ON ai_analysis (resume_score)',
+        '''CREATE INDEX IF NOT EXISTS idx_ai_analysis_created
+           ON ai_analysis (created_at, model_used, resume_score, job_role)''',
+        'CREATE INDEX IF NOT EXISTS idx_admin_logs_timestamp ON admin_logs (timestamp)',
+        'CREATE INDEX IF NOT EXISTS idx_analysis_jobs_status ON analysis_jobs (status, id)',
+        'CREATE INDEX IF NOT EXISTS idx_analysis_jobs_fingerprint ON analysis_jobs (fingerprint, status)',
+        'ANALYZE',
+    ]),
+    (2, "Keep a trigger-maintained rollup of ai_analysis for the AI stats dashboard", [
+        '''CREATE TABLE IF NOT EXISTS ai_analysis_rollup (
+            dimension TEXT NOT NULL,
+            key TEXT NOT NULL,
+            analyses INTEGER NOT NULL DEFAULT 0,
+            scored INTEGER NOT NULL DEFAULT 0,
+            score_sum REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (dimension, key)
+        ) WITHOUT ROWID''',
+        f'''CREATE TRIGGER IF NOT EXISTS trg_ai_analysis_rollup_insert AFTER INSERT ON ai_analysis
+           BEGIN {_rollup_add_sql('NEW')} END''',
+        f'''CREATE TRIGGER IF NOT EXISTS trg_ai_analysis_rollup_delete AFTER DELETE ON ai_analysis
+           BEGIN {_rollup_remove_sql('OLD')} END''',
+        f'''CREATE TRIGGER IF NOT EXISTS trg_ai_analysis_rollup_update
+           AFTER UPDATE OF model_used, job_role, resume_score, created_at ON ai_analysis
+           BEGIN {_rollup_remove_sql('OLD')} {_rollup_add_sql('NEW')} END''',
+        'DELETE FROM ai_analysis_rollup',
+        _rollup_backfill_sql(),
+    ]),
+    (3, "Add the daily resume rollup and rollup watermarks (filled by config.rollups)", [
+        '''CREATE TABLE IF NOT EXISTS resume_daily_rollup (
+            day TEXT NOT NULL,
+            target_role TEXT NOT NULL,
+            target_category TEXT NOT NULL,
+            resumes INTEGER NOT NULL DEFAULT 0,
+            analyses INTEGER NOT NULL DEFAULT 0,
+            ats_scored INTEGER NOT NULL DEFAULT 0,
+            ats_sum REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, target_role, target_category)
+        ) WITHOUT ROWID''',
+        '''CREATE TABLE IF NOT EXISTS rollup_watermarks (
+            name TEXT PRIMARY KEY,
+            high_water TEXT NOT NULL
+        )''',
+    ]),
+    (4, "Add resume fingerprints, their LSH bands and per-fingerprint analysis results", [
+        '''CREATE TABLE IF NOT EXISTS resume_fingerprints (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            resume_id INTEGER,
+            content_hash TEXT NOT NULL,
+            signature BLOB NOT NULL,
+            uploads INTEGER NOT NULL DEFAULT 1,
+            created_at REAL NOT NULL,
+            last_seen REAL,
+            FOREIGN KEY (resume_id) REFERENCES resume_data (id)
+        )''',
+        'CREATE INDEX IF NOT EXISTS idx_resume_fingerprints_hash ON resume_fingerprints (content_hash)',
+        'CREATE INDEX IF NOT EXISTS idx_resume_fingerprints_resume ON resume_fingerprints (resume_id)',
+        '''CREATE TABLE IF NOT EXISTS resume_fingerprint_bands (
+            band INTEGER NOT NULL,
+            bucket INTEGER NOT NULL,
+            fingerprint_id INTEGER NOT NULL,
+            PRIMARY KEY (band, bucket, fingerprint_id)
+        ) WITHOUT ROWID''',
+        '''CREATE TABLE IF NOT EXISTS fingerprint_results (
+            fingerprint_id INTEGER NOT NULL,
+            scope TEXT NOT NULL,
+            result TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            PRIMARY KEY (fingerprint_id, scope)
+        )''',
+    ]),
+    (5, "Add the resume_search full-text index over resume_data", _create_resume_search),
+    (6, "Fill resume_skills from resume_data.skills and add the daily skill rollup", _index_resume_skills),
+    (7, "Key batch-scored resumes on their document hash", [
+        'ALTER TABLE resume_data ADD COLUMN content_hash TEXT',
+        # Uploads from the app leave it NULL, and NULLs never conflict
+        'CREATE UNIQUE INDEX IF NOT EXISTS idx_resume_data_content_hash ON resume_data (content_hash)',
+    ]),
+    (8, "Count the submissions coalesced onto each analysis job", [
+        'ALTER TABLE analysis_jobs ADD COLUMN coalesced INTEGER NOT NULL DEFAULT 0',
+    ]),
+    (9, "Count how often each stored fingerprint result is reused", [
+        'ALTER TABLE fingerprint_results ADD COLUMN reuses INTEGER NOT NULL DEFAULT 0',
+    ]),
+    (10, "Re-derive resume_skills keeping only known skills and aliases", _reindex_resume_skills),
+    (11, "Record each resume fingerprint's closest near duplicate", [
+        'ALTER TABLE resume_fingerprints ADD COLUMN near_duplicate_of INTEGER',
+        'ALTER TABLE resume_fingerprints ADD COLUMN near_similarity REAL',
+    ]),
+]
+
+
+def _ensure_version_table(conn):
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        description TEXT NOT NULL,
+        applied_at REAL NOT NULL
+    )
+    ''')
+    conn.commit()
+
+
+def applied_versions(conn):
+    """Return the set of migration versions recorded in schema_version"""
+    _ensure_version_table(conn)
+    return {row[0] for row in conn.execute('SELECT version FROM schema_version')}
+
+
+def current_version(conn):
+    """Return the highest applied migration version (0 for a fresh database)"""
+    _ensure_version_table(conn)
+    return conn.execute('SELECT COALESCE(MAX(version), 0) FROM schema_version').fetchone()[0]
+
+
+def apply_migrations(conn, target=None):
+    """Apply pending migrations up to target (default: all) and return the versions applied"""
+    applied = []
+    for version, description, steps in sorted(MIGRATIONS, key=lambda migration: migration[0]):
+        if target is not None and version > target:
+            break
+        if version in applied_versions(conn):
+            continue
+        try:
+            # IMMEDIATE takes the write lock up front, so two processes starting
+            # together cannot both apply the same migration
+            conn.execute('BEGIN IMMEDIATE')
+            if conn.execute('SELECT 1 FROM schema_version WHERE version = ?', (version,)).fetchone():
+                conn.rollback()
+                continue
+            if callable(steps):
+                steps(conn)
+            else:
+                for statement in steps:
+                    conn.execute(statement)
+            conn.execute('INSERT INTO schema_version (version, description, applied_at) VALUES (?, ?, ?)',
+                         (version, description, time.time()))
+            conn.commit()
+            applied.append(version)
+        except Exception as e:
+            conn.rollback()
+            print(f"Error applying migration {version} ({description}): {e}")
+            raise
+    return applied
+
+
+def main():
+    from config.database import get_database_connection, init_database
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--status", action="store_true", help="Only list applied and pending migrations")
+    args = parser.parse_args()
+
+    if not args.status:
+        init_database()
+    conn = get_database_connection()
+    try:
+        done = applied_versions(conn)
+        for version, description, _ in MIGRATIONS:
+            print(f"{version:4d}  {'applied' if version in done else 'pending':8}  {description}")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
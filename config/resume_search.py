@@ -0,0 +1,187 @@
+"""
+Full-text search over stored resumes for the admin dashboard.
+
+resume_search (migration 5) is an FTS5 index of resume_data's name,
+target_role, summary, skills, experience and projects. It is external
+content: the text stays in resume_data and triggers keep the index in
+step with every insert, update and delete. Matches are ranked by bm25
+with the column weights stored in the index, so name, role and skills
+hits rank above a passing mention in a project description.
+
+Search box syntax: every word must match; "quoted words" match as a
+phrase; OR between two terms matches either; a trailing * matches a
+prefix (java* also finds javascript). Anything else is taken literally,
+so c++, c# or a stray quote never produce an FTS5 syntax error.
+
+bm25 has to score every match before the best can be picked, which for a
+word found in most resumes (python, sql) costs ~2 µs per match. Queries
+with more than RANK_WINDOW matches therefore rank only the newest
+RANK_WINDOW of them; the reported total still counts every match.
+
+On an SQLite build without FTS5 the search falls back to LIKE scans.
+
+Usage:
+    python -m config.resume_search "python aws"
+    python -m config.resume_search --rebuild   # reindex resume_data and merge index segments
+"""
+
+import argparse
+import re
+import time
+
+from config.database import get_database_connection, init_database
+from config.migrations import SEARCH_COLUMNS
+
+# Snippet highlight markers; control characters never appear in extracted resume text
+MARK_START = '\x02'
+MARK_END = '\x03'
+RANK_WINDOW = 5000
+
+TERM_PATTERN = re.compile(r'"([^"]*)"?|(\S+)')
+# Mirrors the index tokenizer: letters and digits, plus '+' and '#'
+WORD_PATTERN = re.compile(r'(?:[^\W_]|[+#])+')
+MARKDOWN_SPECIAL = re.compile(r'([\\`*_{}\[\]()<>#+\-.!|~])')
+
+
+def fts_query(text):
+    """Turn a search box entry into an FTS5 MATCH expression ('' when nothing is searchable)"""
+    parts = []
+    for phrase, word in TERM_PATTERN.findall(text or ''):
+        if word == 'OR':
+            if parts and parts[-1] != 'OR':
+                parts.append('OR')
+            continue
+        words = WORD_PATTERN.findall((phrase or word).lower())
+        if not words:
+            continue
+        term = '"' + ' '.join(words) + '"'
+        if word.endswith('*'):
+            term += '*'
+        parts.append(term)
+    while parts and parts[-1] == 'OR':
+        parts.pop()
+    return ' '.join(parts)
+
+
+def has_search_index(conn):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'resume_search'").fetchone() is not None
+
+
+def search_resumes(text, limit=25, offset=0):
+    """Rank stored resumes against a search box entry.
+
+    Returns {'total', 'ranked', 'results', 'elapsed_ms'}; each result has the resume's
+    id, name, email, target_role, target_category, created_at, latest
+    ats_score, a snippet with MARK_START/MARK_END around the matched words,
+    and its bm25 score (higher is better).
+    """
+    query = fts_query(text)
+    if not query:
+        return {'total': 0, 'ranked': 0, 'results': [], 'elapsed_ms': 0.0}
+    start = time.perf_counter()
+    conn = get_database_connection()
+    try:
+        if has_search_index(conn):
+            total, rows = _search_fts(conn, query, limit, offset)
+        else:
+            total, rows = _search_like(conn, text, limit, offset)
+        columns = ['id', 'name', 'email', 'target_role', 'target_category', 'created_at',
+                   'ats_score', 'snippet', 'score']
+        return {'total': total,
+                'ranked': min(total, RANK_WINDOW),
+                'results': [dict(zip(columns, row)) for row in rows],
+                'elapsed_ms': (time.perf_counter() - start) * 1000}
+    except Exception as e:
+        print(f"Error searching resumes: {str(e)}")
+        return {'total': 0, 'ranked': 0, 'results': [], 'elapsed_ms': 0.0, 'error': str(e)}
+    finally:
+        conn.close()
+
+
+def _search_fts(conn, query, limit, offset):
+    total = conn.execute('SELECT COUNT(*) FROM resume_search WHERE resume_search MATCH ?', (query,)).fetchone()[0]
+    floor = 0
+    if total > RANK_WINDOW:
+        # Walking the doclist newest first is cheap; this is the oldest rowid to rank
+        floor = conn.execute('''
+            SELECT rowid FROM resume_search WHERE resume_search MATCH ?
+            ORDER BY rowid DESC LIMIT 1 OFFSET ?
+        ''', (query, RANK_WINDOW - 1)).fetchone()[0]
+    # Rank and page inside the index first, then join only the page's rows
+    rows = conn.execute('''
+        WITH hits AS (
+            SELECT rowid AS id, rank, snippet(resume_search, -1, ?, ?, '…', 16) AS snippet
+            FROM resume_search
+            WHERE resume_search MATCH ? AND rowid >= ?
+            ORDER BY rank
+            LIMIT ? OFFSET ?
+        )
+        SELECT r.id, r.name, r.email, r.target_role, r.target_category, r.created_at,
+               (SELECT a.ats_score FROM resume_analysis a WHERE a.resume_id = r.id
+                ORDER BY a.id DESC LIMIT 1),
+               hits.snippet, -hits.rank
+        FROM hits JOIN resume_data r ON r.id = hits.id
+        ORDER BY hits.rank
+    ''', (MARK_START, MARK_END, query, floor, limit, offset)).fetchall()
+    return total, rows
+
+
+def _search_like(conn, text, limit, offset):
+    words = WORD_PATTERN.findall((text or '').lower())
+    document = " || ' ' || ".join(f"COALESCE({column}, '')" for column in SEARCH_COLUMNS)
+    where = ' AND '.join(f"({document}) LIKE ?" for _ in words)
+    params = [f'%{word}%' for word in words]
+    total = conn.execute(f'SELECT COUNT(*) FROM resume_data WHERE {where}', params).fetchone()[0]
+    # Newest first, like the admin listing; there is no relevance score without FTS5
+    rows = conn.execute(f'''
+        SELECT r.id, r.name, r.email, r.target_role, r.target_category, r.created_at,
+               (SELECT a.ats_score FROM resume_analysis a WHERE a.resume_id = r.id
+                ORDER BY a.id DESC LIMIT 1),
+               substr(COALESCE(r.summary, ''), 1, 160), 0
+        FROM resume_data r
+        WHERE {where}
+        ORDER BY r.created_at DESC
+        LIMIT ? OFFSET ?
+    ''', params + [limit, offset]).fetchall()
+    return total, rows
+
+
+def snippet_markdown(snippet):
+    """Render a search snippet as Markdown, with the matched words in bold"""
+    escaped = MARKDOWN_SPECIAL.sub(r'\\\1', ' '.join((snippet or '').split()))
+    return escaped.replace(MARK_START, '**').replace(MARK_END, '**')
+
+
+def rebuild_search_index(conn):
+    """Reindex every resume and merge the index into one segment"""
+    conn.execute("INSERT INTO resume_search (resume_search) VALUES ('rebuild')")
+    conn.execute("INSERT INTO resume_search (resume_search) VALUES ('optimize')")
+    conn.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("query", nargs="?", help="Search box entry")
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--rebuild", action="store_true", help="Reindex resume_data and optimize the index")
+    args = parser.parse_args()
+
+    init_database()
+    if args.rebuild:
+        conn = get_database_connection()
+        try:
+            rebuild_search_index(conn)
+        finally:
+            conn.close()
+        print("Rebuilt resume_search")
+    if args.query:
+        found = search_resumes(args.query, args.limit)
+        print(f"{found['total']} matches in {found['elapsed_ms']:.1f} ms")
+        for result in found['results']:
+            snippet = (result['snippet'] or '').replace(MARK_START, '[').replace(MARK_END, ']')
+            print(f"{result['score']:6.2f}  #{result['id']} {result['name']} ({result['target_role']}): "
+                  f"{' '.join(snippet.split())}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+"""
+Incrementally refreshed rollups of resume_data, resume_analysis and resume_skills.
+
+resume_daily_rollup holds one row per (day, target_role, target_category)
+with the number of resumes saved, analyses run and the ATS score sum for
+that day. Complete days are folded in once, past a high-water mark kept in
+rollup_watermarks; the current (partial) day is always read from the raw
+tables. Rows are only ever inserted with created_at = now, so a folded day
+never changes afterwards.
+
+skill_daily_rollup does the same for resume_skills, per (day, target_role,
+skill_name), with the number of resumes listing the skill and the sum of
+their proficiency scores.
+
+The AI analysis rollup is kept by triggers instead (see migration 2), since
+it is written one row at a time; resumes arrive in bulk from batch scoring,
+where a trigger per row would slow the load down.
+
+Usage:
+    python -m config.rollups            # fold any complete days not yet rolled up
+    python -m config.rollups --rebuild  # drop the rollups and fold everything again
+"""
+
+import argparse
+
+RESUME_ROLLUP = 'resume_daily_rollup'
+SKILL_ROLLUP = 'skill_daily_rollup'
+
+
+def rollup_watermark(conn, name=RESUME_ROLLUP):
+    """Return the last day folded into a rollup ('YYYY-MM-DD'), or None"""
+    row = conn.execute('SELECT high_water FROM rollup_watermarks WHERE name = ?', (name,)).fetchone()
+    return row[0] if row else None
+
+
+def tail_cte(name):
+    """WITH clause for the first day not covered by a rollup; read in the same
+    statement as the rollup so a concurrent refresh cannot make a day count twice"""
+    return f'''
+    WITH tail AS (
+        SELECT COALESCE((SELECT date(high_water, '+1 day') FROM rollup_watermarks
+                         WHERE name = '{name}'), '') AS start
+    )
+'''
+
+
+TAIL_CTE = tail_cte(RESUME_ROLLUP)
+
+
+def _refresh_rollup(conn, name, fold):
+    """Call fold(conn, start, today) for the complete days after a rollup's high-water mark.
+
+    Returns the number of days folded (0 when the rollup is already current).
+    """
+    today = conn.execute("SELECT date('now')").fetchone()[0]
+    watermark = rollup_watermark(conn, name)
+    if watermark is not None and watermark >= _previous_day(conn, today):
+        return 0
+    try:
+        conn.execute('BEGIN IMMEDIATE')
+        # Another process may have refreshed while we waited for the lock
+        watermark = rollup_watermark(conn, name)
+        start = conn.execute("SELECT date(?, '+1 day')", (watermark,)).fetchone()[0] if watermark else ''
+        fold(conn, start, today)
+        folded = conn.execute(f'SELECT COUNT(DISTINCT day) FROM {name} WHERE day > ?',
+                              (watermark or '',)).fetchone()[0]
+        conn.execute('''
+            INSERT INTO rollup_watermarks (name, high_water) VALUES (?, ?)
+            ON CONFLICT (name) DO UPDATE SET high_water = excluded.high_water
+        ''', (name, _previous_day(conn, today)))
+        conn.commit()
+        return folded
+    except Exception as e:
+        conn.rollback()
+        print(f"Error refreshing {name}: {e}")
+        return 0
+
+
+def _fold_resume_days(conn, start, today):
+    conn.execute(f'''
+            INSERT INTO {RESUME_ROLLUP} (day, target_role, target_category, resumes, analyses, ats_scored, ats_sum)
+            SELECT day, target_role, target_category, SUM(resumes), SUM(analyses), SUM(ats_scored), SUM(ats_sum)
+            FROM (
+                SELECT DATE(created_at) AS day, COALESCE(target_role, '') AS target_role,
+                       COALESCE(target_category, '') AS target_category,
+                       COUNT(*) AS resumes, 0 AS analyses, 0 AS ats_scored, 0 AS ats_sum
+                FROM resume_data
+                WHERE created_at >= ? AND created_at < ?
+                GROUP BY 1, 2, 3
+                UNION ALL
+                SELECT DATE(ra.created_at), COALESCE(rd.target_role, ''), COALESCE(rd.target_category, ''),
+                       0, COUNT(*), COUNT(ra.ats_score), COALESCE(SUM(ra.ats_score), 0)
+                FROM resume_analysis ra
+                LEFT JOIN resume_data rd ON rd.id = ra.resume_id
+                WHERE ra.created_at >= ? AND ra.created_at < ?
+                GROUP BY 1, 2, 3
+            )
+            GROUP BY day, target_role, target_category
+            ON CONFLICT (day, target_role, target_category) DO UPDATE SET
+                resumes = resumes + excluded.resumes,
+                analyses = analyses + excluded.analyses,
+                ats_scored = ats_scored + excluded.ats_scored,
+                ats_sum = ats_sum + excluded.ats_sum
+    ''', (start, today, start, today))
+
+
+def refresh_resume_rollup(conn):
+    """Fold complete days after the high-water mark into resume_daily_rollup; returns the days folded"""
+    return _refresh_rollup(conn, RESUME_ROLLUP, _fold_resume_days)
+
+
+def _fold_skill_days(conn, start, today):
+    conn.execute(f'''
+        INSERT INTO {SKILL_ROLLUP} (day, target_role, skill_name, skill_category, resumes, proficiency_sum)
+        SELECT DATE(s.created_at), COALESCE(r.target_role, ''), s.skill_name, MAX(s.skill_category),
+               COUNT(*), COALESCE(SUM(s.proficiency_score), 0)
+        FROM resume_skills s
+        LEFT JOIN resume_data r ON r.id = s.resume_id
+        WHERE s.created_at >= ? AND s.created_at < ?
+        GROUP BY 1, 2, 3
+        ON CONFLICT (day, target_role, skill_name) DO UPDATE SET
+            resumes = resumes + excluded.resumes,
+            proficiency_sum = proficiency_sum + excluded.proficiency_sum
+    ''', (start, today))
+
+
+def refresh_skill_rollup(conn):
+    """Fold complete days after the high-water mark into skill_daily_rollup; returns the days folded"""
+    return _refresh_rollup(conn, SKILL_ROLLUP, _fold_skill_days)
+
+
+# Per-day skill counts over all time: the rollup plus today's raw resume_skills rows
+SKILL_DAYS_CTE = tail_cte(SKILL_ROLLUP) + f''',
+    skill_days AS (
+        SELECT day, target_role, skill_name, skill_category, resumes, proficiency_sum FROM {SKILL_ROLLUP}
+        UNION ALL
+        SELECT DATE(s.created_at), COALESCE(r.target_role, ''), s.skill_name, s.skill_category,
+               1, COALESCE(s.proficiency_score, 0)
+        -- Filters on skill_name get pushed down here; the tail must still be a created_at range
+        FROM tail, resume_skills s INDEXED BY idx_resume_skills_created
+        LEFT JOIN resume_data r ON r.id = s.resume_id
+        WHERE s.created_at >= tail.start
+    )
+'''
+
+
+def _previous_day(conn, day):
+    return conn.execute("SELECT date(?, '-1 day')", (day,)).fetchone()[0]
+
+
+def rebuild_resume_rollup(conn):
+    """Empty the rollup and its watermark, then fold every complete day again"""
+    conn.execute(f'DELETE FROM {RESUME_ROLLUP}')
+    conn.execute('DELETE FROM rollup_watermarks WHERE name = ?', (RESUME_ROLLUP,))
+    conn.commit()
+    return refresh_resume_rollup(conn)
+
+
+def rebuild_skill_rollup(conn):
+    """Empty the skill rollup and its watermark, then fold every complete day again"""
+    conn.execute(f'DELETE FROM {SKILL_ROLLUP}')
+    conn.execute('DELETE FROM rollup_watermarks WHERE name = ?', (SKILL_ROLLUP,))
+    conn.commit()
+    return refresh_skill_rollup(conn)
+
+
+def resume_totals(conn):
+    """Return (resumes, ats_scored, ats_sum) over all time: rollup plus the raw tail"""
+    refresh_resume_rollup(conn)
+    return conn.execute(f'''{TAIL_CTE}
+        SELECT
+            (SELECT COALESCE(SUM(resumes), 0) FROM {RESUME_ROLLUP})
+                + (SELECT COUNT(*) FROM resume_data, tail WHERE created_at >= tail.start),
+            (SELECT COALESCE(SUM(ats_scored), 0) FROM {RESUME_ROLLUP})
+                + (SELECT COUNT(ats_score) FROM resume_analysis, tail WHERE created_at >= tail.start),
+            (SELECT COALESCE(SUM(ats_sum), 0) FROM {RESUME_ROLLUP})
+                + (SELECT COALESCE(SUM(ats_score), 0) FROM resume_analysis, tail WHERE created_at >= tail.start)
+    ''').fetchone()
+
+
+def resume_daily_trend(conn, days=30):
+    """Return [(day, resumes, analyses, ats_scored, ats_sum)] for the last `days` days, oldest first"""
+    refresh_resume_rollup(conn)
+    return conn.execute(f'''{TAIL_CTE}
+        SELECT day, SUM(resumes), SUM(analyses), SUM(ats_scored), SUM(ats_sum)
+        FROM (
+            SELECT day, resumes, analyses, ats_scored, ats_sum FROM {RESUME_ROLLUP}
+            WHERE day >= date('now', ?)
+            UNION ALL
+            SELECT DATE(created_at), COUNT(*), 0, 0, 0 FROM resume_data, tail
+            WHERE created_at >= tail.start GROUP BY 1
+            UNION ALL
+            SELECT DATE(created_at), 0, COUNT(*), COUNT(ats_score), COALESCE(SUM(ats_score), 0)
+            FROM resume_analysis, tail
+            WHERE created_at >= tail.start GROUP BY 1
+        )
+        WHERE day >= date('now', ?)
+        GROUP BY day
+        ORDER BY day
+    ''', (f'-{days} days', f'-{days} days')).fetchall()
+
+
+def resume_role_counts(conn, limit=10):
+    """Return [(target_role, resumes)] over all time, most common first"""
+    refresh_resume_rollup(conn)
+    return conn.execute(f'''{TAIL_CTE}
+        SELECT target_role, SUM(resumes) AS resumes
+        FROM (
+            SELECT target_role, resumes FROM {RESUME_ROLLUP}
+            UNION ALL
+            SELECT COALESCE(target_role, ''), 1 FROM resume_data, tail WHERE created_at >= tail.start
+        )
+        WHERE target_role != ''
+        GROUP BY target_role
+        HAVING SUM(resumes) > 0
+        ORDER BY resumes DESC, target_role
+        LIMIT ?
+    ''', (limit,)).fetchall()
+
+
+def main():
+    from config.database import get_database_connection, init_database
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rebuild", action="store_true", help="Drop the rollups and fold every complete day again")
+    args = parser.parse_args()
+
+    init_database()
+    conn = get_database_connection()
+    try:
+        for name, refresh, rebuild in ((RESUME_ROLLUP, refresh_resume_rollup, rebuild_resume_rollup),
+                                       (SKILL_ROLLUP, refresh_skill_rollup, rebuild_skill_rollup)):
+            folded = rebuild(conn) if args.rebuild else refresh(conn)
+            print(f"{name}: folded {folded} day(s); rolled up through {rollup_watermark(conn, name)}")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+"""
+Normalized resume skills (resume_skills) and the skill analytics built on them.
+
+resume_data.skills keeps whatever the analyzer or builder produced: a list
+of free-text fragments ("SKILLS SUMMARY ● Languages : Python (Pandas") or
+a dict of lists per category. At save time the fragments are split,
+stripped of labels and canonicalized, so python, Python and PYTHON count
+as one skill. Names are matched against the skills in JOB_ROLES (and a few
+common extras and aliases); anything else is dropped, since the fragments
+also carry adjectives, places and sentence pieces ("Leader", "Vadodara",
+"Develops Complex"). Every matched skill gets one row in resume_skills
+with:
+- skill_category: 'technical' or 'soft' from JOB_ROLES recommended_skills,
+  else the EXTRA_SKILLS group ('technical', 'tools' or 'languages')
+- proficiency_score (0-1): an explicit level ("Python (Advanced)"), else
+  0.5 for a listed skill plus 0.25 each for a mention in the experience and
+  in the projects
+
+Rows carry the resume's created_at. The analytics below (top skills per
+role, required-skill gaps, monthly and trending skills) read the per-day
+skill_daily_rollup (config/rollups.py) plus today's raw rows, instead of
+re-parsing or scanning every resume.
+"""
+
+import ast
+import re
+
+from config.job_roles import JOB_ROLES
+from config.rollups import SKILL_DAYS_CTE, refresh_skill_rollup
+
+# Common skills JOB_ROLES does not list, so their spelling is canonical too
+EXTRA_SKILLS = {
+    'technical': [
+        'Pandas', 'NumPy', 'Matplotlib', 'Seaborn', 'scikit-learn', 'Jupyter Notebook', 'Power BI',
+        'Power Query', 'VLOOKUP', 'Pivot Tables', 'MySQL', 'PostgreSQL', 'MongoDB', 'SQLite', 'Redis',
+        'Go', 'Rust', 'PHP', 'Ruby', 'C', 'Bash', 'Spring Boot', 'Express.js', 'Next.js', 'GraphQL',
+        'Bootstrap', 'Tailwind CSS', 'jQuery', 'GitHub', 'Jenkins', 'Terraform', 'Ansible', 'NLP',
+        'Computer Vision', 'OpenCV', 'Keras', 'Data Analysis', 'Data Cleaning', 'EDA', 'Selenium',
+        'Data Science', 'Data Analytics', '.NET', 'ASP.NET', 'Dart', 'Scala', 'MATLAB', 'Perl', 'Solidity',
+        'Hadoop', 'Spark', 'PySpark', 'Kafka', 'Airflow', 'Snowflake', 'Elasticsearch', 'Firebase',
+        'Streamlit', 'FastAPI', 'Laravel', 'Svelte', 'Redux', 'Webpack', 'BeautifulSoup', 'Scrapy',
+        'asyncio', 'aiohttp', 'LangChain', 'Hugging Face', 'Wireshark', 'Nmap', 'Metasploit',
+        'Burp Suite', 'Kali Linux', 'VirtualBox', 'VMware', 'Unix', 'Windows Server',
+    ],
+    'tools': ['Jira', 'Postman', 'Visual Studio Code', 'PyCharm', 'Canva', 'PowerPoint', 'Microsoft Office',
+              'Confluence', 'Trello', 'Slack', 'Photoshop', 'Illustrator', 'Google Analytics'],
+    'languages': ['English', 'Hindi', 'Gujarati', 'Marathi', 'Bengali', 'Tamil', 'Telugu', 'Kannada',
+                  'Malayalam', 'Punjabi', 'Urdu', 'Spanish', 'French', 'German', 'Italian', 'Portuguese',
+                  'Russian', 'Arabic', 'Mandarin', 'Japanese', 'Korean'],
+}
+
+ALIASES = {
+    'js': 'JavaScript', 'ts': 'TypeScript', 'reactjs': 'React', 'node': 'Node.js', 'vue': 'Vue.js',
+    'golang': 'Go', 'k8s': 'Kubernetes', 'ml': 'Machine Learning', 'dl': 'Deep Learning',
+    'amazonwebservices': 'AWS', 'googlecloud': 'GCP', 'googlecloudplatform': 'GCP', 'microsoftazure': 'Azure',
+    'msexcel': 'Excel', 'microsoftexcel': 'Excel', 'advancedexcel': 'Excel', 'powerbi': 'Power BI',
+    'postgres': 'PostgreSQL', 'sklearn': 'scikit-learn', 'scikitlearn': 'scikit-learn',
+    'restapi': 'RESTful APIs', 'restapis': 'RESTful APIs', 'restfulapi': 'RESTful APIs',
+    'vscode': 'Visual Studio Code', 'express': 'Express.js', 'nextjs': 'Next.js',
+    'teamwork': 'Team collaboration', 'problemsolving': 'Problem-solving', 'msoffice': 'Microsoft Office',
+    'naturallanguageprocessing': 'NLP', 'exploratorydataanalysis': 'EDA',
+    'pentesting': 'Penetration Testing', 'cprogramming': 'C', 'ux': 'UI/UX', 'dotnet': '.NET',
+    'apachespark': 'Spark', 'apachekafka': 'Kafka', 'apacheairflow': 'Airflow', 'bs4': 'BeautifulSoup',
+    'huggingface': 'Hugging Face', 'burp': 'Burp Suite', 'gcloud': 'GCP',
+}
+
+LEVELS = {
+    'expert': 1.0, 'native': 1.0, 'advanced': 0.9, 'proficient': 0.8, 'fluent': 0.8,
+    'intermediate': 0.6, 'familiar': 0.4, 'basic': 0.3, 'beginner': 0.3, 'elementary': 0.3,
+}
+
+FRAGMENT_SEPARATORS = re.compile(r'[●•▪◦·|;,\n\t]+')
+BRACKETS = re.compile(r'[()\[\]{}]')
+# "HTML & CSS", "Python - Advanced"
+PART_SEPARATORS = re.compile(r'\s+(?:[-–&]|and)\s+', re.IGNORECASE)
+# Bullets and punctuation around a name; a leading dot stays (".NET")
+EDGE_SYMBOLS = re.compile(r'^[^\w+#]*?(?=\.?[\w+#])|[^\w+#]+$')
+
+
+def skill_key(name):
+    """Spelling-insensitive key: lowercase without spaces, dots, dashes or underscores"""
+    return re.sub(r'[\s.\-_]+', '', name.lower())
+
+
+def _split_alternatives(name):
+    # 'React/Angular/Vue' lists three skills; 'CI/CD' and 'UI/UX' are one
+    parts = [part.strip() for part in name.split('/')]
+    return parts if all(len(part) > 2 for part in parts) else [name.strip()]
+
+
+def _build_vocabulary():
+    """Canonical name and category per skill key, from JOB_ROLES plus EXTRA_SKILLS"""
+    vocabulary = {}
+
+    def add(name, category):
+        for part in _split_alternatives(name):
+            key = skill_key(part)
+            # A skill any role recommends as soft stays soft
+            if key not in vocabulary or category == 'soft':
+                vocabulary[key] = (vocabulary.get(key, (part,))[0], category)
+
+    for roles in JOB_ROLES.values():
+        for info in roles.values():
+            for category, names in info.get('recommended_skills', {}).items():
+                for name in names:
+                    add(name, category)
+            for name in info.get('required_skills', []):
+                if skill_key(name) not in vocabulary:
+                    add(name, 'technical')
+    for category, names in EXTRA_SKILLS.items():
+        for name in names:
+            if skill_key(name) not in vocabulary:
+                add(name, category)
+    return vocabulary
+
+
+VOCABULARY = _build_vocabulary()
+
+
+def canonical_skill(name):
+    """Return (canonical name, vocabulary category) for a known skill or alias, else None"""
+    name = EDGE_SYMBOLS.sub('', ' '.join(name.split()))
+    return VOCABULARY.get(skill_key(ALIASES.get(skill_key(name), name)))
+
+
+def _skill_entries(skills):
+    """Yield the fragments of a skills list, a dict of lists or their stored repr"""
+    if isinstance(skills, str):
+        try:
+            skills = ast.literal_eval(skills)
+        except (ValueError, SyntaxError):
+            pass
+    if isinstance(skills, dict):
+        for names in skills.values():
+            for name in (names if isinstance(names, (list, tuple)) else [names]):
+                yield str(name)
+    elif isinstance(skills, (list, tuple)):
+        for name in skills:
+            yield str(name)
+    elif skills:
+        yield str(skills)
+
+
+def parse_skills(skills):
+    """Split stored skills into [(canonical name, category, explicit level or None)], first mention first"""
+    parsed = {}
+    for entry in _skill_entries(skills):
+        for fragment in FRAGMENT_SEPARATORS.split(entry):
+            # "Languages : Python" - the part before the colon is a label
+            fragment = fragment.rsplit(':', 1)[-1]
+            last = None
+            for piece in BRACKETS.split(fragment):
+                for part in PART_SEPARATORS.split(piece):
+                    level = LEVELS.get(skill_key(part))
+                    if level is not None:
+                        if last is not None:
+                            parsed[last] = (parsed[last][0], parsed[last][1], level)
+                        continue
+                    for alternative in _split_alternatives(part):
+                        canonical = canonical_skill(alternative)
+                        if canonical is None:
+                            continue
+                        name, category = canonical
+                        if name not in parsed:
+                            parsed[name] = (name, category, None)
+                        last = name
+    return list(parsed.values())
+
+
+def _mentions(name, text):
+    return re.search(r'(?<![\w+#])' + re.escape(name.lower()) + r'(?![\w+#])', text) is not None
+
+
+def skill_rows(resume_id, skills, experience='', projects='', created_at=None):
+    """Build the resume_skills rows for one resume"""
+    experience = str(experience or '').lower()
+    projects = str(projects or '').lower()
+    rows = []
+    for name, category, level in parse_skills(skills):
+        if level is None:
+            level = 0.5 + 0.25 * _mentions(name, experience) + 0.25 * _mentions(name, projects)
+        rows.append((resume_id, name, category, level, created_at))
+    return rows
+
+
+SKILL_INSERT = '''
+INSERT OR IGNORE INTO resume_skills (resume_id, skill_name, skill_category, proficiency_score, created_at)
+VALUES (?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP))
+'''
+
+
+def save_resume_skills(cursor, resume_id, data):
+    """Insert the normalized skills of a resume dict (as passed to save_resume_data); caller commits"""
+    cursor.executemany(SKILL_INSERT, skill_rows(resume_id, data.get('skills', []),
+                                                data.get('experience'), data.get('projects')))
+
+
+def backfill_resume_skills(conn, batch=1000):
+    """Fill resume_skills from every resume_data row that has none yet; returns the rows inserted"""
+    inserted = 0
+    last_id = 0
+    while True:
+        resumes = conn.execute('''
+            SELECT id, skills, experience, projects, created_at FROM resume_data r
+            WHERE id > ? AND NOT EXISTS (SELECT 1 FROM resume_skills s WHERE s.resume_id = r.id)
+            ORDER BY id LIMIT ?
+        ''', (last_id, batch)).fetchall()
+        if not resumes:
+            return inserted
+        for resume_id, skills, experience, projects, created_at in resumes:
+            rows = skill_rows(resume_id, skills, experience, projects, created_at)
+            conn.executemany(SKILL_INSERT, rows)
+            inserted += len(rows)
+        last_id = resumes[-1][0]
+
+
+# --- Analytics (skill_daily_rollup plus today's raw rows; see config.rollups) ---
+
+def role_info(role):
+    """Return a role's JOB_ROLES entry, or None"""
+    for roles in JOB_ROLES.values():
+        if role in roles:
+            return roles[role]
+    return None
+
+
+def top_skills(conn, role=None, limit=20):
+    """Return [(skill, category, resumes, avg proficiency)] for all resumes or those targeting a role"""
+    refresh_skill_rollup(conn)
+    return conn.execute(f'''{SKILL_DAYS_CTE}
+        SELECT skill_name, MAX(skill_category), SUM(resumes), SUM(proficiency_sum) / SUM(resumes)
+        FROM skill_days
+        WHERE ? IS NULL OR target_role = ?
+        GROUP BY skill_name
+        ORDER BY SUM(resumes) DESC, skill_name
+        LIMIT ?
+    ''', (role, role, limit)).fetchall()
+
+
+def skill_gaps(conn, role):
+    """Return [(required skill, resumes missing it, resumes for the role)] for a role, most missed first"""
+    info = role_info(role)
+    if info is None:
+        return []
+    required = []
+    for name in info.get('required_skills', []):
+        for alternative in _split_alternatives(name):
+            canonical = canonical_skill(alternative)
+            if canonical and canonical[0] not in required:
+                required.append(canonical[0])
+    if not required:
+        return []
+    refresh_skill_rollup(conn)
+    resumes = conn.execute('SELECT COUNT(*) FROM resume_data WHERE target_role = ?', (role,)).fetchone()[0]
+    have = dict(conn.execute(f'''{SKILL_DAYS_CTE}
+        SELECT skill_name, SUM(resumes)
+        FROM skill_days
+        WHERE target_role = ? AND skill_name IN ({','.join('?' * len(required))})
+        GROUP BY skill_name
+    ''', [role] + required).fetchall())
+    gaps = [(name, resumes - have.get(name, 0), resumes) for name in required]
+    return sorted(gaps, key=lambda gap: gap[1], reverse=True)
+
+
+def monthly_skill_trend(conn, months=12, top=5):
+    """Return [(month 'YYYY-MM', skill, resumes)] for the top skills of the last months, oldest first"""
+    refresh_skill_rollup(conn)
+    return conn.execute(f'''{SKILL_DAYS_CTE},
+        recent AS (
+            SELECT * FROM skill_days WHERE day >= date('now', 'start of month', ?)
+        ),
+        leaders AS (
+            SELECT skill_name FROM recent
+            GROUP BY skill_name
+            ORDER BY SUM(resumes) DESC, skill_name
+            LIMIT ?
+        )
+        SELECT substr(day, 1, 7) AS month, skill_name, SUM(resumes)
+        FROM recent
+        WHERE skill_name IN leaders
+        GROUP BY month, skill_name
+        ORDER BY month, SUM(resumes) DESC
+    ''', (f'-{months - 1} months', top)).fetchall()
+
+
+def trending_skills(conn, days=90, limit=9, min_resumes=3):
+    """Return [(skill, category, resumes in the last days, resumes in the days before)], most listed first"""
+    refresh_skill_rollup(conn)
+    return conn.execute(f'''{SKILL_DAYS_CTE}
+        SELECT skill_name, MAX(skill_category),
+               SUM(CASE WHEN day > date('now', :current) THEN resumes ELSE 0 END) AS current,
+               SUM(CASE WHEN day > date('now', :current) THEN 0 ELSE resumes END) AS previous
+        FROM skill_days
+        WHERE day > date('now', :previous)
+        GROUP BY skill_name
+        HAVING current >= :min_resumes
+        ORDER BY current DESC, current - previous DESC, skill_name
+        LIMIT :limit
+    ''', {'current': f'-{days} days', 'previous': f'-{2 * days} days',
+          'min_resumes': min_resumes, 'limit': limit}).fetchall()
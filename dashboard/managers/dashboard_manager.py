@@ -7,6 +7,9 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 
+from config.database import get_ai_analysis_stats, get_resume_stats, get_resume_trends, get_skill_analytics
+from config.resume_search import search_resumes, snippet_markdown
+
 # NOTE: This class definition structure must be correct to satisfy app.py import
 class DashboardManager:
     """Manages dashboard data initialization and rendering."""
@@ -20,30 +23,102 @@ class DashboardManager:
         st.title("📊 Application Dashboard")
         st.write("Welcome to the CV Robo analytics dashboard.")
         
-        # --- Mock Data and Basic UI (Replace with your complex logic if needed) ---
-        
-        # Mock stats (You would replace this with actual database queries)
-        analysis_count = 560
-        avg_score = 78.5
+        # Totals and trends are served from the rollup tables (config/rollups.py)
+        resume_stats = get_resume_stats() or {'total_resumes': 0, 'avg_ats_score': 0}
+        ai_stats = get_ai_analysis_stats()
+        trends = get_resume_trends(days=30)
         
         col1, col2, col3 = st.columns(3)
         with col1:
-            st.metric("Total Analyses", analysis_count, delta=12)
+            st.metric("Resumes Analyzed", resume_stats['total_resumes'])
         with col2:
-            st.metric("Average Resume Score", f"{avg_score:.1f}%", delta=1.2)
+            st.metric("Average ATS Score", f"{resume_stats['avg_ats_score']:.1f}%")
         with col3:
-            st.metric("Users Logged In", 45, delta=-2)
+            st.metric("AI Analyses", ai_stats['total_analyses'])
             
-        st.subheader("Score Distribution Overview")
-        mock_data = pd.DataFrame({
-            'Score Range': ['0-50', '51-70', '71-85', '86-100'],
-            'Count': [15, 30, 45, 10]
-        })
+        if trends['daily_trend']:
+            st.subheader("Last 30 Days")
+            trend_data = pd.DataFrame(trends['daily_trend'])
+            fig = px.bar(trend_data, x='date', y=['resumes', 'analyses'],
+                         barmode='group',
+                         title='Resumes and Analyses per Day',
+                         template='plotly_dark')
+            st.plotly_chart(fig, use_container_width=True)
+        
+        if trends['top_roles']:
+            st.subheader("Most Targeted Roles")
+            role_data = pd.DataFrame(trends['top_roles'])
+            fig = px.bar(role_data, x='count', y='role', orientation='h',
+                         title='Resumes by Target Role',
+                         template='plotly_dark')
+            st.plotly_chart(fig, use_container_width=True)
+
+        # Skills come from resume_skills, normalized when each resume is saved (config/skills.py)
+        skills = get_skill_analytics()
+        if skills['top_skills']:
+            st.subheader("Most Listed Skills")
+            skill_data = pd.DataFrame(skills['top_skills'])
+            fig = px.bar(skill_data, x='resumes', y='skill', color='category', orientation='h',
+                         title='Resumes Listing Each Skill',
+                         template='plotly_dark')
+            fig.update_layout(yaxis={'categoryorder': 'total ascending'})
+            st.plotly_chart(fig, use_container_width=True)
+        
+        if skills['monthly_trend']:
+            trend_data = pd.DataFrame(skills['monthly_trend'])
+            fig = px.line(trend_data, x='month', y='resumes', color='skill', markers=True,
+                          title='Top Skills by Month',
+                          template='plotly_dark')
+            st.plotly_chart(fig, use_container_width=True)
         
-        fig = px.bar(mock_data, x='Score Range', y='Count', 
-                     color='Score Range', 
-                     title='Analysis Score Distribution',
+        if trends['top_roles']:
+            self.render_skill_gaps([role['role'] for role in trends['top_roles'] if role['role']])
+
+        if st.session_state.get('is_admin', False):
+            self.render_resume_search()
+
+    def render_skill_gaps(self, roles):
+        """Required skills of a role that its candidates' resumes most often lack"""
+        if not roles:
+            return
+        st.subheader("Skill Gaps by Role")
+        role = st.selectbox("Target role", roles, key="skill_gap_role")
+        gaps = get_skill_analytics(role=role, limit=10)
+        if not gaps['skill_gaps']:
+            st.info("No required skills are listed for this role.")
+            return
+        gap_data = pd.DataFrame(gaps['skill_gaps'])
+        fig = px.bar(gap_data, x='missing_rate', y='skill', orientation='h',
+                     title=f'Share of {role} Resumes Missing Each Required Skill (%)',
                      template='plotly_dark')
+        fig.update_layout(yaxis={'categoryorder': 'total ascending'})
         st.plotly_chart(fig, use_container_width=True)
 
+    def render_resume_search(self):
+        """Admin search over stored resumes (full-text index, ranked by relevance)"""
+        st.subheader("🔎 Search Resumes")
+        query = st.text_input("Search by skill, keyword, name or role",
+                              placeholder='e.g. python aws, "machine learning", react OR angular, java*',
+                              key="admin_resume_search")
+        if not query.strip():
+            return
+
+        found = search_resumes(query, limit=50)
+        if found.get('error'):
+            st.error(f"Search failed: {found['error']}")
+            return
+        if not found['results']:
+            st.info("No resumes match this search.")
+            return
+
+        caption = f"{found['total']:,} matches in {found['elapsed_ms']:.0f} ms"
+        if found['ranked'] < found['total']:
+            caption += f" (ranking the newest {found['ranked']:,})"
+        st.caption(caption + f", showing the top {len(found['results'])}")
+        for result in found['results']:
+            score = f"ATS {result['ats_score']:.0f}" if result['ats_score'] is not None else "not scored"
+            st.markdown(f"**{snippet_markdown(result['name'])}** · {snippet_markdown(result['target_role'] or 'No role')} "
+                        f"· {snippet_markdown(result['email'])} · {score}  \n"
+                        f"{snippet_markdown(result['snippet'])}")
+
 # Note: The DashboardManager class is implicitly imported by app.py (Line 22)
\ No newline at end of file
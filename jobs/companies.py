@@ -165,9 +165,41 @@ def get_featured_companies(category=None):
         return FEATURED_COMPANIES[category]
     return [company for companies in FEATURED_COMPANIES.values() for company in companies]
 
+SKILL_CATEGORY_ICONS = {
+    "technical": "fas fa-code",
+    "soft": "fas fa-users",
+    "languages": "fas fa-language",
+    "tools": "fas fa-tools",
+}
+
+# Fewer trending skills than this in the analyzed resumes keeps the curated list
+MIN_TRENDING_SKILLS = 5
+
+def _skill_growth(current, previous):
+    """Growth label for a skill's resume count against the window before"""
+    if not previous:
+        return "New"
+    return f"{(current - previous) / previous * 100:+.0f}%"
+
 def get_market_insights():
-    """Get job market insights"""
-    return JOB_MARKET_INSIGHTS
+    """Get job market insights; trending skills come from analyzed resumes once there are enough"""
+    insights = dict(JOB_MARKET_INSIGHTS)
+    try:
+        from config.database import get_trending_skills
+        trending = get_trending_skills(limit=len(JOB_MARKET_INSIGHTS["trending_skills"]))
+    except Exception as e:
+        print(f"Error loading trending skills: {str(e)}")
+        trending = []
+    if len(trending) >= MIN_TRENDING_SKILLS:
+        curated_icons = {skill["name"]: skill["icon"] for skill in JOB_MARKET_INSIGHTS["trending_skills"]}
+        insights["trending_skills"] = [
+            {
+                "name": skill["skill"],
+                "growth": _skill_growth(skill["resumes"], skill["previous"]),
+                "icon": curated_icons.get(skill["skill"], SKILL_CATEGORY_ICONS.get(skill["category"], "fas fa-star"))
+            } for skill in trending
+        ]
+    return insights
 
 def get_company_info(company_name):
     """Get company information by name"""
@@ -4,6 +4,7 @@ import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime
 import traceback as tb # Needed for error logging
+import time
 
 # Import constants and utilities used directly in the function
 from config.job_roles import JOB_ROLES 
@@ -14,6 +15,14 @@ from config.database import save_resume_data, save_analysis_data, save_ai_analys
 from ui_components import apply_modern_styles, page_header 
 from utils.ai_resume_analyzer import AIResumeAnalyzer 
 from utils.resume_analyzer import ResumeAnalyzer
+from utils.llm_cache import get_llm_cache
+from utils.analysis_parser import parse_analysis
+from utils.analysis_queue import ensure_workers, get_analysis_queue
+from utils.resume_fingerprint import Fingerprint, analysis_scope, get_fingerprint_index
+
+# Seconds between checks of a running AI analysis job, and how long to wait for one in total
+ANALYSIS_POLL_INTERVAL = 1.0
+ANALYSIS_JOB_TIMEOUT = 600
 
 def render_analyzer_page(app_instance):
         """Render the resume analyzer page"""
@@ -103,29 +112,20 @@ def render_analyzer_page(app_instance):
                         # Get file content
                         text = ""
                         try:
+                            # Both analyzers share one ingestion engine (pypdf -> pdfplumber -> OCR),
+                            # so a failure here has already tried every extraction method
                             if uploaded_file.type == "application/pdf":
                                 try:
                                     text = app_instance.analyzer.extract_text_from_pdf(uploaded_file)
                                 except Exception as pdf_error:
-                                    st.error(f"PDF extraction failed: {str(pdf_error)}")
-                                    st.info("Trying alternative PDF extraction method...")
-                                    # Try AI analyzer as backup
-                                    try:
-                                        text = app_instance.ai_analyzer.extract_text_from_pdf(uploaded_file)
-                                    except Exception as backup_error:
-                                        st.error(f"All PDF extraction methods failed: {str(backup_error)}")
-                                        return
+                                    st.error(f"All PDF extraction methods failed: {str(pdf_error)}")
+                                    return
                             elif uploaded_file.type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
                                 try:
                                     text = app_instance.analyzer.extract_text_from_docx(uploaded_file)
                                 except Exception as docx_error:
                                     st.error(f"DOCX extraction failed: {str(docx_error)}")
-                                    # Try AI analyzer as backup
-                                    try:
-                                        text = app_instance.ai_analyzer.extract_text_from_docx(uploaded_file)
-                                    except Exception as backup_error:
-                                        st.error(f"All DOCX extraction methods failed: {str(backup_error)}")
-                                        return
+                                    return
                             else:
                                 text = uploaded_file.getvalue().decode()
                                 
@@ -136,8 +136,23 @@ def render_analyzer_page(app_instance):
                             st.error(f"Error reading file: {str(e)}")
                             return
 
-                        # Analyze the document
-                        analysis = app_instance.analyzer.analyze_resume({'raw_text': text}, role_info)
+                        # Reuse the analysis of an identical (or, if enabled, near-identical) resume
+                        # checked against the same role
+                        fingerprint = Fingerprint(text)
+                        fingerprint_scope = analysis_scope('ats', selected_category, selected_role)
+                        duplicate, analysis = None, None
+                        try:
+                            duplicate, analysis = get_fingerprint_index().reuse(fingerprint, fingerprint_scope)
+                        except Exception as e:
+                            print(f"Error looking up duplicate resumes: {e}")
+
+                        if analysis is None:
+                            # Analyze the document
+                            analysis = app_instance.analyzer.analyze_resume({'raw_text': text}, role_info)
+                        elif duplicate.exact:
+                            st.caption("♻️ Matched an identical, previously analyzed resume")
+                        else:
+                            st.caption(f"♻️ Matched a previously analyzed resume ({duplicate.similarity:.0%} similar)")
                         
                         # Check if analysis returned an error
                         if 'error' in analysis:
@@ -182,6 +197,7 @@ def render_analyzer_page(app_instance):
                                 'recommendations': ','.join(analysis['suggestions'])
                             }
                             save_analysis_data(resume_id, analysis_data)
+                            get_fingerprint_index().remember(fingerprint, fingerprint_scope, analysis, resume_id)
                             st.success("Resume data saved successfully!")
                         except Exception as e:
                             st.error(f"Error saving to database: {str(e)}")
@@ -268,6 +284,22 @@ def render_analyzer_page(app_instance):
 
                         st.markdown("</div>", unsafe_allow_html=True)
 
+                        # Best-fit roles: every job role scored in one matrix product
+                        best_roles = app_instance.analyzer.rank_job_roles(text, top_n=5)
+                        if best_roles:
+                            st.markdown("""
+                            <div class="feature-card">
+                                <h2>🧭 Which Role Should You Target?</h2>
+                            """, unsafe_allow_html=True)
+
+                            for match in best_roles:
+                                st.markdown(f"**{match['role']}** · {match['category']}")
+                                st.progress(min(100, int(match['score'])))
+                                st.caption(f"{int(match['score'])}% keyword match · "
+                                           f"{len(match['found_skills'])}/{len(match['found_skills']) + len(match['missing_skills'])} required skills found")
+
+                            st.markdown("</div>", unsafe_allow_html=True)
+
                     with col2:
                         # Format Score Card
                         st.markdown("""
@@ -497,6 +529,30 @@ def render_analyzer_page(app_instance):
                                 # Refresh the page to show updated stats
                                 st.rerun()
 
+                            cache_stats = get_llm_cache().stats()
+                            st.caption(f"LLM response cache: {cache_stats['hits']} hits, "
+                                       f"{cache_stats['misses']} misses, {cache_stats['entries']} entries")
+                            request_stats = get_analysis_queue().request_stats()
+                            st.caption(f"Coalesced requests: {request_stats['coalesced']} "
+                                       f"({request_stats['upstream_calls']} upstream calls, "
+                                       f"{request_stats['in_flight']} in flight)")
+                            try:
+                                duplicates = get_fingerprint_index().duplicate_clusters()
+                                st.caption(f"Duplicate resumes: {len(duplicates['clusters'])} clusters, "
+                                           f"{duplicates['exact_duplicate_uploads']} exact re-uploads, "
+                                           f"{duplicates['near_duplicate_uploads']} near-duplicate uploads, "
+                                           f"{duplicates['reused_analyses']} analyses reused")
+                                if duplicates['clusters']:
+                                    st.dataframe(pd.DataFrame([{
+                                        'Uploads': cluster['uploads'],
+                                        'Versions': cluster['size'],
+                                        'Names': ', '.join(name for name in cluster['names'] if name),
+                                        'Roles': ', '.join(role for role in cluster['roles'] if role),
+                                        'Last Seen': datetime.fromtimestamp(cluster['last_seen']).strftime('%Y-%m-%d %H:%M')
+                                    } for cluster in duplicates['clusters']]), hide_index=True, use_container_width=True)
+                            except Exception as e:
+                                st.caption(f"Duplicate resume report unavailable: {e}")
+
                         # Get detailed AI analysis statistics
                         from config.database import get_detailed_ai_analysis_stats
                         ai_stats = get_detailed_ai_analysis_stats()
@@ -1075,24 +1131,10 @@ def render_analyzer_page(app_instance):
                                            use_container_width=True,
                                            key="analyze_ai_button")
 
-                    if analyze_ai:
+                    # The analysis runs on the shared worker pool. The job id stays in the session,
+                    # so every rerun re-attaches to the job instead of blocking until it finishes
+                    if analyze_ai or st.session_state.get('ai_analysis_job_id'):
                         with st.spinner(f"Analyzing your resume with {ai_model}..."):
-                            # Get file content
-                            text = ""
-                            try:
-                                if uploaded_file.type == "application/pdf":
-                                    text = app_instance.analyzer.extract_text_from_pdf(
-                                        uploaded_file)
-                                elif uploaded_file.type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
-                                    text = app_instance.analyzer.extract_text_from_docx(
-                                        uploaded_file)
-                                else:
-                                    # For text files or other formats
-                                    text = uploaded_file.getvalue().decode('utf-8')
-                            except Exception as e:
-                                st.error(f"Error reading file: {str(e)}")
-                                st.stop()
-
                             # Analyze with AI
                             try:
                                 # Show a loading animation
@@ -1101,44 +1143,83 @@ def render_analyzer_page(app_instance):
                                     
                                     # Get the selected model
                                     selected_model = "Google Gemini"
+                                    analysis_queue = get_analysis_queue()
                                     
-                                    # Update progress
-                                    progress_bar.progress(10)
+                                    if analyze_ai:
+                                        # Update progress
+                                        progress_bar.progress(10)
+                                        
+                                        # Extract text from the resume (parsed once, cached by content hash)
+                                        analyzer = AIResumeAnalyzer()
+                                        if uploaded_file.type == "application/pdf":
+                                            resume_text = analyzer.extract_text_from_pdf(
+                                                uploaded_file)
+                                        elif uploaded_file.type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
+                                            resume_text = analyzer.extract_text_from_docx(
+                                                uploaded_file)
+                                        else:
+                                            # For text files or other formats
+                                            resume_text = uploaded_file.getvalue().decode('utf-8')
+                                        
+                                        # Initialize the AI analyzer (moved after text extraction)
+                                        progress_bar.progress(30)
+                                        
+                                        # Get the job role
+                                        job_role = selected_role if selected_role else "Not specified"
+                                        
+                                        # Update progress
+                                        progress_bar.progress(50)
+                                        
+                                        # Analyze the resume with Google Gemini, streaming each section as it lands
+                                        job_description = custom_job_description if use_custom_job_desc and custom_job_description else None
+                                        st.session_state['used_custom_job_desc'] = job_description is not None
+                                        
+                                        # Resubmitting the same request attaches to the job already in flight
+                                        ensure_workers()
+                                        st.session_state['ai_analysis_job_id'] = analysis_queue.submit({
+                                            "resume_text": resume_text,
+                                            "job_description": job_description,
+                                            "job_role": job_role
+                                        })
+                                        st.session_state['ai_analysis_job_role'] = job_role
                                     
-                                    # Extract text from the resume
-                                    analyzer = AIResumeAnalyzer()
-                                    if uploaded_file.type == "application/pdf":
-                                        resume_text = analyzer.extract_text_from_pdf(
-                                            uploaded_file)
-                                    elif uploaded_file.type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
-                                        resume_text = analyzer.extract_text_from_docx(
-                                            uploaded_file)
+                                    job_id = st.session_state['ai_analysis_job_id']
+                                    job_role = st.session_state.get('ai_analysis_job_role', "Not specified")
+                                    job = analysis_queue.get(job_id)
+                                    analysis_result = None
+                                    if job is None:
+                                        analysis_result = {"error": "The analysis job could not be found. Please try again."}
                                     else:
-                                        # For text files or other formats
-                                        resume_text = uploaded_file.getvalue().decode('utf-8')
-                                    
-                                    # Initialize the AI analyzer (moved after text extraction)
-                                    progress_bar.progress(30)
-                                    
-                                    # Get the job role
-                                    job_role = selected_role if selected_role else "Not specified"
-                                    
-                                    # Update progress
-                                    progress_bar.progress(50)
+                                        if job["status"] == "queued":
+                                            st.caption(f"⏳ Waiting for a free analysis worker ({job['queue_position']} ahead in the queue)")
+                                        
+                                        streamed_sections = [
+                                            f"## {section['title']}\n\n{section['content']}" if section["title"] else section["content"]
+                                            for section in job["progress"]["sections"]
+                                        ]
+                                        # Move the progress bar along with the sections received
+                                        progress_bar.progress(min(79, 50 + 3 * len(streamed_sections)))
+                                        
+                                        if job["status"] == "done":
+                                            analysis_result = job["result"]
+                                        elif job["status"] == "failed":
+                                            analysis_result = {"error": job["error"]}
+                                        elif time.time() - job["created_at"] > ANALYSIS_JOB_TIMEOUT:
+                                            analysis_result = {"error": "The analysis is taking longer than expected. Please try again in a moment."}
+                                        else:
+                                            streamed_scores = job["progress"]["scores"]
+                                            if streamed_scores:
+                                                st.markdown(" · ".join(
+                                                    f"**{'ATS Score' if name == 'ats_score' else 'Resume Score'}: {value}/100**"
+                                                    for name, value in streamed_scores.items()))
+                                            if streamed_sections:
+                                                st.markdown("\n\n".join(streamed_sections))
+                                            # Poll again shortly; the worker keeps streaming into the job row meanwhile
+                                            time.sleep(ANALYSIS_POLL_INTERVAL)
+                                            st.rerun()
                                     
-                                    # Analyze the resume with Google Gemini
-                                    if use_custom_job_desc and custom_job_description:
-                                        # Use custom job description for analysis
-                                        analysis_result = analyzer.analyze_resume_with_gemini(
-                                            resume_text, job_role=job_role, job_description=custom_job_description)
-                                        # Show that custom job description was used
-                                        st.session_state['used_custom_job_desc'] = True
-                                    else:
-                                        # Use standard role-based analysis
-                                        analysis_result = analyzer.analyze_resume_with_gemini(
-                                            resume_text, job_role=job_role)
-                                        st.session_state['used_custom_job_desc'] = False
-
+                                    # Finished: the full, formatted report below replaces the live preview
+                                    st.session_state.pop('ai_analysis_job_id', None)
                                     
                                     # Update progress
                                     progress_bar.progress(80)
@@ -1167,6 +1248,16 @@ def render_analyzer_page(app_instance):
                                         # Display the analysis result
                                         if analysis_result and "error" not in analysis_result:
                                             st.success("✅ Analysis complete!")
+                                            if analysis_result.get("deduplicated"):
+                                                similarity = analysis_result.get("similarity", 1)
+                                                st.caption("♻️ Matched an identical, previously analyzed resume" if similarity >= 1
+                                                           else f"♻️ Matched a previously analyzed resume ({similarity:.0%} similar)")
+                                            elif analysis_result.get("cached"):
+                                                st.caption("⚡ Served from the response cache")
+                                            elif analysis_result.get("tokens_saved"):
+                                                st.caption(f"✂️ Prompt compacted to ~{analysis_result.get('prompt_tokens', 0):,} tokens "
+                                                           f"({analysis_result['tokens_saved']:,} saved"
+                                                           f"{', trimmed to fit the budget' if analysis_result.get('truncated') or analysis_result.get('dropped_sections') else ''})")
                                             
                                             # Extract data from the analysis
                                             full_response = analysis_result.get(
@@ -1351,8 +1442,6 @@ def render_analyzer_page(app_instance):
                                                     
                                             
                                             # Format the full response with better styling
-                                            formatted_analysis = full_response
-                                            
                                             # Replace section headers with styled headers
                                             section_styles = {
                                                 "## Overall Assessment": """<div class="report-section">
@@ -1428,35 +1517,17 @@ def render_analyzer_page(app_instance):
                                                 <div class="section-content">""",
                                             }
                                             
-                                            # Apply the styling to each section
-                                            for section, style in section_styles.items():
-                                                if section in formatted_analysis:
-                                                    formatted_analysis = formatted_analysis.replace(
-                                                        section, style)
-                                                    # Add closing div tags
-                                                    next_section = False
-                                                    for next_sec in section_styles.keys():
-                                                        if next_sec != section and next_sec in formatted_analysis.split(style)[1]:
-                                                            split_text = formatted_analysis.split(style)[1].split(next_sec)
-                                                            formatted_analysis = formatted_analysis.split(style)[0] + style + split_text[0] + "</div></div>" + next_sec + "".join(split_text[1:])
-                                                            next_section = True
-                                                            break
-                                                    if not next_section:
-                                                        formatted_analysis = formatted_analysis + "</div></div>"
-                                            
-                                            # Remove any extra closing div tags that might have been added
-                                            formatted_analysis = formatted_analysis.replace("</div></div></div></div>", "</div></div>")
-                                            
-                                            # Ensure we don't have any orphaned closing tags at the end
-                                            if formatted_analysis.endswith("</div>"):
-                                                # Count opening and closing div tags
-                                                open_tags = formatted_analysis.count("<div")
-                                                close_tags = formatted_analysis.count("</div>")
-                                                
-                                                # If we have more closing than opening tags, remove the extras
-                                                if close_tags > open_tags:
-                                                    excess = close_tags - open_tags
-                                                    formatted_analysis = formatted_analysis[:-6 * excess]
+                                            # Wrap each parsed section in its styled block in one pass
+                                            analysis_document = parse_analysis(full_response)
+                                            formatted_parts = [analysis_document.preamble] if analysis_document.preamble else []
+                                            for section in analysis_document.sections:
+                                                style = next((style for header, style in section_styles.items()
+                                                              if section.title.startswith(header[3:])), None)
+                                                if style:
+                                                    formatted_parts.append(f"{style}\n{section.content}\n\n</div></div>")
+                                                else:
+                                                    formatted_parts.append(f"## {section.title}\n{section.content}")
+                                            formatted_analysis = "\n\n".join(formatted_parts)
                                             
                                             # Clean up any visible HTML tags that might appear in the text
                                             formatted_analysis = formatted_analysis.replace("&lt;/div&gt;", "")
@@ -1534,6 +1605,8 @@ def render_analyzer_page(app_instance):
                                                 st.error("PDF generation failed. Please try again later.")
                                         else:
                                             st.error(f"Analysis failed: {analysis_result.get('error', 'Unknown error')}")
+                                    else:
+                                        st.error(f"Analysis failed: {(analysis_result or {}).get('error', 'Unknown error')}")
                             except Exception as ai_error:
                                 st.error(f"Error during AI analysis: {str(ai_error)}")
                                 import traceback as tb
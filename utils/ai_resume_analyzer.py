@@ -2,14 +2,18 @@ import os
 import streamlit as st
 from dotenv import load_dotenv
 import google.generativeai as genai
-import pdfplumber
-from pdf2image import convert_from_path
-import pytesseract
-import tempfile
 import requests
 import json
 import math
 import re
+from utils.analysis_parser import clean_markdown, parse_analysis
+from utils.analysis_stream import SectionStreamParser, split_sections
+from utils.document_ingestion import get_document_ingestor
+from utils.llm_cache import get_llm_cache
+from utils.llm_providers import complete_sync, stream_sync
+from utils.prompt_builder import get_prompt_builder
+
+GEMINI_MODEL = "gemini-1.5-flash"
 
 
 class AIResumeAnalyzer:
@@ -25,137 +29,22 @@ class AIResumeAnalyzer:
             genai.configure(api_key=self.google_api_key)
     
     def extract_text_from_pdf(self, pdf_file):
-        """Extract text from PDF using pdfplumber and OCR if needed"""
-        text = ""
-        
-        # Save the uploaded file to a temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as temp_file:
-            if hasattr(pdf_file, 'getbuffer'):
-                temp_file.write(pdf_file.getbuffer())
-            elif hasattr(pdf_file, 'read'):
-                temp_file.write(pdf_file.read())
-                pdf_file.seek(0)  # Reset file pointer
-            else:
-                # If it's already bytes
-                temp_file.write(pdf_file)
-            temp_path = temp_file.name
-        
-        try:
-            # Try direct text extraction with pdfplumber
-            try:
-                with pdfplumber.open(temp_path) as pdf:
-                    for page in pdf.pages:
-                        try:
-                            # Suppress specific warnings about PDFColorSpace conversion
-                            import warnings
-                            with warnings.catch_warnings():
-                                warnings.filterwarnings("ignore", message=".*PDFColorSpace.*")
-                                warnings.filterwarnings("ignore", message=".*Cannot convert.*")
-                                page_text = page.extract_text()
-                                if page_text:
-                                    text += page_text + "\n"
-                        except Exception as e:
-                            # Don't show these specific errors to the user
-                            if "PDFColorSpace" not in str(e) and "Cannot convert" not in str(e):
-                                st.warning(f"Error extracting text from page with pdfplumber: {e}")
-            except Exception as e:
-                st.warning(f"pdfplumber extraction failed: {e}")
-            
-            # If pdfplumber extraction worked, return the text
-            if text.strip():
-                os.unlink(temp_path)  # Clean up the temp file
-                return text.strip()
-            
-            # Try PyPDF2 as a fallback
-            st.info("Trying PyPDF2 extraction method...")
-            try:
-                import pypdf
-                pdf_text = ""
-                with open(temp_path, 'rb') as file:
-                    pdf_reader = pypdf.PdfReader(file)
-                    for page in pdf_reader.pages:
-                        page_text = page.extract_text()
-                        if page_text:
-                            pdf_text += page_text + "\n"
-                
-                if pdf_text.strip():
-                    os.unlink(temp_path)  # Clean up the temp file
-                    return pdf_text.strip()
-            except Exception as e:
-                st.warning(f"PyPDF2 extraction failed: {e}")
-            
-            # If we got here, both extraction methods failed
-            st.warning("Standard text extraction methods failed. Your PDF might be image-based or scanned.")
-            
-            # Try OCR as a last resort
-            try:
-                # Check if we can import the required OCR libraries
-                import pytesseract
-                from pdf2image import convert_from_path
-                
-                st.info("Attempting OCR for image-based PDF. This may take a moment...")
-                
-                # Check if poppler is installed
-                poppler_path = None
-                if os.name == 'nt':  # Windows
-                    # Try to find poppler in common locations
-                    possible_paths = [
-                        r'C:\poppler\Library\bin',
-                        r'C:\Program Files\poppler\bin',
-                        r'C:\Program Files (x86)\poppler\bin',
-                        r'C:\poppler\bin'
-                    ]
-                    for path in possible_paths:
-                        if os.path.exists(path):
-                            poppler_path = path
-                            st.success(f"Found Poppler at: {path}")
-                            break
-                    
-                    if not poppler_path:
-                        st.warning("Poppler not found in common locations. Using default path: C:\\poppler\\Library\\bin")
-                        poppler_path = r'C:\poppler\Library\bin'
-                
-                # Try to convert PDF to images
-                try:
-                    if poppler_path and os.name == 'nt':
-                        images = convert_from_path(temp_path, poppler_path=poppler_path)
-                    else:
-                        images = convert_from_path(temp_path)
-                    
-                    # Process each image with OCR
-                    ocr_text = ""
-                    for i, image in enumerate(images):
-                        st.info(f"Processing page {i+1} with OCR...")
-                        page_text = pytesseract.image_to_string(image)
-                        ocr_text += page_text + "\n"
-                    
-                    if ocr_text.strip():
-                        os.unlink(temp_path)  # Clean up the temp file
-                        return ocr_text.strip()
-                    else:
-                        st.error("OCR extraction yielded no text. Please check if the PDF contains actual text content.")
-                except Exception as e:
-                    st.error(f"PDF to image conversion failed: {e}")
-                    st.info("If you're on Windows, make sure Poppler is installed and in your PATH.")
-                    st.info("Download Poppler from: https://github.com/oschwartz10612/poppler-windows/releases/")
-            except ImportError as e:
-                st.error(f"OCR libraries not available: {e}")
-                st.info("Please install the required OCR libraries:")
-                st.code("pip install pytesseract pdf2image")
-                st.info("For Windows, also download and install:")
-                st.info("1. Tesseract OCR: https://github.com/UB-Mannheim/tesseract/wiki")
-                st.info("2. Poppler: https://github.com/oschwartz10612/poppler-windows/releases/")
-            except Exception as e:
-                st.error(f"OCR processing failed: {e}")
+        """Extract text from PDF using the shared ingestion engine and OCR if needed"""
+        document = get_document_ingestor().ingest(pdf_file, file_type='pdf', progress=st.info)
+        if not document.is_empty:
+            return document.text
         
-        except Exception as e:
-            st.error(f"PDF processing failed: {e}")
+        for backend, error in document.errors.items():
+            st.warning(f"{backend} extraction failed: {error}")
         
-        # Clean up the temp file
-        try:
-            os.unlink(temp_path)
-        except:
-            pass
+        if 'ocr' in document.errors:
+            st.info("Please make sure the OCR libraries are installed:")
+            st.code("pip install pytesseract pdf2image")
+            st.info("For Windows, also download and install:")
+            st.info("1. Tesseract OCR: https://github.com/UB-Mannheim/tesseract/wiki")
+            st.info("2. Poppler: https://github.com/oschwartz10612/poppler-windows/releases/")
+        elif document.ocr_used:
+            st.error("OCR extraction yielded no text. Please check if the PDF contains actual text content.")
         
         # If all extraction methods failed, return an empty string
         st.error("All text extraction methods failed. Please try a different PDF or manually extract the text.")
@@ -163,117 +52,200 @@ class AIResumeAnalyzer:
     
     def extract_text_from_docx(self, docx_file):
         """Extract text from DOCX file"""
-        from docx import Document
+        document = get_document_ingestor().ingest(docx_file, file_type='docx')
+        if 'docx' in document.errors:
+            st.error(f"Error extracting text from DOCX: {document.errors['docx']}")
+        return document.text
+    
+    def _build_gemini_prompt(self, resume_text, job_description=None, job_role=None):
+        """Build the analysis prompt from compacted, token-budgeted resume and job description text"""
+        return get_prompt_builder().build(
+            lambda resume, description: self._render_gemini_prompt(resume, description, job_role),
+            resume_text, job_description
+        )
+    
+    def _render_gemini_prompt(self, resume_text, job_description=None, job_role=None):
+        """Fill the Gemini analysis prompt template"""
+        base_prompt = f"""
+        You are an expert resume analyst with deep knowledge of industry standards, job requirements, and hiring practices across various fields. Your task is to provide a comprehensive, detailed analysis of the resume provided.
         
-        # Save the uploaded file to a temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.docx') as temp_file:
-            temp_file.write(docx_file.getbuffer())
-            temp_path = temp_file.name
+        Please structure your response in the following format:
         
-        text = ""
-        try:
-            doc = Document(temp_path)
-            for para in doc.paragraphs:
-                text += para.text + "\n"
-        except Exception as e:
-            st.error(f"Error extracting text from DOCX: {e}")
+        ## Overall Assessment
+        [Provide a detailed assessment of the resume's overall quality, effectiveness, and alignment with industry standards. Include specific observations about formatting, content organization, and general impression. Be thorough and specific.]
         
-        os.unlink(temp_path)  # Clean up the temp file
-        return text
-    
-    def analyze_resume_with_gemini(self, resume_text, job_description=None, job_role=None):
-        """Analyze resume using Google Gemini AI"""
-        if not resume_text:
-            return {"error": "Resume text is required for analysis."}
+        ## Professional Profile Analysis
+        [Analyze the candidate's professional profile, experience trajectory, and career narrative. Discuss how well their story comes across and whether their career progression makes sense for their apparent goals.]
         
-        if not self.google_api_key:
-            return {"error": "Google API key is not configured. Please add it to your .env file."}
+        ## Skills Analysis
+        - **Current Skills**: [List ALL skills the candidate demonstrates in their resume, categorized by type (technical, soft, domain-specific, etc.). Be comprehensive.]
+        - **Skill Proficiency**: [Assess the apparent level of expertise in key skills based on how they're presented in the resume]
+        - **Missing Skills**: [List important skills that would improve the resume for their target role. Be specific and explain why each skill matters.]
         
-        try:
-            model = genai.GenerativeModel("gemini-1.5-flash")
-            
-            base_prompt = f"""
-            You are an expert resume analyst with deep knowledge of industry standards, job requirements, and hiring practices across various fields. Your task is to provide a comprehensive, detailed analysis of the resume provided.
-            
-            Please structure your response in the following format:
-            
-            ## Overall Assessment
-            [Provide a detailed assessment of the resume's overall quality, effectiveness, and alignment with industry standards. Include specific observations about formatting, content organization, and general impression. Be thorough and specific.]
-            
-            ## Professional Profile Analysis
-            [Analyze the candidate's professional profile, experience trajectory, and career narrative. Discuss how well their story comes across and whether their career progression makes sense for their apparent goals.]
-            
-            ## Skills Analysis
-            - **Current Skills**: [List ALL skills the candidate demonstrates in their resume, categorized by type (technical, soft, domain-specific, etc.). Be comprehensive.]
-            - **Skill Proficiency**: [Assess the apparent level of expertise in key skills based on how they're presented in the resume]
-            - **Missing Skills**: [List important skills that would improve the resume for their target role. Be specific and explain why each skill matters.]
-            
-            ## Experience Analysis
-            [Provide detailed feedback on how well the candidate has presented their experience. Analyze the use of action verbs, quantifiable achievements, and relevance to their target role. Suggest specific improvements.]
-            
-            ## Education Analysis
-            [Analyze the education section, including relevance of degrees, certifications, and any missing educational elements that would strengthen their profile.]
-            
-            ## Key Strengths
-            [List 5-7 specific strengths of the resume with detailed explanations of why these are effective]
-            
-            ## Areas for Improvement
-            [List 5-7 specific areas where the resume could be improved with detailed, actionable recommendations]
-            
-            ## ATS Optimization Assessment
-            [Analyze how well the resume is optimized for Applicant Tracking Systems. Provide a specific ATS score from 0-100, with 100 being perfectly optimized. Use this format: "ATS Score: XX/100". Then suggest specific keywords and formatting changes to improve ATS performance.]
-            
-            ## Recommended Courses/Certifications
-            [Suggest 5-7 specific courses or certifications that would enhance the candidate's profile, with a brief explanation of why each would be valuable]
+        ## Experience Analysis
+        [Provide detailed feedback on how well the candidate has presented their experience. Analyze the use of action verbs, quantifiable achievements, and relevance to their target role. Suggest specific improvements.]
+        
+        ## Education Analysis
+        [Analyze the education section, including relevance of degrees, certifications, and any missing educational elements that would strengthen their profile.]
+        
+        ## Key Strengths
+        [List 5-7 specific strengths of the resume with detailed explanations of why these are effective]
+        
+        ## Areas for Improvement
+        [List 5-7 specific areas where the resume could be improved with detailed, actionable recommendations]
+        
+        ## ATS Optimization Assessment
+        [Analyze how well the resume is optimized for Applicant Tracking Systems. Provide a specific ATS score from 0-100, with 100 being perfectly optimized. Use this format: "ATS Score: XX/100". Then suggest specific keywords and formatting changes to improve ATS performance.]
+        
+        ## Recommended Courses/Certifications
+        [Suggest 5-7 specific courses or certifications that would enhance the candidate's profile, with a brief explanation of why each would be valuable]
+        
+        ## Resume Score
+        [Provide a score from 0-100 based on the overall quality of the resume. Use this format exactly: "Resume Score: XX/100" where XX is the numerical score. Be consistent with your assessment - a resume with significant issues should score below 60, an average resume 60-75, a good resume 75-85, and an excellent resume 85-100.]
+        
+        Resume:
+        {resume_text}
+        """
+        
+        if job_role:
+            base_prompt += f"""
             
-            ## Resume Score
-            [Provide a score from 0-100 based on the overall quality of the resume. Use this format exactly: "Resume Score: XX/100" where XX is the numerical score. Be consistent with your assessment - a resume with significant issues should score below 60, an average resume 60-75, a good resume 75-85, and an excellent resume 85-100.]
+            The candidate is targeting a role as: {job_role}
             
-            Resume:
-            {resume_text}
+            ## Role Alignment Analysis
+            [Analyze how well the resume aligns with the target role of {job_role}. Provide specific recommendations to better align the resume with this role.]
             """
+        
+        if job_description:
+            base_prompt += f"""
             
-            if job_role:
-                base_prompt += f"""
-                
-                The candidate is targeting a role as: {job_role}
-                
-                ## Role Alignment Analysis
-                [Analyze how well the resume aligns with the target role of {job_role}. Provide specific recommendations to better align the resume with this role.]
-                """
-            
-            if job_description:
-                base_prompt += f"""
-                
-                Additionally, compare this resume to the following job description:
-                
-                Job Description:
-                {job_description}
-                
-                ## Job Match Analysis
-                [Provide a detailed analysis of how well the resume matches the job description, with a match percentage and specific areas of alignment and misalignment]
-                
-                ## Key Job Requirements Not Met
-                [List specific requirements from the job description that are not addressed in the resume, with recommendations on how to address each gap]
-                """
-            
-            response = model.generate_content(base_prompt)
-            analysis = response.text.strip()
+            Additionally, compare this resume to the following job description:
             
-            # Extract resume score if present
-            resume_score = self._extract_score_from_text(analysis)
+            Job Description:
+            {job_description}
             
-            # Extract ATS score if present
-            ats_score = self._extract_ats_score_from_text(analysis)
+            ## Job Match Analysis
+            [Provide a detailed analysis of how well the resume matches the job description, with a match percentage and specific areas of alignment and misalignment]
             
-            return {
+            ## Key Job Requirements Not Met
+            [List specific requirements from the job description that are not addressed in the resume, with recommendations on how to address each gap]
+            """
+        
+        return base_prompt
+    
+    def analyze_resume_with_gemini(self, resume_text, job_description=None, job_role=None):
+        """Analyze resume using Google Gemini AI, falling back to Gemini via OpenRouter"""
+        return self._analyze_with_providers(resume_text, job_description, job_role,
+                                            ["gemini", "openrouter_gemini"], GEMINI_MODEL)
+    
+    def analyze_resume_with_anthropic(self, resume_text, job_description=None, job_role=None):
+        """Analyze resume using Anthropic Claude via OpenRouter, falling back to Google Gemini"""
+        return self._analyze_with_providers(resume_text, job_description, job_role,
+                                            ["openrouter", "gemini"], "anthropic/claude-3.5-sonnet")
+    
+    def _analyze_with_providers(self, resume_text, job_description, job_role, providers, cache_model):
+        """Run the analysis prompt on the first provider that answers and score the response"""
+        if not resume_text:
+            return {"error": "Resume text is required for analysis."}
+        
+        if not self.google_api_key and not self.openrouter_api_key:
+            return {"error": "No AI API key is configured. Please add GOOGLE_API_KEY or OPENROUTER_API_KEY to your .env file."}
+        
+        # Identical inputs are answered from the response cache
+        cache = get_llm_cache()
+        cache_key = cache.make_key(cache_model, 'analysis', resume_text=resume_text,
+                                   job_description=job_description, job_role=job_role)
+        cached = cache.get(cache_key)
+        if cached:
+            return {**cached, "cached": True}
+        
+        return self._complete_analysis(resume_text, job_description, job_role, providers, cache, cache_key)
+    
+    def _complete_analysis(self, resume_text, job_description, job_role, providers, cache, cache_key):
+        """Call the providers for one analysis and cache a successful result"""
+        try:
+            prompt = self._build_gemini_prompt(resume_text, job_description, job_role)
+            completion = complete_sync(prompt.prompt, providers)
+        except Exception as e:
+            return {"error": f"Analysis failed: {str(e)}"}
+        
+        analysis = completion["text"].strip()
+        result = {
+            "analysis": analysis,
+            "resume_score": self._extract_score_from_text(analysis),
+            "ats_score": self._extract_ats_score_from_text(analysis),
+            "model_used": completion["label"],
+            **prompt.stats()
+        }
+        cache.put(cache_key, completion["model"], result)
+        return result
+
+    def stream_resume_analysis_with_gemini(self, resume_text, job_description=None, job_role=None):
+        """
+        Analyze a resume with Google Gemini, yielding results while the response streams in
+        
+        Runs through the provider layer, so it gets the same timeouts, retries
+        and failover to Gemini via OpenRouter as analyze_resume_with_gemini.
+        
+        Yields dictionaries:
+        - {"type": "section", "title", "content"} as soon as each "## " section is complete
+        - {"type": "score", "name", "value"} when the ATS or Resume Score section closes
+        - {"type": "done", "result"} with the same result analyze_resume_with_gemini returns
+        - {"type": "error", "error"} if the analysis could not run
+        """
+        if not resume_text:
+            yield {"type": "error", "error": "Resume text is required for analysis."}
+            return
+        
+        if not self.google_api_key and not self.openrouter_api_key:
+            yield {"type": "error", "error": "No AI API key is configured. Please add GOOGLE_API_KEY or OPENROUTER_API_KEY to your .env file."}
+            return
+        
+        cache = get_llm_cache()
+        cache_key = cache.make_key(GEMINI_MODEL, 'analysis', resume_text=resume_text,
+                                   job_description=job_description, job_role=job_role)
+        cached = cache.get(cache_key)
+        if cached:
+            for title, content in split_sections(cached.get("analysis", "")):
+                yield from self._section_events(title, content)
+            yield {"type": "done", "result": {**cached, "cached": True}}
+            return
+        
+        try:
+            prompt = self._build_gemini_prompt(resume_text, job_description, job_role)
+            parser = SectionStreamParser()
+            chunks = []
+            for chunk in stream_sync(prompt.prompt, ["gemini", "openrouter_gemini"]):
+                chunks.append(chunk["text"])
+                for title, content in parser.feed(chunk["text"]):
+                    yield from self._section_events(title, content)
+            for title, content in parser.close():
+                yield from self._section_events(title, content)
+            
+            # Final scores come from the full text, exactly as in the blocking call
+            analysis = "".join(chunks).strip()
+            result = {
                 "analysis": analysis,
-                "resume_score": resume_score,
-                "ats_score": ats_score
+                "resume_score": self._extract_score_from_text(analysis),
+                "ats_score": self._extract_ats_score_from_text(analysis),
+                "model_used": chunk["label"],
+                **prompt.stats()
             }
+            cache.put(cache_key, chunk["model"], result)
+            yield {"type": "done", "result": result}
         
         except Exception as e:
-            return {"error": f"Analysis failed: {str(e)}"}
+            yield {"type": "error", "error": f"Analysis failed: {str(e)}"}
+    
+    def _section_events(self, title, content):
+        """Yield the section event for a completed section, plus its score if it carries one"""
+        yield {"type": "section", "title": title, "content": content}
+        if title == "ATS Optimization Assessment":
+            score = self._extract_ats_score_from_text(f"## {title}\n{content}")
+            yield {"type": "score", "name": "ats_score", "value": score}
+        elif title == "Resume Score":
+            score = self._extract_score_from_text(f"## {title}\n{content}")
+            yield {"type": "score", "name": "resume_score", "value": score}
 
     
     def generate_pdf_report(self, analysis_result, candidate_name, job_role):
@@ -299,25 +271,6 @@ class AIResumeAnalyzer:
                 st.info("Please make sure reportlab is installed: pip install reportlab")
                 return self.simple_generate_pdf_report(analysis_result, candidate_name, job_role)
             
-            # Helper function to clean markdown formatting
-            def clean_markdown(text):
-                if not text:
-                    return ""
-                
-                # Remove markdown formatting for bold and italic
-                text = re.sub(r'\*\*(.*?)\*\*', r'\1', text)  # Remove ** for bold
-                text = re.sub(r'\*(.*?)\*', r'\1', text)      # Remove * for italic
-                text = re.sub(r'__(.*?)__', r'\1', text)      # Remove __ for bold
-                text = re.sub(r'_(.*?)_', r'\1', text)        # Remove _ for italic
-                
-                # Remove markdown formatting for headers
-                text = re.sub(r'^#{1,6}\s+', '', text, flags=re.MULTILINE)
-                
-                # Remove markdown formatting for links
-                text = re.sub(r'\[(.*?)\]\(.*?\)', r'\1', text)
-                
-                return text.strip()
-            
             # Validate input data
             if not analysis_result:
                 st.error("No analysis result provided for PDF generation")
@@ -630,6 +583,7 @@ class AIResumeAnalyzer:
             
             # Analysis Content
             analysis_text = analysis_result.get("full_response", "")
+            document = parse_analysis(analysis_text)
             
             # Extract key sections for the executive summary
             strengths = analysis_result.get("strengths", [])
@@ -637,11 +591,7 @@ class AIResumeAnalyzer:
             
             # If strengths and weaknesses are not in the structured data, try to extract from text
             if not strengths:
-                if "## Key Strengths" in analysis_text:
-                    strengths_section = analysis_text.split("## Key Strengths")[1].split("##")[0].strip()
-                    strengths = [clean_markdown(s.strip().replace("- ", "").replace("* ", "").replace("• ", "")) 
-                                for s in strengths_section.split("\n") 
-                                if s.strip() and (s.strip().startswith("-") or s.strip().startswith("*") or s.strip().startswith("•"))]
+                strengths = document.strengths
                 
                 # Try another pattern for strengths
                 if not strengths and "Key Strengths" in analysis_text:
@@ -658,11 +608,7 @@ class AIResumeAnalyzer:
                             strengths.append(clean_markdown(line))
 
             if not weaknesses:
-                if "## Areas for Improvement" in analysis_text:
-                    weaknesses_section = analysis_text.split("## Areas for Improvement")[1].split("##")[0].strip()
-                    weaknesses = [clean_markdown(w.strip().replace("- ", "").replace("* ", "").replace("• ", "")) 
-                                 for w in weaknesses_section.split("\n") 
-                                 if w.strip() and (w.strip().startswith("-") or w.strip().startswith("*") or w.strip().startswith("•"))]
+                weaknesses = document.weaknesses
                 
                 # Try another pattern for weaknesses
                 if not weaknesses and "Areas for Improvement" in analysis_text:
@@ -684,22 +630,9 @@ class AIResumeAnalyzer:
                 # Try to get from resume_score
                 resume_score = analysis_result.get("resume_score", 0)
                 
-                # If still 0, try to extract from the analysis text
-                if resume_score == 0 and "Resume Score:" in analysis_text:
-                    score_match = re.search(r'Resume Score:\s*(\d{1,3})/100', analysis_text)
-                    if score_match:
-                        resume_score = int(score_match.group(1))
-                    else:
-                        # Try another pattern
-                        score_match = re.search(r'\bResume Score:\s*(\d{1,3})\b', analysis_text)
-                        if score_match:
-                            resume_score = int(score_match.group(1))
-                        else:
-                            # Try to find any number after "Resume Score:"
-                            score_section = analysis_text.split("Resume Score:")[1].split("\n")[0].strip()
-                            score_match = re.search(r'\b(\d{1,3})\b', score_section)
-                            if score_match:
-                                resume_score = int(score_match.group(1))
+                # If still 0, take it from the parsed analysis text
+                if resume_score == 0:
+                    resume_score = document.resume_score
 
             # Ensure resume_score is a valid integer
             resume_score = int(resume_score) if resume_score else 0
@@ -749,10 +682,7 @@ class AIResumeAnalyzer:
             content.append(Spacer(1, 0.1*inch))
 
             # Extract overall assessment
-            overall_assessment = ""
-            if "## Overall Assessment" in analysis_text:
-                overall_section = analysis_text.split("## Overall Assessment")[1].split("##")[0].strip()
-                overall_assessment = clean_markdown(overall_section)
+            overall_assessment = clean_markdown(document.content("Overall Assessment"))
 
             content.append(Paragraph(overall_assessment, normal_style))
             content.append(Spacer(1, 0.2*inch))
@@ -820,9 +750,6 @@ class AIResumeAnalyzer:
             content.append(Paragraph("Detailed Analysis", heading_style))
             content.append(Spacer(1, 0.1*inch))
             
-            # Parse the markdown-like content
-            sections = analysis_text.split("##")
-            
             # Define sections to include in detailed analysis
             detailed_sections = [
                 "Professional Profile Analysis",
@@ -834,23 +761,15 @@ class AIResumeAnalyzer:
                 "Job Match Analysis"
             ]
             
-            for section in sections:
-                if not section.strip():
-                    continue
-                
-                # Extract section title and content
-                lines = section.strip().split("\n")
-                section_title = lines[0].strip()
+            for section in document.sections:
+                section_title = section.title
                 
                 # Skip sections we don't want in the detailed analysis
-                if section_title not in detailed_sections and section_title != "Overall Assessment":
+                # (Overall Assessment is already in the executive summary)
+                if section_title not in detailed_sections:
                     continue
                 
-                # Skip Overall Assessment as we've already included it
-                if section_title == "Overall Assessment":
-                    continue
-                
-                section_content = "\n".join(lines[1:]).strip()
+                section_content = section.content
                 
                 # Add section title
                 content.append(Paragraph(section_title, subheading_style))
@@ -859,27 +778,8 @@ class AIResumeAnalyzer:
                 # Process content based on section
                 if section_title == "Skills Analysis":
                     # Extract current and missing skills
-                    current_skills = []
-                    missing_skills = []
-                    
-                    if "Current Skills" in section_content:
-                        current_part = section_content.split("Current Skills")[1]
-                        if "Missing Skills" in current_part:
-                            current_part = current_part.split("Missing Skills")[0]
-                        
-                        for line in current_part.split("\n"):
-                            if line.strip() and ("-" in line or "*" in line or "•" in line):
-                                skill = line.replace("-", "").replace("*", "").replace("•", "").strip()
-                                if skill:
-                                    current_skills.append(skill)
-                    
-                    if "Missing Skills" in section_content:
-                        missing_part = section_content.split("Missing Skills")[1]
-                        for line in missing_part.split("\n"):
-                            if line.strip() and ("-" in line or "*" in line or "•" in line):
-                                skill = line.replace("-", "").replace("*", "").replace("•", "").strip()
-                                if skill:
-                                    missing_skills.append(skill)
+                    current_skills = section.labelled_lines("Current Skills", "Missing Skills")
+                    missing_skills = section.labelled_lines("Missing Skills")
                     
                     # Create skills table with better formatting
                     if current_skills or missing_skills:
@@ -964,11 +864,8 @@ class AIResumeAnalyzer:
                 course_recommendations = analysis_result.get("suggestions", [])
             
             # If still no recommendations, try to extract from text
-            if not course_recommendations and "## Recommended Courses" in analysis_text:
-                recommendations_section = analysis_text.split("## Recommended Courses")[1].split("##")[0].strip()
-                course_recommendations = [clean_markdown(r.strip().replace("- ", "").replace("* ", "").replace("• ", "")) 
-                              for r in recommendations_section.split("\n") 
-                              if r.strip() and (r.strip().startswith("-") or r.strip().startswith("*") or r.strip().startswith("•"))]
+            if not course_recommendations:
+                course_recommendations = document.suggestions
             
             # Try another pattern for course recommendations
             if not course_recommendations and "Recommended Courses" in analysis_text:
@@ -1101,71 +998,24 @@ class AIResumeAnalyzer:
             
     def extract_skills_from_analysis(self, analysis_text):
         """Extract skills from the analysis text"""
-        skills = []
-        
         try:
-            if "Current Skills" in analysis_text:
-                skills_section = analysis_text.split("Current Skills")[1]
-                if "##" in skills_section:
-                    skills_section = skills_section.split("##")[0]
-                
-                for line in skills_section.split("\n"):
-                    if line.strip() and ("-" in line or "*" in line or "•" in line):
-                        skill = line.replace("-", "").replace("*", "").replace("•", "").strip()
-                        if skill:
-                            skills.append(skill)
+            return parse_analysis(analysis_text).current_skills
         except Exception as e:
             st.warning(f"Error extracting skills: {str(e)}")
-        
-        return skills
+            return []
         
     def extract_missing_skills_from_analysis(self, analysis_text):
         """Extract missing skills from the analysis text"""
-        missing_skills = []
-        
         try:
-            if "Missing Skills" in analysis_text:
-                missing_section = analysis_text.split("Missing Skills")[1]
-                if "##" in missing_section:
-                    missing_section = missing_section.split("##")[0]
-                
-                for line in missing_section.split("\n"):
-                    if line.strip() and ("-" in line or "*" in line or "•" in line):
-                        skill = line.replace("-", "").replace("*", "").replace("•", "").strip()
-                        if skill:
-                            missing_skills.append(skill)
+            return parse_analysis(analysis_text).missing_skills
         except Exception as e:
             st.warning(f"Error extracting missing skills: {str(e)}")
-        
-        return missing_skills
+            return []
     
     def _extract_score_from_text(self, analysis_text):
         """Extract the resume score from the analysis text"""
         try:
-            # Look for the Resume Score section
-            if "## Resume Score" in analysis_text:
-                score_section = analysis_text.split("## Resume Score")[1].strip()
-                # Extract the first number found
-                score_match = re.search(r'Resume Score:\s*(\d{1,3})/100', score_section)
-                if score_match:
-                    score = int(score_match.group(1))
-                    # Ensure score is within valid range
-                    return max(0, min(score, 100))
-                
-                # Try another pattern if the first one doesn't match
-                score_match = re.search(r'\b(\d{1,3})\b', score_section)
-                if score_match:
-                    score = int(score_match.group(1))
-                    # Ensure score is within valid range
-                    return max(0, min(score, 100))
-            
-            # If no score found in Resume Score section, try to find it elsewhere
-            score_match = re.search(r'Resume Score:\s*(\d{1,3})/100', analysis_text)
-            if score_match:
-                score = int(score_match.group(1))
-                return max(0, min(score, 100))
-                
-            return 0
+            return parse_analysis(analysis_text).resume_score
         except Exception as e:
             print(f"Error extracting score: {str(e)}")
             return 0
@@ -1173,16 +1023,7 @@ class AIResumeAnalyzer:
     def _extract_ats_score_from_text(self, analysis_text):
         """Extract the ATS score from the analysis text"""
         try:
-            # Look for the ATS Score in the ATS Optimization Assessment section
-            if "## ATS Optimization Assessment" in analysis_text:
-                ats_section = analysis_text.split("## ATS Optimization Assessment")[1].split("##")[0].strip()
-                # Extract the score using regex
-                score_match = re.search(r'ATS Score:\s*(\d{1,3})/100', ats_section)
-                if score_match:
-                    score = int(score_match.group(1))
-                    # Ensure score is within valid range
-                    return max(0, min(score, 100))
-            return 0
+            return parse_analysis(analysis_text).ats_score
         except Exception as e:
             print(f"Error extracting ATS score: {str(e)}")
             return 0
@@ -1211,10 +1052,18 @@ class AIResumeAnalyzer:
                 Required Skills: {', '.join(role_info.get('required_skills', []))}
                 """
             
+            # Parsed results are cached too, so a repeat click skips parsing as well
+            cache = get_llm_cache()
+            cache_key = cache.make_key(model, 'structured', resume_text=resume_text,
+                                       job_description=job_description, job_role=job_role)
+            cached = cache.get(cache_key)
+            if cached:
+                return {**cached, "cached": True}
+            
             # Choose the appropriate model for analysis
             if model == "Google Gemini":
                 result = self.analyze_resume_with_gemini(resume_text, job_description, job_role)
-                model_used = "Google Gemini"
+                model_used = result.get("model_used", "Google Gemini")
             elif model == "Anthropic Claude":
                 result = self.analyze_resume_with_anthropic(resume_text, job_description, job_role)
                 # Get the actual model used from the result
@@ -1227,40 +1076,22 @@ class AIResumeAnalyzer:
             # Process the result to extract structured information
             analysis_text = result.get("analysis", "")
             
-            # Extract strengths
-            strengths = []
-            if "## Key Strengths" in analysis_text:
-                strengths_section = analysis_text.split("## Key Strengths")[1].split("##")[0].strip()
-                strengths = [clean_markdown(s.strip().replace("- ", "").replace("* ", "").replace("• ", "")) 
-                            for s in strengths_section.split("\n") 
-                            if s.strip() and (s.strip().startswith("-") or s.strip().startswith("*") or s.strip().startswith("•"))]
-            
-            # Extract weaknesses/areas for improvement
-            weaknesses = []
-            if "## Areas for Improvement" in analysis_text:
-                weaknesses_section = analysis_text.split("## Areas for Improvement")[1].split("##")[0].strip()
-                weaknesses = [clean_markdown(w.strip().replace("- ", "").replace("* ", "").replace("• ", "")) 
-                             for w in weaknesses_section.split("\n") 
-                             if w.strip() and (w.strip().startswith("-") or w.strip().startswith("*") or w.strip().startswith("•"))]
-            
-            # Extract suggestions/recommendations
-            suggestions = []
-            if "## Recommended Courses" in analysis_text:
-                suggestions_section = analysis_text.split("## Recommended Courses")[1].split("##")[0].strip()
-                suggestions = [clean_markdown(s.strip().replace("- ", "").replace("* ", "").replace("• ", "")) 
-                                 for s in suggestions_section.split("\n") 
-                                 if s.strip() and (s.strip().startswith("-") or s.strip().startswith("*") or s.strip().startswith("•"))]
+            # Parse the response once and read every section from it
+            document = parse_analysis(analysis_text)
+            strengths = document.strengths
+            weaknesses = document.weaknesses
+            suggestions = document.suggestions
             
             # Extract score
             score = result.get("resume_score", 0)
             if not score:
-                score = self._extract_score_from_text(analysis_text)
+                score = document.resume_score
             
             # Extract ATS score
-            ats_score = self._extract_ats_score_from_text(analysis_text)
+            ats_score = document.ats_score
             
             # Return structured analysis
-            return {
+            structured = {
                 "score": score,
                 "ats_score": ats_score,
                 "strengths": strengths,
@@ -1269,6 +1100,9 @@ class AIResumeAnalyzer:
                 "full_response": analysis_text,
                 "model_used": model_used
             }
+            if "error" not in result:
+                cache.put(cache_key, model_used, structured)
+            return structured
             
         except Exception as e:
             print(f"Error in analyze_resume: {str(e)}")
@@ -1307,25 +1141,6 @@ class AIResumeAnalyzer:
                 st.info("Please make sure reportlab is installed: pip install reportlab")
                 return None
             
-            # Helper function to clean markdown formatting
-            def clean_markdown(text):
-                if not text:
-                    return ""
-                
-                # Remove markdown formatting for bold and italic
-                text = re.sub(r'\*\*(.*?)\*\*', r'\1', text)  # Remove ** for bold
-                text = re.sub(r'\*(.*?)\*', r'\1', text)      # Remove * for italic
-                text = re.sub(r'__(.*?)__', r'\1', text)      # Remove __ for bold
-                text = re.sub(r'_(.*?)_', r'\1', text)        # Remove _ for italic
-                
-                # Remove markdown formatting for headers
-                text = re.sub(r'^#{1,6}\s+', '', text, flags=re.MULTILINE)
-                
-                # Remove markdown formatting for links
-                text = re.sub(r'\[(.*?)\]\(.*?\)', r'\1', text)
-                
-                return text.strip()
-            
             # Validate input data
             if not analysis_result:
                 st.error("No analysis result provided for PDF generation")
@@ -1542,28 +1357,22 @@ class AIResumeAnalyzer:
             content.append(Paragraph("Resume Evaluation", heading_style))
             content.append(Spacer(1, 0.1*inch))
             
+            analysis_text = analysis_result.get("full_response", "")
+            if not analysis_text:
+                analysis_text = analysis_result.get("analysis", "")
+            document = parse_analysis(analysis_text)
+            strengths = analysis_result.get("strengths") or document.strengths
+            weaknesses = analysis_result.get("weaknesses") or document.weaknesses
+            
             # Extract scores
             resume_score = analysis_result.get("score", 0)
             if resume_score == 0:
                 # Try to get from resume_score
                 resume_score = analysis_result.get("resume_score", 0)
                 
-                # If still 0, try to extract from the analysis text
-                if resume_score == 0 and "Resume Score:" in analysis_text:
-                    score_match = re.search(r'Resume Score:\s*(\d{1,3})/100', analysis_text)
-                    if score_match:
-                        resume_score = int(score_match.group(1))
-                    else:
-                        # Try another pattern
-                        score_match = re.search(r'\bResume Score:\s*(\d{1,3})\b', analysis_text)
-                        if score_match:
-                            resume_score = int(score_match.group(1))
-                        else:
-                            # Try to find any number after "Resume Score:"
-                            score_section = analysis_text.split("Resume Score:")[1].split("\n")[0].strip()
-                            score_match = re.search(r'\b(\d{1,3})\b', score_section)
-                            if score_match:
-                                resume_score = int(score_match.group(1))
+                # If still 0, take it from the parsed analysis text
+                if resume_score == 0:
+                    resume_score = document.resume_score
 
             # Ensure resume_score is a valid integer
             resume_score = int(resume_score) if resume_score else 0
@@ -1593,14 +1402,7 @@ class AIResumeAnalyzer:
             content.append(Spacer(1, 0.1*inch))
             
             # Extract overall assessment
-            analysis_text = analysis_result.get("full_response", "")
-            if not analysis_text:
-                analysis_text = analysis_result.get("analysis", "")
-                
-            overall_assessment = ""
-            if "## Overall Assessment" in analysis_text:
-                overall_section = analysis_text.split("## Overall Assessment")[1].split("##")[0].strip()
-                overall_assessment = clean_markdown(overall_section)
+            overall_assessment = clean_markdown(document.content("Overall Assessment"))
             
             content.append(Paragraph(overall_assessment, normal_style))
             content.append(Spacer(1, 0.2*inch))
@@ -1665,7 +1467,7 @@ class AIResumeAnalyzer:
             content.append(Spacer(1, 0.25*inch))
             
             # Use the process_sections method to handle detailed analysis
-            content = self.process_sections(analysis_text, content, normal_style, list_item_style, subheading_style, heading_style, clean_markdown)
+            content = self.process_sections(document, content, normal_style, list_item_style, subheading_style, heading_style, clean_markdown)
             
             # Add course recommendations
             course_recommendations = []
@@ -1675,11 +1477,8 @@ class AIResumeAnalyzer:
                 course_recommendations = analysis_result.get("suggestions", [])
             
             # If still no recommendations, try to extract from text
-            if not course_recommendations and "## Recommended Courses" in analysis_text:
-                recommendations_section = analysis_text.split("## Recommended Courses")[1].split("##")[0].strip()
-                course_recommendations = [clean_markdown(r.strip().replace("- ", "").replace("* ", "").replace("• ", "")) 
-                              for r in recommendations_section.split("\n") 
-                              if r.strip() and (r.strip().startswith("-") or r.strip().startswith("*") or r.strip().startswith("•"))]
+            if not course_recommendations:
+                course_recommendations = document.suggestions
             
             # Try another pattern for course recommendations
             if not course_recommendations and "Recommended Courses" in analysis_text:
@@ -1812,8 +1611,8 @@ class AIResumeAnalyzer:
 
     def process_sections(self, analysis_text, content, normal_style, list_item_style, subheading_style, heading_style, clean_markdown):
         """Process sections of the analysis text with special handling for certain sections"""
-        # Parse the markdown-like content
-        sections = analysis_text.split("##")
+        # Accept either the raw text or an already parsed AnalysisDocument
+        document = parse_analysis(analysis_text) if isinstance(analysis_text, str) else analysis_text
         
         # Define sections to include in detailed analysis
         detailed_sections = [
@@ -1830,23 +1629,15 @@ class AIResumeAnalyzer:
         content.append(Paragraph("Detailed Analysis", heading_style))
         content.append(Spacer(1, 0.1*inch))
         
-        for section in sections:
-            if not section.strip():
-                continue
-            
-            # Extract section title and content
-            lines = section.strip().split("\n")
-            section_title = lines[0].strip()
+        for section in document.sections:
+            section_title = section.title
             
             # Skip sections we don't want in the detailed analysis
-            if section_title not in detailed_sections and section_title != "Overall Assessment":
-                continue
-            
-            # Skip Overall Assessment as we've already included it
-            if section_title == "Overall Assessment":
+            # (Overall Assessment is already in the executive summary)
+            if section_title not in detailed_sections:
                 continue
             
-            section_content = "\n".join(lines[1:]).strip()
+            section_content = section.content
             
             # Add section title
             content.append(Paragraph(section_title, subheading_style))
@@ -1855,27 +1646,8 @@ class AIResumeAnalyzer:
             # Process content based on section
             if section_title == "Skills Analysis":
                 # Extract current and missing skills
-                current_skills = []
-                missing_skills = []
-                
-                if "Current Skills" in section_content:
-                    current_part = section_content.split("Current Skills")[1]
-                    if "Missing Skills" in current_part:
-                        current_part = current_part.split("Missing Skills")[0]
-                    
-                    for line in current_part.split("\n"):
-                        if line.strip() and ("-" in line or "*" in line or "•" in line):
-                            skill = clean_markdown(line.replace("-", "").replace("*", "").replace("•", "").strip())
-                            if skill:
-                                current_skills.append(skill)
-                
-                if "Missing Skills" in section_content:
-                    missing_part = section_content.split("Missing Skills")[1]
-                    for line in missing_part.split("\n"):
-                        if line.strip() and ("-" in line or "*" in line or "•" in line):
-                            skill = clean_markdown(line.replace("-", "").replace("*", "").replace("•", "").strip())
-                            if skill:
-                                missing_skills.append(skill)
+                current_skills = [clean_markdown(skill) for skill in section.labelled_lines("Current Skills", "Missing Skills")]
+                missing_skills = [clean_markdown(skill) for skill in section.labelled_lines("Missing Skills")]
                 
                 # Create skills table with better formatting
                 if current_skills or missing_skills:
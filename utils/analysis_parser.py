@@ -0,0 +1,170 @@
+import re
+from functools import lru_cache
+
+from utils.analysis_stream import split_sections
+
+BULLET_MARKERS = ('-', '*', '•')
+
+RESUME_SCORE_PATTERN = re.compile(r'Resume Score:\s*(\d{1,3})/100')
+LOOSE_RESUME_SCORE_PATTERN = re.compile(r'\bResume Score:\s*(\d{1,3})\b')
+ATS_SCORE_PATTERN = re.compile(r'ATS Score:\s*(\d{1,3})/100')
+NUMBER_PATTERN = re.compile(r'\b(\d{1,3})\b')
+
+
+def clean_markdown(text):
+    """Strip markdown bold/italic, header and link formatting from text"""
+    if not text:
+        return ""
+
+    # Remove markdown formatting for bold and italic
+    text = re.sub(r'\*\*(.*?)\*\*', r'\1', text)  # Remove ** for bold
+    text = re.sub(r'\*(.*?)\*', r'\1', text)      # Remove * for italic
+    text = re.sub(r'__(.*?)__', r'\1', text)      # Remove __ for bold
+    text = re.sub(r'_(.*?)_', r'\1', text)        # Remove _ for italic
+
+    # Remove markdown formatting for headers
+    text = re.sub(r'^#{1,6}\s+', '', text, flags=re.MULTILINE)
+
+    # Remove markdown formatting for links
+    text = re.sub(r'\[(.*?)\]\(.*?\)', r'\1', text)
+
+    return text.strip()
+
+
+def _clamp_score(score):
+    return max(0, min(score, 100))
+
+
+class AnalysisSection:
+    """One '## ' section of an analysis response"""
+
+    def __init__(self, title, content):
+        self.title = title
+        self.content = content
+        self.lines = content.split('\n') if content else []
+        self._bullets = None
+
+    @property
+    def bullets(self):
+        """List items of the section with markers and markdown removed"""
+        if self._bullets is None:
+            self._bullets = [
+                clean_markdown(line.strip().replace("- ", "").replace("* ", "").replace("• ", ""))
+                for line in self.lines
+                if line.strip() and line.strip().startswith(BULLET_MARKERS)
+            ]
+        return self._bullets
+
+    def labelled_lines(self, label, stop=None):
+        """Lines mentioning a list marker after `label` (up to `stop`), with the markers stripped"""
+        if label not in self.content:
+            return []
+        part = self.content.split(label, 1)[1]
+        if stop and stop in part:
+            part = part.split(stop, 1)[0]
+        items = []
+        for line in part.split('\n'):
+            if line.strip() and any(marker in line for marker in BULLET_MARKERS):
+                item = line.replace("-", "").replace("*", "").replace("•", "").strip()
+                if item:
+                    items.append(item)
+        return items
+
+
+class AnalysisDocument:
+    """An LLM analysis response parsed once into sections, bullets and scores.
+
+    Sections are found in a single pass over the lines; every lookup after
+    that is a dictionary or list access instead of another split of the text.
+    """
+
+    def __init__(self, text):
+        self.text = text or ""
+        self.preamble = ""
+        self.sections = []
+        for title, content in split_sections(self.text):
+            if title is None:
+                self.preamble = content
+            else:
+                self.sections.append(AnalysisSection(title, content))
+        self._by_title = {}
+        for section in self.sections:
+            self._by_title.setdefault(section.title, section)
+        self._resume_score = None
+        self._ats_score = None
+
+    def section(self, title):
+        """Return the first section whose title starts with `title`, or None"""
+        section = self._by_title.get(title)
+        if section is not None:
+            return section
+        for section in self.sections:
+            if section.title.startswith(title):
+                return section
+        return None
+
+    def content(self, title):
+        section = self.section(title)
+        return section.content if section else ""
+
+    def bullets(self, title):
+        section = self.section(title)
+        return list(section.bullets) if section else []
+
+    @property
+    def strengths(self):
+        return self.bullets("Key Strengths")
+
+    @property
+    def weaknesses(self):
+        return self.bullets("Areas for Improvement")
+
+    @property
+    def suggestions(self):
+        return self.bullets("Recommended Courses")
+
+    @property
+    def current_skills(self):
+        """Skill lines after 'Current Skills', up to 'Missing Skills'"""
+        return self._skill_lines("Current Skills", "Missing Skills")
+
+    @property
+    def missing_skills(self):
+        return self._skill_lines("Missing Skills")
+
+    def _skill_lines(self, label, stop=None):
+        section = self.section("Skills Analysis")
+        if section is None or label not in section.content:
+            section = next((s for s in self.sections if label in s.content), None)
+        return section.labelled_lines(label, stop) if section else []
+
+    @property
+    def resume_score(self):
+        """Score from the 'Resume Score' section, else any 'Resume Score: XX' line; 0 if absent"""
+        if self._resume_score is None:
+            self._resume_score = self._find_resume_score()
+        return self._resume_score
+
+    def _find_resume_score(self):
+        section = self.section("Resume Score")
+        if section is not None:
+            match = RESUME_SCORE_PATTERN.search(section.content) or NUMBER_PATTERN.search(section.content)
+            if match:
+                return _clamp_score(int(match.group(1)))
+        match = RESUME_SCORE_PATTERN.search(self.text) or LOOSE_RESUME_SCORE_PATTERN.search(self.text)
+        return _clamp_score(int(match.group(1))) if match else 0
+
+    @property
+    def ats_score(self):
+        """Score from the 'ATS Score: XX/100' line of the ATS section; 0 if absent"""
+        if self._ats_score is None:
+            section = self.section("ATS Optimization Assessment")
+            match = ATS_SCORE_PATTERN.search(section.content) if section else None
+            self._ats_score = _clamp_score(int(match.group(1))) if match else 0
+        return self._ats_score
+
+
+@lru_cache(maxsize=16)
+def parse_analysis(text):
+    """Return the (shared, read-only) AnalysisDocument for a response text"""
+    return AnalysisDocument(text)
@@ -0,0 +1,357 @@
+"""
+Background queue for AI resume analysis.
+
+Analysis requests are stored in the analysis_jobs table and picked up by a
+bounded pool of worker processes, so a Streamlit rerun never restarts an
+analysis and concurrent users share the same workers instead of each
+holding a script thread for the length of an LLM call. Workers write each
+section to the job row as it streams in; the page keeps the job id in its
+session and reads the row again on every rerun.
+
+Workers start with the app (ANALYSIS_WORKERS, default 2). Set
+ANALYSIS_WORKERS=0 to run them separately instead:
+    python -m utils.analysis_queue --workers 4
+"""
+
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import socket
+import threading
+import time
+
+from config.database import get_database_connection, init_database
+from utils.resume_fingerprint import analysis_scope, get_fingerprint_index
+
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+FINISHED_STATUSES = (JOB_DONE, JOB_FAILED)
+
+
+def job_fingerprint(payload):
+    """Hash of a job payload; identical requests share an in-flight job"""
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def ai_analysis_scope(payload):
+    """Fingerprint result scope for an AI analysis: the same role and job description"""
+    return analysis_scope('ai', payload.get('job_role'), payload.get('job_description'))
+
+
+def reuse_analysis(payload):
+    """Return the stored AI result of a matching resume analyzed for the same role and job, or None.
+
+    Identical resumes always match; near duplicates only at RESUME_REUSE_THRESHOLD.
+    """
+    try:
+        fingerprints = get_fingerprint_index()
+        match, result = fingerprints.reuse(payload['resume_text'], ai_analysis_scope(payload))
+        if result is None:
+            return None
+        # Counts the upload (or records a near duplicate), and lets the next exact copy hit its own fingerprint
+        fingerprints.remember(payload['resume_text'], ai_analysis_scope(payload), result)
+        return {**result, 'deduplicated': True, 'similarity': round(match.similarity, 3)}
+    except Exception as e:
+        print(f"Error looking up duplicate resumes: {e}")
+        return None
+
+
+def remember_analysis(payload, result):
+    """Store a finished AI analysis under the resume's fingerprint"""
+    try:
+        get_fingerprint_index().remember(payload['resume_text'], ai_analysis_scope(payload), result)
+    except Exception as e:
+        print(f"Error saving resume fingerprint: {e}")
+
+
+def _decode(value, default=None):
+    return json.loads(value) if value else default
+
+
+class AnalysisJobQueue:
+    """SQLite-backed job queue for AI analyses.
+
+    Jobs move queued -> running -> done/failed. A running job whose worker
+    has not reported for stale_after seconds is put back on the queue, up to
+    max_attempts times; the worker's later updates are then ignored, since
+    only the worker holding the claim can report on a running job.
+
+    Identical concurrent requests (double clicks, several users) share one
+    job and so one upstream call; each job row counts the submissions that
+    attached to it in its coalesced column.
+    """
+
+    def __init__(self, stale_after=300, max_attempts=2):
+        self.stale_after = stale_after
+        self.max_attempts = max_attempts
+
+    def submit(self, payload):
+        """Queue an analysis and return its job id.
+
+        An identical queued or running job is reused; a resume matching one
+        analyzed before (see reuse_analysis) gets a job already done with that result.
+        """
+        fingerprint = job_fingerprint(payload)
+        reused = reuse_analysis(payload)
+        conn = get_database_connection()
+        try:
+            if reused is not None:
+                now = time.time()
+                cursor = conn.execute('''
+                    INSERT INTO analysis_jobs (fingerprint, status, payload, result, created_at, updated_at, finished_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', (fingerprint, JOB_DONE, json.dumps(payload), json.dumps(reused), now, now, now))
+                conn.commit()
+                return cursor.lastrowid
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute('''
+                SELECT id FROM analysis_jobs
+                WHERE fingerprint = ? AND status IN (?, ?)
+                ORDER BY id DESC LIMIT 1
+            ''', (fingerprint, JOB_QUEUED, JOB_RUNNING)).fetchone()
+            if row:
+                conn.execute('UPDATE analysis_jobs SET coalesced = coalesced + 1 WHERE id = ?', (row[0],))
+                conn.commit()
+                return row[0]
+            now = time.time()
+            cursor = conn.execute('''
+                INSERT INTO analysis_jobs (fingerprint, status, payload, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (fingerprint, JOB_QUEUED, json.dumps(payload), now, now))
+            conn.commit()
+            return cursor.lastrowid
+        except Exception as e:
+            print(f"Error submitting analysis job: {e}")
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def get(self, job_id):
+        """Return a job as a dict (payload, progress and result decoded), or None"""
+        conn = get_database_connection()
+        try:
+            row = conn.execute('''
+                SELECT id, status, progress, result, error, worker, attempts,
+                       created_at, started_at, updated_at, finished_at
+                FROM analysis_jobs WHERE id = ?
+            ''', (job_id,)).fetchone()
+            if row is None:
+                return None
+            ahead = 0
+            if row[1] == JOB_QUEUED:
+                ahead = conn.execute('SELECT COUNT(*) FROM analysis_jobs WHERE status = ? AND id < ?',
+                                     (JOB_QUEUED, job_id)).fetchone()[0]
+            return {
+                'id': row[0],
+                'status': row[1],
+                'progress': _decode(row[2], {'sections': [], 'scores': {}}),
+                'result': _decode(row[3]),
+                'error': row[4],
+                'worker': row[5],
+                'attempts': row[6],
+                'created_at': row[7],
+                'started_at': row[8],
+                'updated_at': row[9],
+                'finished_at': row[10],
+                'queue_position': ahead
+            }
+        finally:
+            conn.close()
+
+    def claim(self, worker):
+        """Atomically take the oldest queued job; returns (job_id, payload) or None"""
+        conn = get_database_connection()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            now = time.time()
+            self._requeue_stale(conn, now)
+            row = conn.execute('SELECT id, payload FROM analysis_jobs WHERE status = ? ORDER BY id LIMIT 1',
+                               (JOB_QUEUED,)).fetchone()
+            if row is None:
+                conn.commit()
+                return None
+            conn.execute('''
+                UPDATE analysis_jobs
+                SET status = ?, worker = ?, attempts = attempts + 1, started_at = ?, updated_at = ?
+                WHERE id = ?
+            ''', (JOB_RUNNING, worker, now, now, row[0]))
+            conn.commit()
+            return row[0], json.loads(row[1])
+        except Exception as e:
+            print(f"Error claiming analysis job: {e}")
+            conn.rollback()
+            return None
+        finally:
+            conn.close()
+
+    def _requeue_stale(self, conn, now):
+        cutoff = now - self.stale_after
+        conn.execute('''
+            UPDATE analysis_jobs SET status = ?, error = 'Worker stopped responding', finished_at = ?, updated_at = ?
+            WHERE status = ? AND updated_at < ? AND attempts >= ?
+        ''', (JOB_FAILED, now, now, JOB_RUNNING, cutoff, self.max_attempts))
+        conn.execute('''
+            UPDATE analysis_jobs SET status = ?, worker = NULL, progress = NULL, updated_at = ?
+            WHERE status = ? AND updated_at < ?
+        ''', (JOB_QUEUED, now, JOB_RUNNING, cutoff))
+
+    def report_progress(self, job_id, worker, progress):
+        """Store the sections and scores received so far; False if the worker no longer owns the job"""
+        return self._update(job_id, worker, 'progress = ?', (json.dumps(progress),))
+
+    def finish(self, job_id, worker, result):
+        return self._update(job_id, worker, 'status = ?, result = ?, finished_at = ?',
+                            (JOB_DONE, json.dumps(result), time.time()))
+
+    def fail(self, job_id, worker, error):
+        return self._update(job_id, worker, 'status = ?, error = ?, finished_at = ?',
+                            (JOB_FAILED, str(error), time.time()))
+
+    def _update(self, job_id, worker, assignments, params):
+        """Update a running job claimed by worker; returns whether it still was"""
+        conn = get_database_connection()
+        try:
+            cursor = conn.execute(f'''
+                UPDATE analysis_jobs SET {assignments}, updated_at = ?
+                WHERE id = ? AND status = ? AND worker = ?
+            ''', params + (time.time(), job_id, JOB_RUNNING, worker))
+            conn.commit()
+            return cursor.rowcount > 0
+        except Exception as e:
+            print(f"Error updating analysis job {job_id}: {e}")
+            conn.rollback()
+            return False
+        finally:
+            conn.close()
+
+    def stats(self):
+        """Return the number of jobs in each status"""
+        conn = get_database_connection()
+        try:
+            return dict(conn.execute('SELECT status, COUNT(*) FROM analysis_jobs GROUP BY status').fetchall())
+        finally:
+            conn.close()
+
+    def request_stats(self):
+        """Return the coalesced submissions, upstream calls (claims) and jobs still queued or running"""
+        conn = get_database_connection()
+        try:
+            coalesced, upstream_calls, in_flight = conn.execute('''
+                SELECT COALESCE(SUM(coalesced), 0), COALESCE(SUM(attempts), 0),
+                       COALESCE(SUM(status IN (?, ?)), 0)
+                FROM analysis_jobs
+            ''', (JOB_QUEUED, JOB_RUNNING)).fetchone()
+            return {'coalesced': coalesced, 'upstream_calls': upstream_calls, 'in_flight': in_flight}
+        finally:
+            conn.close()
+
+
+def run_job(queue, analyzer, worker, job_id, payload):
+    """Run one analysis job, streaming its sections into the job row.
+
+    Stops early if the job was taken away from this worker (requeued as stale).
+    """
+    progress = {'sections': [], 'scores': {}}
+    try:
+        for event in analyzer.stream_resume_analysis_with_gemini(
+                payload['resume_text'],
+                job_description=payload.get('job_description'),
+                job_role=payload.get('job_role')):
+            if event['type'] == 'section':
+                progress['sections'].append({'title': event['title'], 'content': event['content']})
+                if not queue.report_progress(job_id, worker, progress):
+                    return
+            elif event['type'] == 'score':
+                progress['scores'][event['name']] = event['value']
+                if not queue.report_progress(job_id, worker, progress):
+                    return
+            elif event['type'] == 'done':
+                if queue.finish(job_id, worker, event['result']):
+                    remember_analysis(payload, event['result'])
+                return
+            elif event['type'] == 'error':
+                queue.fail(job_id, worker, event['error'])
+                return
+        queue.fail(job_id, worker, "Analysis ended without a result")
+    except Exception as e:
+        queue.fail(job_id, worker, f"Analysis failed: {str(e)}")
+
+
+def worker_main(name, poll_interval=0.5):
+    """Worker process loop: claim queued jobs and run them until the process is stopped"""
+    # Imported here so the page process does not pay for it when only submitting jobs
+    from utils.ai_resume_analyzer import AIResumeAnalyzer
+
+    init_database()
+    queue = get_analysis_queue()
+    analyzer = AIResumeAnalyzer()
+    worker = f"{socket.gethostname()}:{os.getpid()}:{name}"
+    while True:
+        claimed = queue.claim(worker)
+        if claimed is None:
+            time.sleep(poll_interval)
+            continue
+        run_job(queue, analyzer, worker, *claimed)
+
+
+_analysis_queue = None
+_analysis_queue_lock = threading.Lock()
+_workers = []
+_workers_lock = threading.Lock()
+
+
+def get_analysis_queue():
+    """Return the process-wide analysis job queue.
+
+    ANALYSIS_JOB_STALE_SECONDS sets how long a silent running job keeps its claim.
+    """
+    global _analysis_queue
+    if _analysis_queue is None:
+        with _analysis_queue_lock:
+            if _analysis_queue is None:
+                _analysis_queue = AnalysisJobQueue(
+                    stale_after=float(os.getenv("ANALYSIS_JOB_STALE_SECONDS", "300"))
+                )
+    return _analysis_queue
+
+
+def ensure_workers(count=None):
+    """Start (or restart) this server's worker processes; a no-op once they are running"""
+    if count is None:
+        count = int(os.getenv("ANALYSIS_WORKERS", "2"))
+    if count <= 0:
+        return 0
+    with _workers_lock:
+        _workers[:] = [process for process in _workers if process.is_alive()]
+        context = multiprocessing.get_context("spawn")
+        while len(_workers) < count:
+            process = context.Process(target=worker_main, args=(f"worker-{len(_workers)}",),
+                                      name="analysis-worker", daemon=True)
+            process.start()
+            _workers.append(process)
+        return len(_workers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+
+    init_database()
+    ensure_workers(args.workers)
+    print(f"Running {args.workers} analysis worker(s); press Ctrl+C to stop")
+    try:
+        while True:
+            time.sleep(5)
+            ensure_workers(args.workers)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
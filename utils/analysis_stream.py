@@ -0,0 +1,57 @@
+class SectionStreamParser:
+    """Split streamed markdown into '## ' sections as soon as each one is complete.
+
+    Feed chunks as they arrive; a section is complete once the next '## '
+    header line has been seen (or the stream is closed). Text before the
+    first header is returned with a title of None.
+    """
+
+    def __init__(self):
+        self._buffer = ''
+        self._title = None
+        self._lines = []
+
+    def feed(self, chunk):
+        """Add a chunk and return the (title, content) sections it completed"""
+        self._buffer += chunk
+        *lines, self._buffer = self._buffer.split('\n')
+        completed = []
+        for line in lines:
+            section = self._add_line(line)
+            if section:
+                completed.append(section)
+        return completed
+
+    def close(self):
+        """Flush the trailing partial line and return the remaining sections"""
+        completed = []
+        if self._buffer:
+            section = self._add_line(self._buffer)
+            self._buffer = ''
+            if section:
+                completed.append(section)
+        section = self._take_section()
+        if section:
+            completed.append(section)
+        return completed
+
+    def _add_line(self, line):
+        if line.lstrip().startswith('## '):
+            section = self._take_section()
+            self._title = line.lstrip()[3:].strip()
+            return section
+        self._lines.append(line)
+        return None
+
+    def _take_section(self):
+        title, content = self._title, '\n'.join(self._lines).strip()
+        self._lines = []
+        if title is None and not content:
+            return None
+        return title, content
+
+
+def split_sections(text):
+    """Split a complete markdown response into (title, content) sections"""
+    parser = SectionStreamParser()
+    return parser.feed(text) + parser.close()
@@ -0,0 +1,411 @@
+"""
+Headless batch ATS scoring over a directory or zip archive of resumes.
+
+Usage:
+    python -m utils.batch_scoring resumes.zip --role "Data Scientist" --role "Backend Developer" \
+        --jsonl scores.jsonl --csv scores.csv --checkpoint scores.ckpt
+
+Resumes are extracted and scored on a process pool. Every --batch-size
+resumes the results are written to JSONL/CSV and bulk-inserted into
+resume_data/resume_analysis, then the batch's sources and the output sizes
+are appended to the checkpoint file. Re-running with the same checkpoint
+skips everything that was already committed and cuts the outputs back to
+their checkpointed size, so an interrupted run picks up where it stopped
+without duplicate rows. Each document is stored once, keyed on its content
+hash, with one analysis per role; documents that are not resumes are
+written to the outputs but not to the database.
+"""
+
+import argparse
+import contextlib
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from config.database import init_database, save_resume_analyses_bulk
+from config.job_roles import get_role_info
+from utils.document_ingestion import get_document_ingestor
+from utils.resume_analyzer import ResumeAnalyzer
+
+RESUME_EXTENSIONS = ('.pdf', '.docx')
+
+CSV_FIELDS = [
+    'source', 'content_hash', 'role', 'category', 'document_type', 'ats_score',
+    'keyword_match_score', 'format_score', 'section_score', 'name', 'email',
+    'phone', 'found_skills', 'missing_skills', 'error'
+]
+
+
+def resolve_roles(role_names, category=None):
+    """Return [(category, role, role_info)] for role names from config.job_roles"""
+    roles = []
+    for role_name in role_names:
+        role_category, role, role_info = get_role_info(role_name, category)
+        if role_info is None:
+            raise ValueError(f"Unknown job role: {role_name}")
+        roles.append((role_category, role, role_info))
+    return roles
+
+
+def iter_resume_sources(source):
+    """Yield (source_id, path, member) for every PDF/DOCX in a directory or zip archive.
+
+    member is the archive member name for zip sources and None for files.
+    Sources are yielded in a stable order so checkpoints stay meaningful.
+    """
+    if os.path.isdir(source):
+        for root, dirs, files in os.walk(source):
+            dirs.sort()
+            for filename in sorted(files):
+                if filename.lower().endswith(RESUME_EXTENSIONS):
+                    path = os.path.join(root, filename)
+                    yield os.path.relpath(path, source), path, None
+    elif zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as archive:
+            members = sorted(
+                name for name in archive.namelist()
+                if name.lower().endswith(RESUME_EXTENSIONS) and not name.endswith('/')
+            )
+        for member in members:
+            yield member, source, member
+    else:
+        raise ValueError(f"Not a directory or zip archive: {source}")
+
+
+def _result_row(source, content_hash, category, role, analysis=None, error=''):
+    """Flatten one resume/role analysis into an output row"""
+    analysis = analysis or {}
+    keyword_match = analysis.get('keyword_match', {})
+    return {
+        'source': source,
+        'content_hash': content_hash,
+        'role': role,
+        'category': category,
+        'document_type': analysis.get('document_type', 'unknown'),
+        'ats_score': analysis.get('ats_score', 0),
+        'keyword_match_score': keyword_match.get('score', 0),
+        'format_score': analysis.get('format_score', 0),
+        'section_score': analysis.get('section_score', 0),
+        'name': analysis.get('name', ''),
+        'email': analysis.get('email', ''),
+        'phone': analysis.get('phone', ''),
+        'found_skills': keyword_match.get('found_skills', []),
+        'missing_skills': keyword_match.get('missing_skills', []),
+        'suggestions': analysis.get('suggestions', []),
+        'error': error or analysis.get('error', '')
+    }
+
+
+def _db_resume(content_hash, category, role, analysis):
+    """Build the resume_data dict saved by the analyzer page"""
+    return {
+        'content_hash': content_hash,
+        'personal_info': {
+            'full_name': analysis.get('name', ''),
+            'email': analysis.get('email', ''),
+            'phone': analysis.get('phone', ''),
+            'linkedin': analysis.get('linkedin', ''),
+            'github': analysis.get('github', ''),
+            'portfolio': analysis.get('portfolio', '')
+        },
+        'summary': analysis.get('summary', ''),
+        'target_role': role,
+        'target_category': category,
+        'education': analysis.get('education', []),
+        'experience': analysis.get('experience', []),
+        'projects': analysis.get('projects', []),
+        'skills': analysis.get('skills', []),
+        'template': ''
+    }
+
+
+def _db_analysis(row):
+    """Build the analysis dict saved by the analyzer page"""
+    return {
+        'ats_score': row['ats_score'],
+        'keyword_match_score': row['keyword_match_score'],
+        'format_score': row['format_score'],
+        'section_score': row['section_score'],
+        'missing_skills': ','.join(row['missing_skills']),
+        'recommendations': ','.join(row['suggestions'])
+    }
+
+
+def score_resume(data, roles, source='', file_type=None, analyzer=None, ingestor=None, allow_ocr=True):
+    """Extract a resume once and score it against every role.
+
+    roles is the output of resolve_roles(). Returns (rows, records): one
+    output row per role, and at most one (resume_data, analyses) record to
+    save: the resume, targeting the first role scored successfully, with an
+    analysis for every such role. Documents that are not resumes get no record.
+    """
+    analyzer = analyzer or ResumeAnalyzer()
+    ingestor = ingestor or get_document_ingestor()
+
+    document = ingestor.ingest(data, file_type=file_type, allow_ocr=allow_ocr)
+    if document.is_empty:
+        error = '; '.join(f"{backend}: {e}" for backend, e in document.errors.items()) or "No text extracted"
+        rows = [_result_row(source, document.content_hash, category, role, error=error)
+                for category, role, _ in roles]
+        return rows, []
+
+    # The analyzer memoises the segmentation, so every role reuses one pass
+    text = document.text
+    rows = []
+    resume_data = None
+    analyses = []
+    for category, role, role_info in roles:
+        analysis = analyzer.analyze_resume({'raw_text': text}, role_info)
+        row = _result_row(source, document.content_hash, category, role, analysis)
+        rows.append(row)
+        if row['error'] or row['document_type'] != 'resume':
+            continue
+        if resume_data is None:
+            resume_data = _db_resume(document.content_hash, category, role, analysis)
+        analyses.append(_db_analysis(row))
+    return rows, [(resume_data, analyses)] if resume_data else []
+
+
+_worker_state = {}
+
+
+def _init_worker(roles, allow_ocr):
+    # Documents already run in parallel, so keep OCR to one page at a time per worker
+    os.environ.setdefault("OCR_WORKERS", "1")
+    _worker_state['roles'] = roles
+    _worker_state['allow_ocr'] = allow_ocr
+    _worker_state['analyzer'] = ResumeAnalyzer()
+    _worker_state['archives'] = {}
+
+
+def _read_source(path, member):
+    if member is None:
+        with open(path, 'rb') as f:
+            return f.read()
+    archives = _worker_state.setdefault('archives', {})
+    if path not in archives:
+        archives[path] = zipfile.ZipFile(path)
+    return archives[path].read(member)
+
+
+def _score_task(task):
+    """Score one source inside a pool worker; never raises for bad documents"""
+    source_id, path, member = task
+    roles = _worker_state['roles']
+    try:
+        data = _read_source(path, member)
+        file_type = 'pdf' if source_id.lower().endswith('.pdf') else 'docx'
+        rows, records = score_resume(data, roles, source=source_id, file_type=file_type,
+                                     analyzer=_worker_state['analyzer'],
+                                     allow_ocr=_worker_state['allow_ocr'])
+    except Exception as e:
+        rows = [_result_row(source_id, '', category, role, error=str(e)) for category, role, _ in roles]
+        records = []
+    return source_id, rows, records
+
+
+class BatchScorer:
+    """Score a directory or zip of resumes against job roles on a process pool"""
+
+    def __init__(self, roles, workers=None, jsonl_path=None, csv_path=None, checkpoint_path=None,
+                 save_to_db=True, batch_size=50, allow_ocr=True):
+        self.roles = resolve_roles(roles) if roles and isinstance(roles[0], str) else roles
+        self.workers = workers or os.cpu_count() or 1
+        self.jsonl_path = jsonl_path
+        self.csv_path = csv_path
+        self.checkpoint_path = checkpoint_path
+        self.save_to_db = save_to_db
+        self.batch_size = batch_size
+        self.allow_ocr = allow_ocr
+
+    def load_checkpoint(self):
+        """Return (sources already committed by a previous run, output sizes after its last batch).
+
+        Each line is one committed batch: {"sources": [...], "outputs": {"jsonl": bytes, "csv": bytes}}.
+        A bare JSON string is a source from an older checkpoint without output sizes.
+        """
+        done = set()
+        sizes = {}
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return done, sizes
+        with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A torn last line from a crash; that batch will be redone
+                    continue
+                if isinstance(entry, str):
+                    done.add(entry)
+                else:
+                    done.update(entry['sources'])
+                    sizes = entry['outputs']
+        return done, sizes
+
+    def run(self, source, progress=print):
+        """Score every resume under source and return a summary dict"""
+        if self.save_to_db:
+            init_database()
+
+        done, sizes = self.load_checkpoint()
+        self._truncate_outputs(sizes)
+        summary = {'scored': 0, 'failed': 0, 'skipped': 0, 'rows': 0}
+        tasks = []
+        for task in iter_resume_sources(source):
+            if task[0] in done:
+                summary['skipped'] += 1
+            else:
+                tasks.append(task)
+
+        with contextlib.ExitStack() as stack:
+            outputs = self._open_outputs(stack)
+            if any(key in outputs and key not in sizes for key in ('jsonl', 'csv')):
+                # Record the starting sizes, so a crash during the first batch is cut back too
+                self._write_checkpoint(outputs, [])
+            executor = stack.enter_context(ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.roles, self.allow_ocr)
+            ))
+
+            # Bound the number of in-flight documents so memory stays flat
+            max_pending = self.workers * 4
+            pending = set()
+            batch = []
+            for task in tasks:
+                pending.add(executor.submit(_score_task, task))
+                if len(pending) >= max_pending:
+                    finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    batch.extend(future.result() for future in finished)
+                    if len(batch) >= self.batch_size:
+                        self._commit(batch, outputs, summary, progress)
+                        batch = []
+
+            for future in pending:
+                batch.append(future.result())
+            if batch:
+                self._commit(batch, outputs, summary, progress)
+
+        return summary
+
+    def _truncate_outputs(self, sizes):
+        """Drop output rows written after the last checkpointed batch; that batch is redone"""
+        for key, path in (('jsonl', self.jsonl_path), ('csv', self.csv_path)):
+            if path and key in sizes and os.path.exists(path) and os.path.getsize(path) > sizes[key]:
+                with open(path, 'r+b') as f:
+                    f.truncate(sizes[key])
+
+    def _open_outputs(self, stack):
+        outputs = {}
+        if self.jsonl_path:
+            outputs['jsonl'] = stack.enter_context(open(self.jsonl_path, 'a', encoding='utf-8'))
+        if self.csv_path:
+            write_header = not os.path.exists(self.csv_path) or os.path.getsize(self.csv_path) == 0
+            csv_file = stack.enter_context(open(self.csv_path, 'a', encoding='utf-8', newline=''))
+            outputs['csv'] = csv.DictWriter(csv_file, fieldnames=CSV_FIELDS, extrasaction='ignore')
+            outputs['csv_file'] = csv_file
+            if write_header:
+                outputs['csv'].writeheader()
+        if self.checkpoint_path:
+            outputs['checkpoint'] = stack.enter_context(open(self.checkpoint_path, 'a', encoding='utf-8'))
+        return outputs
+
+    def _sync_outputs(self, outputs):
+        for handle in ('jsonl', 'csv_file'):
+            if handle in outputs:
+                outputs[handle].flush()
+                os.fsync(outputs[handle].fileno())
+
+    def _write_checkpoint(self, outputs, sources):
+        """Append a committed batch's sources and the synced output sizes to the checkpoint"""
+        if 'checkpoint' not in outputs:
+            return
+        self._sync_outputs(outputs)
+        sizes = {key: os.fstat(outputs[handle].fileno()).st_size
+                 for key, handle in (('jsonl', 'jsonl'), ('csv', 'csv_file')) if handle in outputs}
+        checkpoint = outputs['checkpoint']
+        checkpoint.write(json.dumps({'sources': sources, 'outputs': sizes}) + '\n')
+        checkpoint.flush()
+        os.fsync(checkpoint.fileno())
+
+    def _commit(self, batch, outputs, summary, progress):
+        """Write a batch to the outputs and the database, then checkpoint it.
+
+        The outputs are synced before the checkpoint records their sizes, and
+        the database insert skips resumes it already holds, so a crash at any
+        point leaves a batch that the next run can redo without duplicates.
+        """
+        rows = [row for _, source_rows, _ in batch for row in source_rows]
+        records = [record for _, _, source_records in batch for record in source_records]
+
+        if 'jsonl' in outputs:
+            for row in rows:
+                outputs['jsonl'].write(json.dumps(row) + '\n')
+        if 'csv' in outputs:
+            for row in rows:
+                outputs['csv'].writerow({
+                    **row,
+                    'found_skills': ','.join(row['found_skills']),
+                    'missing_skills': ','.join(row['missing_skills'])
+                })
+        self._sync_outputs(outputs)
+
+        if self.save_to_db and records:
+            if save_resume_analyses_bulk(records) is None:
+                # Stop before checkpointing so the batch is retried on the next run
+                raise RuntimeError("Failed to save batch to database")
+
+        self._write_checkpoint(outputs, [source_id for source_id, _, _ in batch])
+
+        summary['scored'] += len(batch)
+        summary['failed'] += sum(1 for _, source_rows, _ in batch if any(row['error'] for row in source_rows))
+        summary['rows'] += len(rows)
+        if progress:
+            progress(f"Scored {summary['scored']} resumes ({summary['failed']} failed, {summary['skipped']} skipped)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", help="Directory or zip archive of PDF/DOCX resumes")
+    parser.add_argument("--role", action="append", required=True, help="Job role from config/job_roles.py (repeatable)")
+    parser.add_argument("--category", help="Only look up roles in this category")
+    parser.add_argument("--jsonl", help="Append results to this JSONL file")
+    parser.add_argument("--csv", help="Append results to this CSV file")
+    parser.add_argument("--checkpoint", help="Checkpoint file used to resume an interrupted run")
+    parser.add_argument("--workers", type=int, default=0, help="Worker processes (default: CPU count)")
+    parser.add_argument("--batch-size", type=int, default=50, help="Resumes per database transaction")
+    parser.add_argument("--no-db", action="store_true", help="Do not save results to the database")
+    parser.add_argument("--no-ocr", action="store_true", help="Skip OCR for scanned PDFs")
+    args = parser.parse_args(argv)
+
+    try:
+        roles = resolve_roles(args.role, args.category)
+    except ValueError as e:
+        parser.error(str(e))
+
+    scorer = BatchScorer(
+        roles,
+        workers=args.workers or None,
+        jsonl_path=args.jsonl,
+        csv_path=args.csv,
+        checkpoint_path=args.checkpoint,
+        save_to_db=not args.no_db,
+        batch_size=args.batch_size,
+        allow_ocr=not args.no_ocr
+    )
+    summary = scorer.run(args.source)
+    print(f"Done: {summary['scored']} scored, {summary['failed']} failed, "
+          f"{summary['skipped']} skipped from checkpoint, {summary['rows']} rows written")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
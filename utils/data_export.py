@@ -0,0 +1,155 @@
+"""
+Streaming export of resume data (resume_data joined with resume_analysis).
+
+Rows are read with fetchmany() off a single cursor and written chunk by
+chunk, so memory stays bounded by chunk_size whatever the table size:
+- csv: csv.writer on a text stream
+- parquet: one row group per chunk (needs pyarrow)
+- xlsx: openpyxl write-only workbook, rows streamed to a temporary XML file
+
+Usage:
+    python -m utils.data_export resume_export.xlsx
+    python -m utils.data_export resume_export.parquet --chunk-size 20000
+"""
+
+import argparse
+import csv
+import io
+import os
+
+from config.database import get_database_connection, init_database
+
+EXPORT_COLUMNS = [
+    'name', 'email', 'phone', 'linkedin', 'github', 'portfolio',
+    'summary', 'target_role', 'target_category',
+    'education', 'experience', 'projects', 'skills',
+    'ats_score', 'keyword_match_score', 'format_score', 'section_score',
+    'missing_skills', 'recommendations',
+    'created_at'
+]
+
+EXPORT_QUERY = """
+    SELECT
+        rd.name, rd.email, rd.phone, rd.linkedin, rd.github, rd.portfolio,
+        rd.summary, rd.target_role, rd.target_category,
+        rd.education, rd.experience, rd.projects, rd.skills,
+        ra.ats_score, ra.keyword_match_score, ra.format_score, ra.section_score,
+        ra.missing_skills, ra.recommendations,
+        rd.created_at
+    FROM resume_data rd
+    LEFT JOIN resume_analysis ra ON rd.id = ra.resume_id
+    ORDER BY rd.id
+"""
+
+DEFAULT_CHUNK_SIZE = 5000
+
+
+def iter_export_chunks(chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield lists of up to chunk_size export rows (tuples in EXPORT_COLUMNS order)"""
+    conn = get_database_connection()
+    try:
+        cursor = conn.execute(EXPORT_QUERY)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield rows
+    finally:
+        conn.close()
+
+
+def write_csv(chunks, fileobj):
+    """Write chunks as CSV to a binary file object; returns the row count"""
+    text = io.TextIOWrapper(fileobj, encoding='utf-8', newline='', write_through=True)
+    try:
+        writer = csv.writer(text)
+        writer.writerow(EXPORT_COLUMNS)
+        count = 0
+        for rows in chunks:
+            writer.writerows(rows)
+            count += len(rows)
+        return count
+    finally:
+        # Leave the caller's file open
+        text.detach()
+
+
+def _parquet_schema(pa):
+    numeric = {'ats_score', 'keyword_match_score', 'format_score', 'section_score'}
+    return pa.schema([(column, pa.float64() if column in numeric else pa.string())
+                      for column in EXPORT_COLUMNS])
+
+
+def write_parquet(chunks, fileobj):
+    """Write chunks to Parquet, one row group per chunk; returns the row count"""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Parquet export needs pyarrow: pip install pyarrow") from e
+
+    schema = _parquet_schema(pa)
+    count = 0
+    with pq.ParquetWriter(fileobj, schema) as writer:
+        for rows in chunks:
+            columns = list(zip(*rows))
+            arrays = [pa.array([None if value is None else str(value) for value in values], pa.string())
+                      if field.type == pa.string() else pa.array(values, field.type)
+                      for field, values in zip(schema, columns)]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            count += len(rows)
+    return count
+
+
+def write_xlsx(chunks, fileobj):
+    """Write chunks to a single-sheet workbook in openpyxl write-only mode; returns the row count"""
+    try:
+        from openpyxl import Workbook
+        from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+    except ImportError as e:
+        raise ImportError("Excel export needs openpyxl: pip install openpyxl") from e
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Resume Data')
+    sheet.append(EXPORT_COLUMNS)
+    count = 0
+    for rows in chunks:
+        for row in rows:
+            # Text extracted from PDFs can carry control characters that XLSX cannot store
+            sheet.append([ILLEGAL_CHARACTERS_RE.sub('', value) if isinstance(value, str) else value
+                          for value in row])
+        count += len(rows)
+    workbook.save(fileobj)
+    return count
+
+
+WRITERS = {
+    'csv': write_csv,
+    'parquet': write_parquet,
+    'xlsx': write_xlsx,
+}
+
+
+def export_resume_data(fileobj, fmt='xlsx', chunk_size=DEFAULT_CHUNK_SIZE):
+    """Stream the resume export to a binary file object in csv, parquet or xlsx; returns the row count"""
+    if fmt not in WRITERS:
+        raise ValueError(f"Unsupported export format: {fmt} (choose from {', '.join(WRITERS)})")
+    return WRITERS[fmt](iter_export_chunks(chunk_size), fileobj)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("output", help="Output file; the format is taken from its extension")
+    parser.add_argument("--format", choices=sorted(WRITERS), help="Override the format")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    fmt = args.format or os.path.splitext(args.output)[1].lstrip('.').lower()
+    init_database()
+    with open(args.output, 'wb') as output:
+        count = export_resume_data(output, fmt, args.chunk_size)
+    print(f"Exported {count} rows to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,11 @@
-from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, func
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import create_engine, event, insert, Column, Integer, String, Text, DateTime, func
+from sqlalchemy.orm import declarative_base, scoped_session, sessionmaker
+from sqlalchemy.pool import QueuePool
+from contextlib import contextmanager
 import datetime
 import json
+import os
+import threading
 
 # Create the base class for declarative models
 Base = declarative_base()
@@ -37,58 +40,178 @@ class AIAnalysis(Base):
     job_role = Column(String(100))
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
 
+_engines = {}
+_session_factories = {}
+_schema_ready = set()
+_engines_lock = threading.Lock()
+
+
+def _default_db_path():
+    return os.getenv('DB_PATH', 'resume_data.db')
+
+
+def _configure_sqlite(dbapi_connection, connection_record):
+    # Same settings as config.database's pool: WAL for concurrent readers, NORMAL sync, wait on locks
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.execute('PRAGMA busy_timeout=5000')
+    cursor.close()
+
+
+def get_engine(db_path=None):
+    """Return the process-wide engine for a database path, creating the tables on first use"""
+    db_path = db_path or _default_db_path()
+    engine = _engines.get(db_path)
+    if engine is None:
+        with _engines_lock:
+            engine = _engines.get(db_path)
+            if engine is None:
+                engine = create_engine(
+                    f'sqlite:///{db_path}',
+                    poolclass=QueuePool,
+                    pool_size=int(os.getenv('DB_POOL_SIZE', '8')),
+                    max_overflow=8,
+                    connect_args={'timeout': 5, 'check_same_thread': False}
+                )
+                event.listen(engine, 'connect', _configure_sqlite)
+                _engines[db_path] = engine
+    if db_path not in _schema_ready:
+        with _engines_lock:
+            if db_path not in _schema_ready:
+                Base.metadata.create_all(engine)
+                _schema_ready.add(db_path)
+    return engine
+
+
+def get_session_factory(db_path=None):
+    """Return the thread-local scoped_session registry for a database path"""
+    db_path = db_path or _default_db_path()
+    factory = _session_factories.get(db_path)
+    if factory is None:
+        engine = get_engine(db_path)
+        with _engines_lock:
+            factory = _session_factories.get(db_path)
+            if factory is None:
+                # expire_on_commit=False keeps returned objects readable after the session closes
+                factory = _session_factories[db_path] = scoped_session(
+                    sessionmaker(bind=engine, expire_on_commit=False)
+                )
+    return factory
+
+
+@contextmanager
+def session_scope(db_path=None):
+    """Unit of work: commit when the outermost scope exits, roll back on error.
+
+    Nested scopes in the same thread share the outer session and transaction,
+    so a batch can wrap many save_* calls in a single commit.
+    """
+    factory = get_session_factory(db_path)
+    session = factory()
+    depth = session.info.get('unit_of_work_depth', 0)
+    session.info['unit_of_work_depth'] = depth + 1
+    try:
+        yield session
+        if depth == 0:
+            session.commit()
+    except Exception:
+        if depth == 0:
+            session.rollback()
+        raise
+    finally:
+        session.info['unit_of_work_depth'] = depth
+        if depth == 0:
+            factory.remove()
+
+
 class DatabaseManager:
-    def __init__(self, db_path='resume_data.db'):
-        self.engine = create_engine(f'sqlite:///{db_path}')
-        Base.metadata.create_all(self.engine)
-        Session = sessionmaker(bind=self.engine)
-        self.session = Session()
+    def __init__(self, db_path=None):
+        self.db_path = db_path or _default_db_path()
+        self.engine = get_engine(self.db_path)
+        self.Session = get_session_factory(self.db_path)
+
+    @property
+    def session(self):
+        """The current thread's session"""
+        return self.Session()
+
+    def unit_of_work(self):
+        """Group several saves into one transaction: with manager.unit_of_work(): ..."""
+        return session_scope(self.db_path)
     
     def save_resume(self, user_id, job_role, content):
-        resume = Resume(
-            user_id=user_id,
-            job_role=job_role,
-            content=content
-        )
-        self.session.add(resume)
-        self.session.commit()
-        return resume.id
+        with self.unit_of_work() as session:
+            resume = Resume(
+                user_id=user_id,
+                job_role=job_role,
+                content=content
+            )
+            session.add(resume)
+            session.flush()
+            return resume.id
     
     def get_resume(self, resume_id):
-        return self.session.query(Resume).filter(Resume.id == resume_id).first()
+        with self.unit_of_work() as session:
+            return session.query(Resume).filter(Resume.id == resume_id).first()
     
     def get_user_resumes(self, user_id):
-        return self.session.query(Resume).filter(Resume.user_id == user_id).all()
+        with self.unit_of_work() as session:
+            return session.query(Resume).filter(Resume.user_id == user_id).all()
     
     def save_analysis(self, resume_id, analysis_data):
-        analysis = Analysis(
-            resume_id=resume_id,
-            analysis_data=analysis_data
-        )
-        self.session.add(analysis)
-        self.session.commit()
-        return analysis.id
+        with self.unit_of_work() as session:
+            analysis = Analysis(
+                resume_id=resume_id,
+                analysis_data=analysis_data
+            )
+            session.add(analysis)
+            session.flush()
+            return analysis.id
     
     def get_analysis(self, analysis_id):
-        return self.session.query(Analysis).filter(Analysis.id == analysis_id).first()
+        with self.unit_of_work() as session:
+            return session.query(Analysis).filter(Analysis.id == analysis_id).first()
     
     def get_resume_analyses(self, resume_id):
-        return self.session.query(Analysis).filter(Analysis.resume_id == resume_id).all()
+        with self.unit_of_work() as session:
+            return session.query(Analysis).filter(Analysis.resume_id == resume_id).all()
+
+    def _bulk_insert(self, model, rows):
+        """INSERT many rows with one executemany in the current unit of work; returns the row count"""
+        rows = list(rows)
+        if not rows:
+            return 0
+        with self.unit_of_work() as session:
+            session.execute(insert(model), rows)
+        return len(rows)
+
+    def save_resumes_bulk(self, resumes):
+        """Save many resumes given as dicts with user_id, job_role and content"""
+        return self._bulk_insert(Resume, resumes)
+
+    def save_analyses_bulk(self, analyses):
+        """Save many analyses given as dicts with resume_id and analysis_data"""
+        return self._bulk_insert(Analysis, analyses)
+
+    def save_ai_analyses_bulk(self, analyses):
+        """Save many AI analyses given as dicts with resume_id, model_used, resume_score and job_role"""
+        return self._bulk_insert(AIAnalysis, analyses)
     
     def close(self):
-        self.session.close()
+        self.Session.remove()
 
 def get_database_connection():
-    """Get a connection to the database"""
-    engine = create_engine('sqlite:///resume_data.db')
-    Base.metadata.create_all(engine)
-    Session = sessionmaker(bind=engine)
-    return Session()
+    """Get a new session of its own (close() it when done).
+
+    It is not the thread's scoped session, so closing it never discards an
+    enclosing unit_of_work.
+    """
+    return get_session_factory().session_factory()
 
 def save_resume_data(resume_data):
     """Save resume data to the database"""
-    session = get_database_connection()
-    try:
+    with session_scope() as session:
         # Convert resume_data to JSON string
         resume_json = json.dumps(resume_data)
         
@@ -100,18 +223,12 @@ def save_resume_data(resume_data):
         )
         
         session.add(resume)
-        session.commit()
+        session.flush()
         return resume.id
-    except Exception as e:
-        session.rollback()
-        raise e
-    finally:
-        session.close()
 
 def save_ai_analysis_data(resume_id, analysis_data):
     """Save AI analysis data to the database"""
-    session = get_database_connection()
-    try:
+    with session_scope() as session:
         # Create a new AIAnalysis object
         ai_analysis = AIAnalysis(
             resume_id=resume_id,
@@ -121,48 +238,44 @@ def save_ai_analysis_data(resume_id, analysis_data):
         )
         
         session.add(ai_analysis)
-        session.commit()
+        session.flush()
         return ai_analysis.id
-    except Exception as e:
-        session.rollback()
-        raise e
-    finally:
-        session.close()
 
 def get_ai_analysis_statistics():
     """Get statistics about AI analyses"""
-    session = get_database_connection()
     try:
-        # Get total number of analyses
-        total_analyses = session.query(func.count(AIAnalysis.id)).scalar() or 0
-        
-        # Get average resume score
-        average_score = session.query(func.avg(AIAnalysis.resume_score)).scalar() or 0
-        
-        # Get model usage distribution
-        model_usage_query = session.query(
-            AIAnalysis.model_used, 
-            func.count(AIAnalysis.id)
-        ).group_by(AIAnalysis.model_used).all()
-        
-        model_usage = {model: count for model, count in model_usage_query}
-        
-        # Get job role distribution
-        job_roles_query = session.query(
-            AIAnalysis.job_role, 
-            func.count(AIAnalysis.id)
-        ).group_by(AIAnalysis.job_role).all()
-        
-        job_roles = {role: count for role, count in job_roles_query}
-        
-        return {
-            'total_analyses': total_analyses,
-            'average_score': float(average_score),
-            'model_usage': model_usage,
-            'job_roles': job_roles
-        }
+        with session_scope() as session:
+            return _ai_analysis_statistics(session)
     except Exception as e:
         print(f"Error getting AI analysis statistics: {e}")
         return None
-    finally:
-        session.close()
\ No newline at end of file
+
+def _ai_analysis_statistics(session):
+    # Get total number of analyses
+    total_analyses = session.query(func.count(AIAnalysis.id)).scalar() or 0
+    
+    # Get average resume score
+    average_score = session.query(func.avg(AIAnalysis.resume_score)).scalar() or 0
+    
+    # Get model usage distribution
+    model_usage_query = session.query(
+        AIAnalysis.model_used, 
+        func.count(AIAnalysis.id)
+    ).group_by(AIAnalysis.model_used).all()
+    
+    model_usage = {model: count for model, count in model_usage_query}
+    
+    # Get job role distribution
+    job_roles_query = session.query(
+        AIAnalysis.job_role, 
+        func.count(AIAnalysis.id)
+    ).group_by(AIAnalysis.job_role).all()
+    
+    job_roles = {role: count for role, count in job_roles_query}
+    
+    return {
+        'total_analyses': total_analyses,
+        'average_score': float(average_score),
+        'model_usage': model_usage,
+        'job_roles': job_roles
+    }
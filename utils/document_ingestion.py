@@ -0,0 +1,242 @@
+import io
+import os
+import time
+import tempfile
+import threading
+import warnings
+from contextlib import contextmanager
+from dataclasses import dataclass, field, asdict
+
+from utils.ocr_pipeline import ParallelOCR
+from utils.text_cache import get_text_cache, read_file_bytes
+
+PDF_MIME = "application/pdf"
+DOCX_MIME = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+
+def _as_stream(data):
+    """Wrap bytes/memoryview in a seekable in-memory stream"""
+    if isinstance(data, io.BytesIO):
+        data.seek(0)
+        return data
+    return io.BytesIO(data)
+
+
+def extract_pdf_pages_pdfplumber(data):
+    """Extract per-page text from PDF bytes with pdfplumber, without touching disk"""
+    import pdfplumber
+
+    pages = []
+    with pdfplumber.open(_as_stream(data)) as pdf:
+        for page in pdf.pages:
+            try:
+                # Suppress specific warnings about PDFColorSpace conversion
+                with warnings.catch_warnings():
+                    warnings.filterwarnings("ignore", message=".*PDFColorSpace.*")
+                    warnings.filterwarnings("ignore", message=".*Cannot convert.*")
+                    pages.append(page.extract_text() or "")
+            except Exception as e:
+                if "PDFColorSpace" not in str(e) and "Cannot convert" not in str(e):
+                    print(f"Error extracting text from page with pdfplumber: {e}")
+                pages.append("")
+    return pages
+
+
+def extract_pdf_pages_pypdf(data):
+    """Extract per-page text from PDF bytes with pypdf, without touching disk"""
+    import pypdf
+
+    reader = pypdf.PdfReader(_as_stream(data))
+    return [page.extract_text() or "" for page in reader.pages]
+
+
+def extract_docx_text(data):
+    """Extract paragraph text from DOCX bytes, without touching disk"""
+    from docx import Document
+
+    doc = Document(_as_stream(data))
+    return "\n".join(paragraph.text for paragraph in doc.paragraphs)
+
+
+@contextmanager
+def spooled_pdf_path(data):
+    """Write PDF bytes to a private temp directory for tools that need a path.
+
+    Only Poppler (used by OCR) needs a real file. The directory is removed
+    when the block exits, including when it exits with an exception.
+    """
+    with tempfile.TemporaryDirectory(prefix="resume_ocr_") as temp_dir:
+        path = os.path.join(temp_dir, "document.pdf")
+        with open(path, "wb") as f:
+            f.write(data)
+        yield path
+
+
+def iter_ocr_pages(data, ocr=None):
+    """Yield (page_number, text) for PDF bytes using the parallel OCR pipeline"""
+    ocr = ocr or ParallelOCR()
+    with spooled_pdf_path(data) as pdf_path:
+        yield from ocr.iter_pages(pdf_path)
+
+
+@dataclass
+class ExtractedDocument:
+    """Structured result of ingesting one uploaded document"""
+    content_hash: str
+    file_type: str
+    backend: str
+    pages: list = field(default_factory=list)
+    timings: dict = field(default_factory=dict)
+    ocr_used: bool = False
+    errors: dict = field(default_factory=dict)
+    from_cache: bool = False
+
+    @property
+    def text(self):
+        # A form-feed line between pages lets compact_text drop headers repeated on the next page
+        return "\n\f\n".join(self.pages).strip()
+
+    @property
+    def is_empty(self):
+        return not self.text
+
+    def to_dict(self):
+        """Serialize for the text cache (keeps the cache's text/backend shape)"""
+        data = asdict(self)
+        data.pop('from_cache')
+        data['text'] = self.text
+        return data
+
+    @classmethod
+    def from_dict(cls, data, content_hash):
+        # Entries written before per-page data existed only carry text/backend
+        return cls(
+            content_hash=content_hash,
+            file_type=data.get('file_type', 'pdf'),
+            backend=data.get('backend', 'unknown'),
+            pages=data.get('pages') or [data.get('text', '')],
+            timings=data.get('timings', {}),
+            ocr_used=data.get('ocr_used', data.get('backend') == 'ocr'),
+            errors=data.get('errors', {}),
+            from_cache=True
+        )
+
+
+def detect_file_type(file, data):
+    """Return 'pdf', 'docx' or 'text' from the upload's MIME type, name or magic bytes"""
+    mime = getattr(file, 'type', None)
+    if mime == PDF_MIME:
+        return 'pdf'
+    if mime == DOCX_MIME:
+        return 'docx'
+    name = (getattr(file, 'name', '') or '').lower()
+    if name.endswith('.pdf'):
+        return 'pdf'
+    if name.endswith('.docx'):
+        return 'docx'
+    if data[:4] == b'%PDF':
+        return 'pdf'
+    if data[:2] == b'PK':
+        return 'docx'
+    return 'text'
+
+
+class DocumentIngestor:
+    """Single extraction engine shared by every analyzer.
+
+    PDFs go through a fast-path-first strategy: the cheapest backend runs
+    first and the next one is only tried when the text so far is empty, with
+    OCR as the last resort. Results are cached by content hash, so an upload
+    is parsed at most once no matter how many analyzers ask for it.
+    """
+
+    PDF_STRATEGY = ('pypdf', 'pdfplumber', 'ocr')
+
+    def __init__(self, strategy=PDF_STRATEGY, cache=None, ocr=None):
+        self.strategy = strategy
+        self.cache = cache or get_text_cache()
+        self.ocr = ocr
+
+    def ingest(self, file, file_type=None, allow_ocr=True, progress=None):
+        """Extract text from an upload, file-like object or bytes.
+
+        progress, if given, is called with a short status message whenever a
+        slow step (OCR) starts or advances.
+        """
+        data = read_file_bytes(file)
+        content_hash = self.cache.hash_bytes(data)
+        cached = self.cache.get(content_hash)
+        if cached:
+            return ExtractedDocument.from_dict(cached, content_hash)
+
+        file_type = file_type or detect_file_type(file, data)
+        if file_type == 'pdf':
+            document = self._ingest_pdf(data, content_hash, allow_ocr, progress)
+        elif file_type == 'docx':
+            document = self._run_single(content_hash, 'docx', 'docx',
+                                        lambda: [extract_docx_text(data)])
+        else:
+            document = self._run_single(content_hash, 'text', 'text',
+                                        lambda: [data.decode('utf-8', errors='ignore')])
+
+        if not document.is_empty:
+            self.cache.put_entry(content_hash, document.to_dict())
+        return document
+
+    def _run_single(self, content_hash, file_type, backend, extract):
+        document = ExtractedDocument(content_hash=content_hash, file_type=file_type, backend=backend)
+        start = time.perf_counter()
+        try:
+            document.pages = extract()
+        except Exception as e:
+            document.errors[backend] = str(e)
+        document.timings[backend] = time.perf_counter() - start
+        return document
+
+    def _ingest_pdf(self, data, content_hash, allow_ocr, progress):
+        document = ExtractedDocument(content_hash=content_hash, file_type='pdf', backend='none')
+        for backend in self.strategy:
+            if backend == 'ocr' and not allow_ocr:
+                break
+            start = time.perf_counter()
+            try:
+                if backend == 'pypdf':
+                    pages = extract_pdf_pages_pypdf(data)
+                elif backend == 'pdfplumber':
+                    pages = extract_pdf_pages_pdfplumber(data)
+                elif backend == 'ocr':
+                    document.ocr_used = True
+                    if progress:
+                        progress("Attempting OCR for image-based PDF. This may take a moment...")
+                    pages = []
+                    for page_number, page_text in iter_ocr_pages(data, self.ocr):
+                        if progress:
+                            progress(f"Processed page {page_number} with OCR...")
+                        pages.append(page_text)
+                else:
+                    raise ValueError(f"Unknown extraction backend: {backend}")
+            except Exception as e:
+                document.errors[backend] = str(e)
+                continue
+            finally:
+                document.timings[backend] = time.perf_counter() - start
+
+            if "".join(pages).strip():
+                document.pages = pages
+                document.backend = backend
+                break
+        return document
+
+
+_ingestor = None
+_ingestor_lock = threading.Lock()
+
+
+def get_document_ingestor():
+    """Return the process-wide document ingestor"""
+    global _ingestor
+    if _ingestor is None:
+        with _ingestor_lock:
+            if _ingestor is None:
+                _ingestor = DocumentIngestor()
+    return _ingestor
@@ -1,43 +1,65 @@
+import os
+
 import pandas as pd
 from datetime import datetime
 
+from utils.resume_store import ResumeSegmentStore
+
+RESUME_FIELDS = ['user_id', 'job_role', 'content', 'analysis_data', 'created_at']
+
+
 class ExcelManager:
-    def __init__(self):
-        self.excel_file = "resume_data.xlsx"
-    
+    """Saves resumes to an append-only segment store; Excel is an on-demand export"""
+
+    def __init__(self, store_dir="resume_store", excel_file="resume_data.xlsx"):
+        self.excel_file = excel_file
+        self.store = ResumeSegmentStore(store_dir)
+        self._import_legacy_workbook()
+
+    def _import_legacy_workbook(self):
+        """Move rows from a workbook written by the old read-modify-write manager into the store, once"""
+        if self.store.segment_names() or not os.path.exists(self.excel_file):
+            return
+        try:
+            for row in pd.read_excel(self.excel_file).to_dict('records'):
+                self.store.append({field: (None if pd.isna(row.get(field)) else row.get(field))
+                                   for field in RESUME_FIELDS})
+        except Exception as e:
+            print(f"Error importing {self.excel_file}: {str(e)}")
+
     def save_resume_data(self, user_id, job_role, content, analysis_data=None):
         try:
-            # Try to read existing Excel file
-            try:
-                df = pd.read_excel(self.excel_file)
-            except FileNotFoundError:
-                df = pd.DataFrame()
-            
-            # Create new data entry
-            new_data = {
+            # One appended line per save; nothing already stored is read or rewritten
+            self.store.append({
                 'user_id': user_id,
                 'job_role': job_role,
                 'content': content,
                 'analysis_data': str(analysis_data) if analysis_data else None,
                 'created_at': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            }
-            
-            # Append new data
-            df = pd.concat([df, pd.DataFrame([new_data])], ignore_index=True)
-            
-            # Save to Excel
-            df.to_excel(self.excel_file, index=False)
+            })
             return True
         except Exception as e:
-            print(f"Error saving to Excel: {str(e)}")
+            print(f"Error saving resume data: {str(e)}")
             return False
-    
+
     def get_all_resumes(self):
-        try:
-            return pd.read_excel(self.excel_file)
-        except FileNotFoundError:
-            return pd.DataFrame()
-    
+        return pd.DataFrame(self.store.records(), columns=RESUME_FIELDS)
+
     def get_user_resumes(self, user_id):
-        df = self.get_all_resumes()
-        return df[df['user_id'] == user_id]
\ No newline at end of file
+        return pd.DataFrame(self.store.get(user_id), columns=RESUME_FIELDS)
+
+    def export_to_excel(self, excel_file=None):
+        """Write every stored resume to an Excel workbook and return its path"""
+        from openpyxl import Workbook
+        from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+
+        excel_file = excel_file or self.excel_file
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet('Resumes')
+        sheet.append(RESUME_FIELDS)
+        for record in self.store.records():
+            values = (record.get(field) for field in RESUME_FIELDS)
+            sheet.append([ILLEGAL_CHARACTERS_RE.sub('', value) if isinstance(value, str) else value
+                          for value in values])
+        workbook.save(excel_file)
+        return excel_file
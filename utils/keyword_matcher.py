@@ -0,0 +1,84 @@
+import re
+
+
+def _trie_pattern(words):
+    """Build a regex alternation shaped like a trie so shared prefixes are tried once.
+
+    At any position the pattern matches the longest word that starts there.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = True
+
+    def to_regex(node):
+        ends_here = '' in node
+        branches = [re.escape(char) + to_regex(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        # Longer continuations first so the match is as long as possible
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        if ends_here:
+            return '(?:' + body + ')?'
+        return body
+
+    return to_regex(trie)
+
+
+class KeywordMatcher:
+    """Match many groups of keywords against text in a single regex pass.
+
+    Replaces per-group loops such as
+    ``any(keyword.lower() in line.lower() for keyword in keywords)``: the
+    keywords are lowercased and compiled once, and one scan of a line reports
+    every group with at least one keyword in it, including overlapping ones.
+    """
+
+    def __init__(self, groups):
+        self.groups = groups
+        keyword_groups = {}
+        for name, keywords in groups.items():
+            for keyword in keywords:
+                keyword_groups.setdefault(keyword.lower(), set()).add(name)
+
+        # The regex reports the longest keyword at each position. Any shorter
+        # keyword matching at the same position is a prefix of it, so fold the
+        # groups of all prefixes into each keyword's result up front.
+        self._groups_at = {
+            keyword: frozenset().union(*(
+                names for other, names in keyword_groups.items() if keyword.startswith(other)
+            ))
+            for keyword in keyword_groups
+        }
+        self._exact = {keyword: frozenset(names) for keyword, names in keyword_groups.items()}
+        # Zero-width lookahead so matches starting inside another match are found too
+        self._pattern = re.compile('(?=(' + _trie_pattern(keyword_groups) + '))') if keyword_groups else None
+
+    def groups_in(self, text_lower):
+        """Return the groups with at least one keyword contained in the (lowercased) text"""
+        found = set()
+        if self._pattern is None:
+            return found
+        for match in self._pattern.finditer(text_lower):
+            keyword = match.group(1)
+            if keyword:
+                found |= self._groups_at[keyword]
+        return found
+
+    def groups_equal(self, text_lower):
+        """Return the groups with a keyword equal to the (lowercased) text"""
+        return self._exact.get(text_lower, frozenset())
+
+    def classify_lines(self, text):
+        """Split text into stripped lines and classify each one in a single pass.
+
+        Returns a list of (line, groups_in, groups_equal) tuples.
+        """
+        classified = []
+        for line in text.split('\n'):
+            line = line.strip()
+            line_lower = line.lower()
+            classified.append((line, self.groups_in(line_lower), self.groups_equal(line_lower)))
+        return classified
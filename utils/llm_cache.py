@@ -0,0 +1,186 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from config.database import DB_PATH, ConnectionPool
+
+# Bump when prompts or parsing change so stale responses are not served
+PROMPT_VERSION = 2
+
+
+def default_cache_path():
+    """Return the cache database path, next to the app database unless LLM_CACHE_PATH is set"""
+    path = os.getenv("LLM_CACHE_PATH")
+    if path:
+        return path
+    return os.path.join(os.path.dirname(os.path.abspath(DB_PATH)), 'llm_cache.db')
+
+
+def _normalize(value):
+    """Collapse whitespace so cosmetic differences in the inputs share a cache entry"""
+    if value is None:
+        return ''
+    return re.sub(r'\s+', ' ', str(value)).strip()
+
+
+class LLMResponseCache:
+    """SQLite-backed cache for LLM responses.
+
+    Entries are keyed by a hash of the normalized prompt inputs, the model
+    name and PROMPT_VERSION, expire after ttl_seconds and are evicted least
+    recently used first once there are more than max_entries. Hit, miss and
+    eviction counters are persisted with the entries.
+    """
+
+    def __init__(self, db_path=None, ttl_seconds=7 * 24 * 3600, max_entries=1000):
+        self.db_path = db_path or default_cache_path()
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._pool = ConnectionPool(self.db_path, max_idle=4, busy_timeout=10)
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self):
+        conn = self._pool.acquire()
+        if not self._initialized:
+            with self._init_lock:
+                if not self._initialized:
+                    conn.execute('''
+                    CREATE TABLE IF NOT EXISTS llm_cache (
+                        key TEXT PRIMARY KEY,
+                        model TEXT NOT NULL,
+                        response TEXT NOT NULL,
+                        created_at REAL NOT NULL,
+                        last_access REAL NOT NULL,
+                        hits INTEGER DEFAULT 0
+                    )
+                    ''')
+                    conn.execute('CREATE INDEX IF NOT EXISTS idx_llm_cache_last_access ON llm_cache (last_access)')
+                    conn.execute('''
+                    CREATE TABLE IF NOT EXISTS llm_cache_stats (
+                        name TEXT PRIMARY KEY,
+                        value INTEGER NOT NULL
+                    )
+                    ''')
+                    conn.commit()
+                    self._initialized = True
+        return conn
+
+    @staticmethod
+    def make_key(model, kind, **inputs):
+        """Return the cache key for a model, call kind and its prompt inputs"""
+        payload = {
+            'model': model,
+            'kind': kind,
+            'version': PROMPT_VERSION,
+            'inputs': {name: _normalize(value) for name, value in inputs.items()}
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _bump(conn, name, amount=1):
+        conn.execute('''
+        INSERT INTO llm_cache_stats (name, value) VALUES (?, ?)
+        ON CONFLICT(name) DO UPDATE SET value = value + excluded.value
+        ''', (name, amount))
+
+    def get(self, key):
+        """Return the cached response dict for a key, or None on a miss"""
+        try:
+            conn = self._connect()
+        except sqlite3.Error as e:
+            print(f"Error opening LLM cache: {e}")
+            return None
+        try:
+            now = time.time()
+            row = conn.execute('SELECT response, created_at FROM llm_cache WHERE key = ?', (key,)).fetchone()
+            if row and now - row[1] <= self.ttl_seconds:
+                conn.execute('UPDATE llm_cache SET last_access = ?, hits = hits + 1 WHERE key = ?', (now, key))
+                self._bump(conn, 'hits')
+                conn.commit()
+                return json.loads(row[0])
+            if row:
+                conn.execute('DELETE FROM llm_cache WHERE key = ?', (key,))
+                self._bump(conn, 'expired')
+            self._bump(conn, 'misses')
+            conn.commit()
+            return None
+        except (sqlite3.Error, ValueError) as e:
+            print(f"Error reading LLM cache: {e}")
+            return None
+        finally:
+            conn.close()
+
+    def put(self, key, model, response):
+        """Store a response dict and evict entries beyond the TTL and size limits"""
+        try:
+            conn = self._connect()
+        except sqlite3.Error as e:
+            print(f"Error opening LLM cache: {e}")
+            return
+        try:
+            now = time.time()
+            conn.execute('''
+            INSERT OR REPLACE INTO llm_cache (key, model, response, created_at, last_access, hits)
+            VALUES (?, ?, ?, ?, ?, 0)
+            ''', (key, model, json.dumps(response), now, now))
+            conn.execute('DELETE FROM llm_cache WHERE created_at < ?', (now - self.ttl_seconds,))
+            evicted = conn.execute('''
+            DELETE FROM llm_cache WHERE key IN (
+                SELECT key FROM llm_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?
+            )
+            ''', (self.max_entries,)).rowcount
+            if evicted > 0:
+                self._bump(conn, 'evictions', evicted)
+            conn.commit()
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            print(f"Error writing LLM cache: {e}")
+        finally:
+            conn.close()
+
+    def clear(self):
+        """Delete all cached responses and reset the counters"""
+        try:
+            conn = self._connect()
+            conn.execute('DELETE FROM llm_cache')
+            conn.execute('DELETE FROM llm_cache_stats')
+            conn.commit()
+            conn.close()
+        except sqlite3.Error as e:
+            print(f"Error clearing LLM cache: {e}")
+
+    def stats(self):
+        """Return hit/miss/eviction counters and the number of cached entries"""
+        stats = {'hits': 0, 'misses': 0, 'expired': 0, 'evictions': 0, 'entries': 0}
+        try:
+            conn = self._connect()
+            stats.update(dict(conn.execute('SELECT name, value FROM llm_cache_stats').fetchall()))
+            stats['entries'] = conn.execute('SELECT COUNT(*) FROM llm_cache').fetchone()[0]
+            conn.close()
+        except sqlite3.Error as e:
+            print(f"Error reading LLM cache stats: {e}")
+        return stats
+
+
+_llm_cache = None
+_llm_cache_lock = threading.Lock()
+
+
+def get_llm_cache():
+    """Return the process-wide LLM response cache.
+
+    LLM_CACHE_TTL_HOURS and LLM_CACHE_MAX_ENTRIES tune expiry and size.
+    """
+    global _llm_cache
+    if _llm_cache is None:
+        with _llm_cache_lock:
+            if _llm_cache is None:
+                _llm_cache = LLMResponseCache(
+                    ttl_seconds=float(os.getenv("LLM_CACHE_TTL_HOURS", "168")) * 3600,
+                    max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1000"))
+                )
+    return _llm_cache
@@ -0,0 +1,346 @@
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+
+import aiohttp
+
+GEMINI_API_BASE = "https://generativelanguage.googleapis.com/v1beta"
+OPENROUTER_API_BASE = "https://openrouter.ai/api/v1"
+
+# Status codes worth retrying on the same provider; 429 fails over instead
+RETRYABLE_STATUSES = {500, 502, 503, 504}
+
+
+class LLMProviderError(Exception):
+    """Raised when a provider (or every provider) fails to return a completion"""
+
+    def __init__(self, message, status=None, retryable=False):
+        super().__init__(message)
+        self.status = status
+        self.retryable = retryable
+
+
+class LLMProvider:
+    """Base class for an HTTP completion endpoint"""
+
+    name = "provider"
+
+    def __init__(self, api_key, model, label, base_url, timeout=60, name=None):
+        self.name = name or self.name
+        self.api_key = api_key
+        self.model = model
+        self.label = label
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def build_request(self, prompt):
+        """Return (url, params, headers, json body) for a prompt"""
+        raise NotImplementedError
+
+    def parse_response(self, data):
+        """Return the completion text from a decoded JSON response"""
+        raise NotImplementedError
+
+    def build_stream_request(self, prompt):
+        """Return (url, params, headers, json body) for a server-sent events stream of a prompt"""
+        raise NotImplementedError
+
+    def parse_stream_event(self, data):
+        """Return the text delta from one decoded stream event"""
+        raise NotImplementedError
+
+    async def _check_status(self, response):
+        if response.status == 429:
+            raise LLMProviderError(f"{self.label} is rate limited", status=429)
+        if response.status in RETRYABLE_STATUSES:
+            raise LLMProviderError(f"{self.label} returned HTTP {response.status}",
+                                   status=response.status, retryable=True)
+        if response.status >= 400:
+            # Not worth retrying here, but another provider has its own credentials and limits
+            detail = (await response.text())[:200]
+            raise LLMProviderError(f"{self.label} returned HTTP {response.status}: {detail}",
+                                   status=response.status)
+
+    async def complete(self, session, prompt):
+        url, params, headers, body = self.build_request(prompt)
+        try:
+            async with session.post(url, params=params, headers=headers, json=body) as response:
+                await self._check_status(response)
+                data = await response.json(content_type=None)
+        except aiohttp.ClientError as e:
+            raise LLMProviderError(f"{self.label} connection error: {e}", retryable=True)
+
+        text = self.parse_response(data)
+        if not text:
+            raise LLMProviderError(f"{self.label} returned an empty response", retryable=True)
+        return text
+
+    async def stream(self, session, prompt):
+        """Yield the completion text as it arrives"""
+        url, params, headers, body = self.build_stream_request(prompt)
+        try:
+            async with session.post(url, params=params, headers=headers, json=body) as response:
+                await self._check_status(response)
+                async for line in response.content:
+                    line = line.strip()
+                    if not line.startswith(b'data:'):
+                        continue
+                    payload = line[5:].strip()
+                    if payload == b'[DONE]':
+                        break
+                    try:
+                        text = self.parse_stream_event(json.loads(payload))
+                    except ValueError:
+                        raise LLMProviderError(f"{self.label} sent a malformed stream event", retryable=True)
+                    if text:
+                        yield text
+        except aiohttp.ClientError as e:
+            raise LLMProviderError(f"{self.label} connection error: {e}", retryable=True)
+
+
+class GeminiProvider(LLMProvider):
+    """Google Gemini generateContent REST endpoint"""
+
+    name = "gemini"
+
+    def __init__(self, api_key, model="gemini-1.5-flash", label="Google Gemini", base_url=GEMINI_API_BASE,
+                 timeout=60, name=None):
+        super().__init__(api_key, model, label, base_url, timeout, name)
+
+    def build_request(self, prompt):
+        url = f"{self.base_url}/models/{self.model}:generateContent"
+        body = {"contents": [{"parts": [{"text": prompt}]}]}
+        return url, {"key": self.api_key}, {}, body
+
+    def parse_response(self, data):
+        try:
+            parts = data["candidates"][0]["content"]["parts"]
+        except (KeyError, IndexError, TypeError):
+            return ""
+        return "".join(part.get("text", "") for part in parts)
+
+    def build_stream_request(self, prompt):
+        url, params, headers, body = self.build_request(prompt)
+        url = url.replace(":generateContent", ":streamGenerateContent")
+        return url, {**params, "alt": "sse"}, headers, body
+
+    def parse_stream_event(self, data):
+        # Each event is a partial generateContent response
+        return self.parse_response(data)
+
+
+class OpenRouterProvider(LLMProvider):
+    """OpenRouter (or any OpenAI-compatible) chat completions endpoint"""
+
+    name = "openrouter"
+
+    def __init__(self, api_key, model="anthropic/claude-3.5-sonnet", label="Anthropic Claude",
+                 base_url=OPENROUTER_API_BASE, timeout=60, name=None):
+        super().__init__(api_key, model, label, base_url, timeout, name)
+
+    def build_request(self, prompt):
+        url = f"{self.base_url}/chat/completions"
+        headers = {"Authorization": f"Bearer {self.api_key}"}
+        body = {"model": self.model, "messages": [{"role": "user", "content": prompt}]}
+        return url, {}, headers, body
+
+    def parse_response(self, data):
+        try:
+            return data["choices"][0]["message"]["content"] or ""
+        except (KeyError, IndexError, TypeError):
+            return ""
+
+    def build_stream_request(self, prompt):
+        url, params, headers, body = self.build_request(prompt)
+        return url, params, headers, {**body, "stream": True}
+
+    def parse_stream_event(self, data):
+        try:
+            return data["choices"][0]["delta"].get("content") or ""
+        except (KeyError, IndexError, TypeError, AttributeError):
+            return ""
+
+
+class LLMClient:
+    """Async completion client over several providers.
+
+    One pooled keep-alive aiohttp session is shared by every request. Each
+    provider gets a per-request timeout; connection errors and 5xx responses
+    are retried with jittered exponential backoff, while timeouts and rate
+    limits fail over to the next provider straight away. Streams get the
+    same treatment until their first chunk arrives; after that the timeout
+    applies to each gap between chunks, and a failure ends the stream.
+    """
+
+    def __init__(self, providers, max_retries=2, backoff=0.5, max_backoff=8.0, pool_size=20):
+        self.providers = {provider.name: provider for provider in providers}
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.pool_size = pool_size
+        self._session = None
+
+    def _get_session(self):
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=60, ttl_dns_cache=300)
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    async def complete(self, prompt, order=None):
+        """Return {'text', 'provider', 'label', 'model', 'attempts', 'latency'} from the first provider that answers"""
+        names = [name for name in (order or self.providers) if name in self.providers]
+        if not names:
+            raise LLMProviderError("No LLM provider is configured. Please add an API key to your .env file.")
+
+        session = self._get_session()
+        errors = []
+        attempts = 0
+        start = time.perf_counter()
+        for name in names:
+            provider = self.providers[name]
+            for attempt in range(self.max_retries + 1):
+                attempts += 1
+                try:
+                    text = await asyncio.wait_for(provider.complete(session, prompt), provider.timeout)
+                    return {
+                        'text': text,
+                        'provider': provider.name,
+                        'label': provider.label,
+                        'model': provider.model,
+                        'attempts': attempts,
+                        'latency': time.perf_counter() - start
+                    }
+                except asyncio.TimeoutError:
+                    errors.append(f"{provider.label} timed out after {provider.timeout}s")
+                    break
+                except LLMProviderError as e:
+                    errors.append(str(e))
+                    if not e.retryable or attempt == self.max_retries:
+                        break
+                    await asyncio.sleep(self._backoff_delay(attempt))
+
+        raise LLMProviderError("All LLM providers failed: " + "; ".join(errors))
+
+    async def stream(self, prompt, order=None):
+        """Yield {'text', 'provider', 'label', 'model'} chunks from the first provider that starts answering"""
+        names = [name for name in (order or self.providers) if name in self.providers]
+        if not names:
+            raise LLMProviderError("No LLM provider is configured. Please add an API key to your .env file.")
+
+        session = self._get_session()
+        errors = []
+        for name in names:
+            provider = self.providers[name]
+            for attempt in range(self.max_retries + 1):
+                chunks = provider.stream(session, prompt)
+                started = False
+                try:
+                    while True:
+                        try:
+                            text = await asyncio.wait_for(chunks.__anext__(), provider.timeout)
+                        except StopAsyncIteration:
+                            break
+                        started = True
+                        yield {'text': text, 'provider': provider.name, 'label': provider.label,
+                               'model': provider.model}
+                    if started:
+                        return
+                    raise LLMProviderError(f"{provider.label} returned an empty response", retryable=True)
+                except asyncio.TimeoutError:
+                    if started:
+                        raise LLMProviderError(f"{provider.label} stalled for {provider.timeout}s mid-stream")
+                    errors.append(f"{provider.label} timed out after {provider.timeout}s")
+                    break
+                except LLMProviderError as e:
+                    if started:
+                        raise
+                    errors.append(str(e))
+                    if not e.retryable or attempt == self.max_retries:
+                        break
+                    await asyncio.sleep(self._backoff_delay(attempt))
+                finally:
+                    await chunks.aclose()
+
+        raise LLMProviderError("All LLM providers failed: " + "; ".join(errors))
+
+    def _backoff_delay(self, attempt):
+        # Full jitter keeps retries from many sessions from synchronising
+        return random.uniform(0, min(self.max_backoff, self.backoff * (2 ** attempt)))
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+
+class _LoopThread:
+    """Background event loop so synchronous callers (Streamlit) can reuse one pooled session"""
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="llm-client-loop", daemon=True)
+        self.thread.start()
+
+    def run(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+
+_loop_thread = None
+_llm_client = None
+_llm_client_lock = threading.Lock()
+
+
+def build_llm_client():
+    """Build a client from the API keys and overrides in the environment.
+
+    GEMINI_API_BASE and OPENROUTER_API_BASE point the providers elsewhere,
+    for example at the local stub server (python -m utils.llm_stub_server).
+    """
+    timeout = float(os.getenv("LLM_TIMEOUT", "60"))
+    providers = []
+    google_api_key = os.getenv("GOOGLE_API_KEY")
+    openrouter_api_key = os.getenv("OPENROUTER_API_KEY")
+    if google_api_key:
+        providers.append(GeminiProvider(google_api_key,
+                                        base_url=os.getenv("GEMINI_API_BASE", GEMINI_API_BASE),
+                                        timeout=timeout))
+    if openrouter_api_key:
+        openrouter_base = os.getenv("OPENROUTER_API_BASE", OPENROUTER_API_BASE)
+        providers.append(OpenRouterProvider(openrouter_api_key, base_url=openrouter_base, timeout=timeout))
+        # Gemini through OpenRouter is the fallback when the Gemini API itself is unavailable
+        providers.append(OpenRouterProvider(openrouter_api_key, model="google/gemini-flash-1.5",
+                                            label="Google Gemini (via OpenRouter)", base_url=openrouter_base,
+                                            timeout=timeout, name="openrouter_gemini"))
+    return LLMClient(providers, max_retries=int(os.getenv("LLM_MAX_RETRIES", "2")))
+
+
+def get_llm_client():
+    """Return the process-wide LLM client"""
+    global _llm_client, _loop_thread
+    if _llm_client is None:
+        with _llm_client_lock:
+            if _llm_client is None:
+                _loop_thread = _LoopThread()
+                _llm_client = build_llm_client()
+    return _llm_client
+
+
+def complete_sync(prompt, order=None):
+    """Run LLMClient.complete from synchronous code on the shared event loop"""
+    client = get_llm_client()
+    return _loop_thread.run(client.complete(prompt, order))
+
+
+def stream_sync(prompt, order=None):
+    """Iterate LLMClient.stream from synchronous code on the shared event loop"""
+    chunks = get_llm_client().stream(prompt, order)
+    try:
+        while True:
+            try:
+                yield _loop_thread.run(chunks.__anext__())
+            except StopAsyncIteration:
+                return
+    finally:
+        _loop_thread.run(chunks.aclose())
@@ -0,0 +1,134 @@
+"""
+Local stub for the Gemini and OpenRouter HTTP APIs.
+
+Serves canned resume analyses so the AI analyzer can be exercised without
+API keys, quota or network access, and injects latency, rate limits and
+server errors to check retries and failover.
+
+Usage:
+    python -m utils.llm_stub_server --port 8765 --delay 0.5 --fail-rate 0.2
+    GEMINI_API_BASE=http://127.0.0.1:8765/v1beta OPENROUTER_API_BASE=http://127.0.0.1:8765/v1 \
+        GOOGLE_API_KEY=stub OPENROUTER_API_KEY=stub streamlit run app.py
+"""
+
+import argparse
+import asyncio
+import json
+import random
+
+from aiohttp import web
+
+STUB_ANALYSIS = """## Overall Assessment
+A clear, well organized resume with quantified achievements.
+
+## Key Strengths
+- Strong technical skills section
+- Quantified impact in recent roles
+
+## Areas for Improvement
+- Add a concise professional summary
+- Tailor keywords to the target role
+
+## ATS Optimization Assessment
+ATS Score: 72/100
+Use standard section headings and include more role keywords.
+
+## Recommended Courses/Certifications
+- AWS Certified Cloud Practitioner
+- Google Data Analytics Certificate
+
+## Resume Score
+Resume Score: 78/100
+"""
+
+
+def create_app(delay=0.0, fail_rate=0.0, fail_status=503, rate_limit_rate=0.0, seed=None):
+    """Build the stub application; failures are drawn independently per request"""
+    rng = random.Random(seed)
+    app = web.Application()
+    app['stats'] = {'requests': 0, 'failures': 0, 'rate_limited': 0}
+
+    async def maybe_fail():
+        """Return an error response for this request, or None to answer normally"""
+        app['stats']['requests'] += 1
+        if delay:
+            await asyncio.sleep(delay)
+        if rate_limit_rate and rng.random() < rate_limit_rate:
+            app['stats']['rate_limited'] += 1
+            return web.Response(status=429, text="rate limited")
+        if fail_rate and rng.random() < fail_rate:
+            app['stats']['failures'] += 1
+            return web.Response(status=fail_status, text="stub failure")
+        return None
+
+    async def gemini_generate(request):
+        failure = await maybe_fail()
+        if failure is not None:
+            return failure
+        await request.json()
+        return web.json_response({
+            "candidates": [{"content": {"parts": [{"text": STUB_ANALYSIS}]}}]
+        })
+
+    async def stream_events(request, events):
+        """Answer with server-sent events, one per line of the canned analysis"""
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        for event in events:
+            await response.write(f"data: {json.dumps(event)}\n\n".encode('utf-8'))
+            await asyncio.sleep(0)
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+    async def gemini_stream(request):
+        failure = await maybe_fail()
+        if failure is not None:
+            return failure
+        await request.json()
+        return await stream_events(request, [
+            {"candidates": [{"content": {"parts": [{"text": line}]}}]}
+            for line in STUB_ANALYSIS.splitlines(keepends=True)
+        ])
+
+    async def chat_completions(request):
+        failure = await maybe_fail()
+        if failure is not None:
+            return failure
+        body = await request.json()
+        if body.get("stream"):
+            return await stream_events(request, [
+                {"choices": [{"delta": {"content": line}}]}
+                for line in STUB_ANALYSIS.splitlines(keepends=True)
+            ])
+        return web.json_response({
+            "model": body.get("model", "stub"),
+            "choices": [{"message": {"role": "assistant", "content": STUB_ANALYSIS}}]
+        })
+
+    async def stats(request):
+        return web.json_response(app['stats'])
+
+    app.router.add_post('/v1beta/models/{model}:generateContent', gemini_generate)
+    app.router.add_post('/v1beta/models/{model}:streamGenerateContent', gemini_stream)
+    app.router.add_post('/v1/chat/completions', chat_completions)
+    app.router.add_get('/stats', stats)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=0.0, help="Seconds to wait before answering")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of requests answered with --fail-status")
+    parser.add_argument("--fail-status", type=int, default=503)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of requests answered with 429")
+    args = parser.parse_args()
+
+    app = create_app(args.delay, args.fail_rate, args.fail_status, args.rate_limit_rate)
+    web.run_app(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+import os
+import itertools
+import threading
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+
+DEFAULT_OCR_DPI = int(os.getenv("OCR_DPI", "200"))
+DEFAULT_PAGE_TIMEOUT = float(os.getenv("OCR_PAGE_TIMEOUT", "60"))
+
+# Common Poppler install locations on Windows
+WINDOWS_POPPLER_PATHS = [
+    r'C:\poppler\Library\bin',
+    r'C:\Program Files\poppler\bin',
+    r'C:\Program Files (x86)\poppler\bin',
+    r'C:\poppler\bin'
+]
+
+
+def find_poppler_path():
+    """Return the Poppler bin directory on Windows, or None to use PATH"""
+    if os.name != 'nt':
+        return None
+    for path in WINDOWS_POPPLER_PATHS:
+        if os.path.exists(path):
+            return path
+    return WINDOWS_POPPLER_PATHS[0]
+
+
+def _ocr_page(pdf_path, page_number, dpi, poppler_path, timeout):
+    """Rasterize and OCR a single page (runs inside a worker process)"""
+    from pdf2image import convert_from_path
+    import pytesseract
+
+    images = convert_from_path(
+        pdf_path,
+        dpi=dpi,
+        first_page=page_number,
+        last_page=page_number,
+        poppler_path=poppler_path,
+        timeout=timeout
+    )
+    # Let tesseract enforce the per-page budget so a stuck page is killed
+    return "\n".join(
+        pytesseract.image_to_string(image, timeout=timeout) for image in images
+    )
+
+
+_started_queue = None
+
+
+def _init_worker(started_queue):
+    global _started_queue
+    _started_queue = started_queue
+
+
+def _run_page(token, function, *args):
+    """Report that a submitted page has reached a worker, then run it"""
+    _started_queue.put(token)
+    return function(*args)
+
+
+class _PageStarts:
+    """When each submitted page reached a worker process.
+
+    The pool is shared by every document being OCR'd, so a page can sit in
+    the queue behind other documents' pages; its timeout only starts once a
+    worker reports picking it up.
+    """
+
+    def __init__(self, queue):
+        self._queue = queue
+        self._condition = threading.Condition()
+        self._pending = set()
+        self._started = {}
+        self._tokens = itertools.count()
+        threading.Thread(target=self._listen, name="ocr-page-starts", daemon=True).start()
+
+    def register(self):
+        with self._condition:
+            token = next(self._tokens)
+            self._pending.add(token)
+            return token
+
+    def forget(self, token):
+        with self._condition:
+            self._pending.discard(token)
+            self._started.pop(token, None)
+
+    def wait_started(self, token, future):
+        """Block until the page has started or finished; return its start time (None if never seen)"""
+        with self._condition:
+            while token not in self._started and not future.done():
+                # Wakes on any start report; the timeout catches pages that fail before reporting
+                self._condition.wait(timeout=0.5)
+            return self._started.get(token)
+
+    def _listen(self):
+        while True:
+            token = self._queue.get()
+            with self._condition:
+                if token in self._pending:
+                    self._started[token] = time.monotonic()
+                    self._condition.notify_all()
+
+
+_executor = None
+_page_starts = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    """Return the shared OCR process pool, sized to the available cores"""
+    global _executor, _page_starts
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                workers = int(os.getenv("OCR_WORKERS", "0")) or os.cpu_count() or 1
+                # Spawn avoids forking the multi-threaded Streamlit server
+                context = multiprocessing.get_context("spawn")
+                started_queue = context.Queue()
+                _page_starts = _PageStarts(started_queue)
+                _executor = ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=context,
+                    initializer=_init_worker,
+                    initargs=(started_queue,)
+                )
+    return _executor
+
+
+class ParallelOCR:
+    """Page-level OCR for scanned PDFs.
+
+    Each page is rasterized on its own (first_page/last_page) inside a worker
+    process and OCR'd there, so only one page image per worker is held in
+    memory. Page texts are yielded back in document order.
+    """
+
+    def __init__(self, dpi=DEFAULT_OCR_DPI, page_timeout=DEFAULT_PAGE_TIMEOUT, poppler_path=None):
+        self.dpi = dpi
+        self.page_timeout = page_timeout
+        self.poppler_path = poppler_path if poppler_path is not None else find_poppler_path()
+
+    def page_count(self, pdf_path):
+        """Return the number of pages in the PDF"""
+        from pdf2image import pdfinfo_from_path
+        info = pdfinfo_from_path(pdf_path, poppler_path=self.poppler_path)
+        return int(info.get("Pages", 0))
+
+    def iter_pages(self, pdf_path):
+        """Yield (page_number, text) in page order as OCR completes.
+
+        Pages that fail or exceed the per-page timeout yield an empty string.
+        """
+        pages = self.page_count(pdf_path)
+        if pages <= 1:
+            # Not worth the IPC round trip for a single page
+            for page_number in range(1, pages + 1):
+                try:
+                    yield page_number, _ocr_page(pdf_path, page_number, self.dpi,
+                                                 self.poppler_path, self.page_timeout)
+                except Exception as e:
+                    print(f"OCR failed for page {page_number}: {e}")
+                    yield page_number, ""
+            return
+
+        executor = _get_executor()
+        tokens = []
+        futures = []
+        for page_number in range(1, pages + 1):
+            token = _page_starts.register()
+            tokens.append(token)
+            futures.append(executor.submit(_run_page, token, _ocr_page, pdf_path, page_number,
+                                           self.dpi, self.poppler_path, self.page_timeout))
+        try:
+            for page_number, (token, future) in enumerate(zip(tokens, futures), start=1):
+                try:
+                    yield page_number, self._page_result(token, future)
+                except FutureTimeoutError:
+                    print(f"OCR timed out for page {page_number}")
+                    future.cancel()
+                    yield page_number, ""
+                except Exception as e:
+                    print(f"OCR failed for page {page_number}: {e}")
+                    yield page_number, ""
+        finally:
+            # Drop queued pages if the caller stopped iterating early
+            for token, future in zip(tokens, futures):
+                future.cancel()
+                _page_starts.forget(token)
+
+    def _page_result(self, token, future):
+        """Wait for a page until page_timeout after a worker picked it up (not after it was queued)"""
+        started = _page_starts.wait_started(token, future)
+        if future.done():
+            return future.result()
+        remaining = started + self.page_timeout - time.monotonic()
+        return future.result(timeout=max(remaining, 0))
+
+    def extract_text(self, pdf_path):
+        """Return the OCR text of the whole document"""
+        return "\n".join(text for _, text in self.iter_pages(pdf_path))
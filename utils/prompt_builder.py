@@ -0,0 +1,221 @@
+import math
+import os
+import re
+import threading
+import unicodedata
+from dataclasses import dataclass, field
+
+# Sections dropped first when a resume or job description is over budget
+LOW_VALUE_RESUME_SECTIONS = (
+    'references', 'hobbies', 'interests', 'hobbies and interests', 'declaration',
+    'personal details', 'personal information', 'extracurricular activities'
+)
+LOW_VALUE_JOB_SECTIONS = (
+    'about us', 'about the company', 'who we are', 'benefits', 'perks',
+    'what we offer', 'equal opportunity', 'equal opportunity employer', 'eeo statement'
+)
+KNOWN_HEADERS = (
+    'summary', 'professional summary', 'objective', 'career objective', 'profile',
+    'experience', 'work experience', 'professional experience', 'employment history',
+    'education', 'skills', 'technical skills', 'projects', 'certifications',
+    'achievements', 'awards', 'publications', 'languages', 'volunteer',
+    'responsibilities', 'requirements', 'qualifications', 'preferred qualifications',
+    'job description', 'role', 'about the role'
+) + LOW_VALUE_RESUME_SECTIONS + LOW_VALUE_JOB_SECTIONS
+
+PAGE_MARKER_PATTERN = re.compile(r'^(page\s*\d+(\s*(of|/)\s*\d+)?|\d+\s*/\s*\d+)$', re.IGNORECASE)
+CONTROL_CHAR_PATTERN = re.compile(r'[\x00-\x08\x0b-\x1f\x7f\u200b-\u200f\ufeff]')
+TRUNCATION_MARKER = "[... truncated to fit the prompt budget ...]"
+
+
+def estimate_tokens(text):
+    """Rough token count (about four characters per token for English text)"""
+    return math.ceil(len(text) / 4) if text else 0
+
+
+def _header_name(line):
+    """Return the normalized header name if a line looks like a section header, else None"""
+    name = line.strip().rstrip(':').strip().lower()
+    if not name or len(name.split()) > 4:
+        return None
+    if name in KNOWN_HEADERS or line.strip().endswith(':') or (line.isupper() and any(c.isalpha() for c in line)):
+        return name
+    return None
+
+
+def compact_text(text):
+    """Normalize whitespace and drop OCR noise, page markers and repeated lines.
+
+    The name/contact block and section headers repeated at the top of a page
+    are only dropped right after a page break (a form feed or a page marker
+    line), so a header or contact line repeated elsewhere is kept.
+    """
+    if not text:
+        return ""
+    text = unicodedata.normalize('NFKC', text)
+    text = text.replace('\r\n', '\n').replace('\r', '\n')
+
+    lines = []
+    seen = set()
+    headers_seen = set()
+    page_header = set()
+    previous_blank = True
+    after_break = False
+    for page_number, page in enumerate(text.split('\f')):
+        after_break = after_break or page_number > 0
+        for raw_line in CONTROL_CHAR_PATTERN.sub('', page).split('\n'):
+            line = ' '.join(raw_line.split())
+            if not line:
+                if not previous_blank:
+                    lines.append('')
+                previous_blank = True
+                continue
+
+            if PAGE_MARKER_PATTERN.match(line):
+                after_break = True
+                continue
+            # Lines without a letter or digit are rules, bullets or scanner speckle
+            if not any(c.isalnum() for c in line):
+                continue
+
+            key = line.lower()
+            header = _header_name(line)
+            repeated = (
+                (lines and key == lines[-1].lower())
+                or (after_break and key in page_header)  # name/contact block repeated on the next page
+                or (after_break and header in KNOWN_HEADERS and header in headers_seen)  # "Experience" continued
+                or (len(line) >= 40 and key in seen)     # duplicated sentences and bullets
+            )
+            if repeated:
+                continue
+
+            if len(seen) < 3:
+                page_header.add(key)
+            seen.add(key)
+            if header:
+                headers_seen.add(header)
+            lines.append(line)
+            previous_blank = False
+            after_break = False
+
+    return '\n'.join(lines).strip()
+
+
+def split_blocks(text):
+    """Split compacted text into (header name or None, lines) blocks"""
+    blocks = [[None, []]]
+    for line in text.split('\n'):
+        header = _header_name(line)
+        if header:
+            blocks.append([header, [line]])
+        else:
+            blocks[-1][1].append(line)
+    return [(header, lines) for header, lines in blocks if lines]
+
+
+def fit_to_budget(text, max_tokens, low_value_sections=()):
+    """Trim compacted text to max_tokens.
+
+    Low-value sections are dropped first, in order; if that is not enough the
+    text is cut at a line boundary. Returns (text, dropped section names,
+    truncated flag).
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text, [], False
+
+    blocks = split_blocks(text)
+    dropped = []
+    for index, (header, _) in enumerate(blocks):
+        if header in low_value_sections:
+            blocks[index] = (header, None)
+            dropped.append(header)
+            text = '\n'.join('\n'.join(lines) for _, lines in blocks if lines)
+            if estimate_tokens(text) <= max_tokens:
+                return text, dropped, False
+
+    budget_chars = max(0, max_tokens * 4 - len(TRUNCATION_MARKER) - 1)
+    cut = text.rfind('\n', 0, budget_chars)
+    kept = text[:cut if cut > 0 else budget_chars].rstrip()
+    return f"{kept}\n{TRUNCATION_MARKER}", dropped, True
+
+
+def strip_indentation(prompt):
+    """Remove the indentation that triple-quoted prompt templates carry on every line"""
+    lines = [line.strip() for line in prompt.split('\n')]
+    return re.sub(r'\n{3,}', '\n\n', '\n'.join(lines)).strip()
+
+
+@dataclass
+class PromptBuild:
+    """A prompt ready to send, with the token accounting for it"""
+    prompt: str
+    tokens: int
+    raw_tokens: int
+    dropped_sections: list = field(default_factory=list)
+    truncated: bool = False
+
+    @property
+    def tokens_saved(self):
+        return max(0, self.raw_tokens - self.tokens)
+
+    def stats(self):
+        return {
+            "prompt_tokens": self.tokens,
+            "tokens_saved": self.tokens_saved,
+            "dropped_sections": self.dropped_sections,
+            "truncated": self.truncated
+        }
+
+
+class PromptBuilder:
+    """Compact resume and job description text into a token budget before prompting.
+
+    `render(resume_text, job_description)` fills the prompt template; it is
+    called once with the raw inputs (to measure what would have been sent)
+    and once with the compacted ones.
+    """
+
+    def __init__(self, max_resume_tokens=3000, max_job_description_tokens=1000):
+        self.max_resume_tokens = max_resume_tokens
+        self.max_job_description_tokens = max_job_description_tokens
+
+    def compact_resume(self, resume_text):
+        return fit_to_budget(compact_text(resume_text), self.max_resume_tokens, LOW_VALUE_RESUME_SECTIONS)
+
+    def compact_job_description(self, job_description):
+        if not job_description:
+            return job_description, [], False
+        return fit_to_budget(compact_text(job_description), self.max_job_description_tokens, LOW_VALUE_JOB_SECTIONS)
+
+    def build(self, render, resume_text, job_description=None):
+        raw_prompt = render(resume_text, job_description)
+        resume, resume_dropped, resume_truncated = self.compact_resume(resume_text)
+        description, job_dropped, job_truncated = self.compact_job_description(job_description)
+        prompt = strip_indentation(render(resume, description))
+        return PromptBuild(
+            prompt=prompt,
+            tokens=estimate_tokens(prompt),
+            raw_tokens=estimate_tokens(raw_prompt),
+            dropped_sections=resume_dropped + job_dropped,
+            truncated=resume_truncated or job_truncated
+        )
+
+
+_prompt_builder = None
+_prompt_builder_lock = threading.Lock()
+
+
+def get_prompt_builder():
+    """Return the process-wide prompt builder.
+
+    PROMPT_RESUME_TOKENS and PROMPT_JOB_DESCRIPTION_TOKENS set the budgets.
+    """
+    global _prompt_builder
+    if _prompt_builder is None:
+        with _prompt_builder_lock:
+            if _prompt_builder is None:
+                _prompt_builder = PromptBuilder(
+                    max_resume_tokens=int(os.getenv("PROMPT_RESUME_TOKENS", "3000")),
+                    max_job_description_tokens=int(os.getenv("PROMPT_JOB_DESCRIPTION_TOKENS", "1000"))
+                )
+    return _prompt_builder
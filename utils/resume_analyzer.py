@@ -1,4 +1,7 @@
 import re
+from utils.document_ingestion import get_document_ingestor
+from utils.resume_segmenter import ResumeDocument, ResumeSegmenter
+from utils.role_matcher import get_role_matcher
 
 class ResumeAnalyzer:
     def __init__(self):
@@ -21,16 +24,56 @@ class ResumeAnalyzer:
                 'date of issue', 'identification'
             ]
         }
+
+        # Keywords that mark the start of each resume section
+        self.section_keywords = {
+            'education': [
+                'education', 'academic', 'qualification', 'degree', 'university', 'college',
+                'school', 'institute', 'certification', 'diploma', 'bachelor', 'master',
+                'phd', 'b.tech', 'm.tech', 'b.e', 'm.e', 'b.sc', 'm.sc','bca', 'mca', 'b.com',
+                'm.com', 'b.cs-it', 'imca', 'bba', 'mba', 'honors', 'scholarship'
+            ],
+            'experience': [
+                'experience', 'employment', 'work history', 'professional experience',
+                'work experience', 'career history', 'professional background',
+                'employment history', 'job history', 'positions held', 'experience',
+                'job title', 'job responsibilities', 'job description', 'job summary'
+            ],
+            'projects': [
+                'projects', 'personal projects', 'academic projects', 'key projects',
+                'major projects', 'professional projects', 'project experience',
+                'relevant projects', 'featured projects','latest projects',
+                'top projects'
+            ],
+            'skills': [
+                'skills', 'technical skills', 'competencies', 'expertise',
+                'core competencies', 'professional skills', 'key skills',
+                'technical expertise', 'proficiencies', 'qualifications',
+                'top skills', 'key skill', 'major skill', 'personal skill',
+                'soft skills', 'soft skill', 'soft skillset'
+            ],
+            'summary': [
+                'summary', 'professional summary', 'career summary', 'objective',
+                'career objective', 'professional objective', 'about me', 'profile',
+                'professional profile', 'career profile', 'overview', 'skill summary'
+            ]
+        }
+
+        # Every extractor and check reads from one segmentation of the text
+        self.segmenter = ResumeSegmenter(self.section_keywords, self.document_types['resume'])
+        self._last_document = None
         
     def detect_document_type(self, text):
-        text = text.lower()
+        document = self.segment(text)
+        text = document.text_lower
+        word_count = document.word_count
         scores = {}
         
         # Calculate score for each document type
         for doc_type, keywords in self.document_types.items():
             matches = sum(1 for keyword in keywords if keyword in text)
             density = matches / len(keywords)
-            frequency = matches / (len(text.split()) + 1)  # Add 1 to avoid division by zero
+            frequency = matches / (word_count + 1)  # Add 1 to avoid division by zero
             scores[doc_type] = (density * 0.7) + (frequency * 0.3)
         
         # Get the highest scoring document type
@@ -40,17 +83,13 @@ class ResumeAnalyzer:
         return best_match[0] if best_match[1] > 0.15 else 'unknown'
         
     def calculate_keyword_match(self, resume_text, required_skills):
-        resume_text = resume_text.lower()
+        resume_text = self.segment(resume_text).text_lower
         found_skills = []
         missing_skills = []
         
         for skill in required_skills:
-            skill_lower = skill.lower()
-            # Check for exact match
-            if skill_lower in resume_text:
-                found_skills.append(skill)
-            # Check for partial matches (e.g., "Python" in "Python programming")
-            elif any(skill_lower in phrase for phrase in resume_text.split('.')):
+            # Substring match also covers partial matches (e.g., "Python" in "Python programming")
+            if skill.lower() in resume_text:
                 found_skills.append(skill)
             else:
                 missing_skills.append(skill)
@@ -63,8 +102,12 @@ class ResumeAnalyzer:
             'missing_skills': missing_skills
         }
         
+    def rank_job_roles(self, text, top_n=5):
+        """Rank every job role by keyword match against the resume in one pass"""
+        return get_role_matcher().rank_roles(self.segment(text).text_lower, top_n)
+        
     def check_resume_sections(self, text):
-        text = text.lower()
+        text = self.segment(text).text_lower
         essential_sections = {
             'contact': ['email', 'phone', 'address', 'linkedin'],
             'education': ['education', 'university', 'college', 'degree', 'academic'],
@@ -80,378 +123,135 @@ class ResumeAnalyzer:
         return sum(section_scores.values())
         
     def check_formatting(self, text):
-        lines = text.split('\n')
+        document = self.segment(text)
         score = 100
         deductions = []
         
         # Check for minimum content
-        if len(text) < 300:
+        if len(document.text) < 300:
             score -= 30
             deductions.append("Resume is too short")
             
         # Check for section headers
-        if not any(line.isupper() for line in lines):
+        if not document.has_upper_header:
             score -= 20
             deductions.append("No clear section headers found")
             
         # Check for bullet points
-        if not any(line.strip().startswith(('•', '-', '*', '→')) for line in lines):
+        if not document.bullets:
             score -= 20
             deductions.append("No bullet points found for listing details")
             
         # Check for consistent spacing
-        if any(len(line.strip()) == 0 and len(next_line.strip()) == 0 
-               for line, next_line in zip(lines[:-1], lines[1:])):
+        if document.has_double_blank:
             score -= 15
             deductions.append("Inconsistent spacing between sections")
             
         # Check for contact information format
-        contact_patterns = [
-            r'\b[\w\.-]+@[\w\.-]+\.\w+\b',  # email
-            r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b',  # phone
-            r'linkedin\.com/\w+',  # LinkedIn
-        ]
-        if not any(re.search(pattern, text) for pattern in contact_patterns):
+        if not document.has_formatted_contact:
             score -= 15
             deductions.append("Missing or improperly formatted contact information")
             
         return max(0, score), deductions
         
     def extract_text_from_pdf(self, file):
-        try:
-            import PyPDF2
-            import io
-            
-            # Create a PDF reader object
-            # First make sure we have the file content as bytes
-            if hasattr(file, 'read'):
-                # If it's already a file-like object, read it
-                file_content = file.read()
-                file.seek(0)  # Reset file pointer
-            else:
-                # If it's already bytes
-                file_content = file
-                
-            # Create BytesIO from bytes content
-            pdf_reader = PyPDF2.PdfReader(io.BytesIO(file_content))
-            
-            # Extract text from all pages
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
-                
-            return text
-        except Exception as e:
-            raise Exception(f"Error extracting text from PDF: {str(e)}")
+        """Extract text from a PDF file using the shared ingestion engine"""
+        document = get_document_ingestor().ingest(file, file_type='pdf')
+        if document.is_empty and document.errors:
+            errors = '; '.join(f"{backend}: {error}" for backend, error in document.errors.items())
+            raise Exception(f"Error extracting text from PDF: {errors}")
+        return document.text
             
     def extract_text_from_docx(self, docx_file):
         """Extract text from a DOCX file"""
-        try:
-            from docx import Document
-            doc = Document(docx_file)
-            full_text = []
-            for paragraph in doc.paragraphs:
-                full_text.append(paragraph.text)
-            return '\n'.join(full_text)
-        except Exception as e:
-            raise Exception(f"Error extracting text from DOCX file: {str(e)}")
+        document = get_document_ingestor().ingest(docx_file, file_type='docx')
+        if 'docx' in document.errors:
+            raise Exception(f"Error extracting text from DOCX file: {document.errors['docx']}")
+        return document.text
 
     def extract_personal_info(self, text):
         """Extract personal information from resume text"""
-        # Basic patterns for personal info
-        email_pattern = r'[\w\.-]+@[\w\.-]+\.\w+'
-        phone_pattern = r'(\+\d{1,3}[-.]?)?\s*\(?\d{3}\)?[-.]?\s*\d{3}[-.]?\s*\d{4}'
-        linkedin_pattern = r'linkedin\.com/in/[\w-]+'
-        github_pattern = r'github\.com/[\w-]+'
-        
-        # Extract information
-        email = re.search(email_pattern, text)
-        phone = re.search(phone_pattern, text)
-        linkedin = re.search(linkedin_pattern, text)
-        github = re.search(github_pattern, text)
+        document = self.segment(text)
         
         # Get the first line as name (basic assumption)
-        name = text.split('\n')[0].strip()
+        name = document.first_line
         
         return {
             'name': name if len(name) > 0 else 'Unknown',
-            'email': email.group(0) if email else '',
-            'phone': phone.group(0) if phone else '',
-            'linkedin': linkedin.group(0) if linkedin else '',
-            'github': github.group(0) if github else '',
+            **document.contacts,
             'portfolio': ''  # Can be enhanced later
         }
 
+    def segment(self, text):
+        """Tokenize resume text into a ResumeDocument, reusing the last one for the same text"""
+        if isinstance(text, ResumeDocument):
+            return text
+        cached = self._last_document
+        if cached is not None and cached.text is text:
+            return cached
+        document = self.segmenter.segment(text)
+        self._last_document = document
+        return document
+
     def extract_education(self, text):
         """Extract education information from resume text"""
-        education = []
-        lines = text.split('\n')
-        education_keywords = [
-            'education', 'academic', 'qualification', 'degree', 'university', 'college',
-            'school', 'institute', 'certification', 'diploma', 'bachelor', 'master',
-            'phd', 'b.tech', 'm.tech', 'b.e', 'm.e', 'b.sc', 'm.sc','bca', 'mca', 'b.com',
-            'm.com', 'b.cs-it', 'imca', 'bba', 'mba', 'honors', 'scholarship'
-        ]
-        in_education_section = False
-        current_entry = []
-
-        for line in lines:
-            line = line.strip()
-            # Check for section header
-            if any(keyword.lower() in line.lower() for keyword in education_keywords):
-                if not any(keyword.lower() == line.lower() for keyword in education_keywords):
-                    # This line contains education info, not just a header
-                    current_entry.append(line)
-                in_education_section = True
-                continue
-            
-            if in_education_section:
-                # Check if we've hit another section
-                if line and any(keyword.lower() in line.lower() for keyword in self.document_types['resume']):
-                    if not any(edu_key.lower() in line.lower() for edu_key in education_keywords):
-                        in_education_section = False
-                        if current_entry:
-                            education.append(' '.join(current_entry))
-                            current_entry = []
-                        continue
-                
-                if line:
-                    current_entry.append(line)
-                elif current_entry:  # Empty line and we have content
-                    education.append(' '.join(current_entry))
-                    current_entry = []
-        
-        if current_entry:
-            education.append(' '.join(current_entry))
-        
-        return education
+        return self.segment(text).entries('education')
 
     def extract_experience(self, text):
         """Extract work experience information from resume text"""
-        experience = []
-        lines = text.split('\n')
-        experience_keywords = [
-            'experience', 'employment', 'work history', 'professional experience',
-            'work experience', 'career history', 'professional background',
-            'employment history', 'job history', 'positions held', 'experience',
-            'job title', 'job responsibilities', 'job description', 'job summary'
-        ]
-        in_experience_section = False
-        current_entry = []
-
-        for line in lines:
-            line = line.strip()
-            # Check for section header
-            if any(keyword.lower() in line.lower() for keyword in experience_keywords):
-                if not any(keyword.lower() == line.lower() for keyword in experience_keywords):
-                    # This line contains experience info, not just a header
-                    current_entry.append(line)
-                in_experience_section = True
-                continue
-            
-            if in_experience_section:
-                # Check if we've hit another section
-                if line and any(keyword.lower() in line.lower() for keyword in self.document_types['resume']):
-                    if not any(exp_key.lower() in line.lower() for exp_key in experience_keywords):
-                        in_experience_section = False
-                        if current_entry:
-                            experience.append(' '.join(current_entry))
-                            current_entry = []
-                        continue
-                
-                if line:
-                    current_entry.append(line)
-                elif current_entry:  # Empty line and we have content
-                    experience.append(' '.join(current_entry))
-                    current_entry = []
-        
-        if current_entry:
-            experience.append(' '.join(current_entry))
-        
-        return experience
+        return self.segment(text).entries('experience')
 
     def extract_projects(self, text):
         """Extract project information from resume text"""
-        projects = []
-        lines = text.split('\n')
-        project_keywords = [
-            'projects', 'personal projects', 'academic projects', 'key projects',
-            'major projects', 'professional projects', 'project experience',
-            'relevant projects', 'featured projects','latest projects',
-            'top projects'
-        ]
-        in_project_section = False
-        current_entry = []
-
-        for line in lines:
-            line = line.strip()
-            # Check for section header
-            if any(keyword.lower() in line.lower() for keyword in project_keywords):
-                if not any(keyword.lower() == line.lower() for keyword in project_keywords):
-                    # This line contains project info, not just a header
-                    current_entry.append(line)
-                in_project_section = True
-                continue
-            
-            if in_project_section:
-                # Check if we've hit another section
-                if line and any(keyword.lower() in line.lower() for keyword in self.document_types['resume']):
-                    if not any(proj_key.lower() in line.lower() for proj_key in project_keywords):
-                        in_project_section = False
-                        if current_entry:
-                            projects.append(' '.join(current_entry))
-                            current_entry = []
-                        continue
-                
-                if line:
-                    current_entry.append(line)
-                elif current_entry:  # Empty line and we have content
-                    projects.append(' '.join(current_entry))
-                    current_entry = []
-        
-        if current_entry:
-            projects.append(' '.join(current_entry))
-        
-        return projects
+        return self.segment(text).entries('projects')
 
     def extract_skills(self, text):
         """Extract skills from resume text"""
         skills = set()  # Use set to avoid duplicates
-        lines = text.split('\n')
-        skills_keywords = [
-            'skills', 'technical skills', 'competencies', 'expertise',
-            'core competencies', 'professional skills', 'key skills',
-            'technical expertise', 'proficiencies', 'qualifications',
-            'top skills', 'key skill', 'major skill', 'personal skill',
-            'soft skills', 'soft skill', 'soft skillset'
-        ]
-        in_skills_section = False
-        current_entry = []
 
         # Common skill separators
         separators = [',', '•', '|', '/', '\\', '·', '>', '-', '–', '―']
 
-        for line in lines:
-            line = line.strip()
-            # Check for section header
-            if any(keyword.lower() in line.lower() for keyword in skills_keywords):
-                if not any(keyword.lower() == line.lower() for keyword in skills_keywords):
-                    # This line contains skills, not just a header
-                    current_entry.append(line)
-                in_skills_section = True
-                continue
-            
-            if in_skills_section:
-                # Check if we've hit another section
-                if line and any(keyword.lower() in line.lower() for keyword in self.document_types['resume']):
-                    if not any(skill_key.lower() in line.lower() for skill_key in skills_keywords):
-                        in_skills_section = False
-                        if current_entry:
-                            # Process the current entry
-                            text_to_process = ' '.join(current_entry)
-                            # Split by common separators
-                            for separator in separators:
-                                if separator in text_to_process:
-                                    skills.update(skill.strip() for skill in text_to_process.split(separator) if skill.strip())
-                            current_entry = []
-                        continue
-                
-                if line:
-                    current_entry.append(line)
-                elif current_entry:  # Empty line and we have content
-                    # Process the current entry
-                    text_to_process = ' '.join(current_entry)
-                    # Split by common separators
-                    for separator in separators:
-                        if separator in text_to_process:
-                            skills.update(skill.strip() for skill in text_to_process.split(separator) if skill.strip())
-                    current_entry = []
-        
-        if current_entry:
-            # Process any remaining skills
-            text_to_process = ' '.join(current_entry)
+        for text_to_process in self.segment(text).entries('skills'):
+            # Split by common separators
             for separator in separators:
                 if separator in text_to_process:
                     skills.update(skill.strip() for skill in text_to_process.split(separator) if skill.strip())
-        
+
         return list(skills)
 
     def extract_summary(self, text):
         """Extract summary/objective from resume text"""
+        document = self.segment(text)
         summary = []
-        lines = text.split('\n')
-        summary_keywords = [
-            'summary', 'professional summary', 'career summary', 'objective',
-            'career objective', 'professional objective', 'about me', 'profile',
-            'professional profile', 'career profile', 'overview', 'skill summary'
-        ]
-        in_summary_section = False
-        current_entry = []
-
-        # Try to find summary at the beginning of the resume
-        start_index = 0
-        while start_index < min(10, len(lines)) and not lines[start_index].strip():
-            start_index += 1
 
         # Check first few non-empty lines for potential summary
-        first_lines = []
-        lines_checked = 0
-        for line in lines[start_index:]:
-            if line.strip():
-                first_lines.append(line.strip())
-                lines_checked += 1
-                if lines_checked >= 5:  # Check first 5 non-empty lines
-                    break
+        first_lines = document.head_lines(5)
 
         # If first few lines look like a summary (no special formatting, no contact info)
-        if first_lines and not any(keyword in first_lines[0].lower() for keyword in summary_keywords):
-            potential_summary = ' '.join(first_lines)
+        if first_lines and 'summary' not in first_lines[0].groups_in:
+            potential_summary = ' '.join(line.text for line in first_lines)
             if len(potential_summary.split()) > 10:  # More than 10 words
                 if not re.search(r'\b(?:email|phone|address|tel|mobile|linkedin)\b', potential_summary.lower()):
                     summary.append(potential_summary)
 
         # Look for explicitly marked summary section
-        for line in lines:
-            line = line.strip()
-            # Check for section header
-            if any(keyword.lower() in line.lower() for keyword in summary_keywords):
-                if not any(keyword.lower() == line.lower() for keyword in summary_keywords):
-                    # This line contains summary info, not just a header
-                    current_entry.append(line)
-                in_summary_section = True
-                continue
-            
-            if in_summary_section:
-                # Check if we've hit another section
-                if line and any(keyword.lower() in line.lower() for keyword in self.document_types['resume']):
-                    if not any(sum_key.lower() in line.lower() for sum_key in summary_keywords):
-                        in_summary_section = False
-                        if current_entry:
-                            summary.append(' '.join(current_entry))
-                            current_entry = []
-                        continue
-                
-                if line:
-                    current_entry.append(line)
-                elif current_entry:  # Empty line and we have content
-                    summary.append(' '.join(current_entry))
-                    current_entry = []
-        
-        if current_entry:
-            summary.append(' '.join(current_entry))
-        
+        summary.extend(document.entries('summary'))
+
         return ' '.join(summary) if summary else ''
 
     def analyze_resume(self, resume_data, job_requirements):
         """Analyze resume and return scores and recommendations"""
         try:
             text = resume_data.get('raw_text', '')
+            # Tokenize once; every extractor and check below reads from this document
+            document = self.segment(text)
             
             # Extract personal information
-            personal_info = self.extract_personal_info(text)
+            personal_info = self.extract_personal_info(document)
             
             # First detect document type
-            doc_type = self.detect_document_type(text)
+            doc_type = self.detect_document_type(document)
             if doc_type != 'resume':
                 return {
                     'ats_score': 0,
@@ -464,20 +264,20 @@ class ResumeAnalyzer:
                 
             # Calculate keyword match
             required_skills = job_requirements.get('required_skills', [])
-            keyword_match = self.calculate_keyword_match(text, required_skills)
+            keyword_match = self.calculate_keyword_match(document, required_skills)
             
             # Extract all resume sections
-            education = self.extract_education(text)
-            experience = self.extract_experience(text)
-            projects = self.extract_projects(text)
-            skills = list(self.extract_skills(text))  # Convert skills set to list
-            summary = self.extract_summary(text)
+            education = self.extract_education(document)
+            experience = self.extract_experience(document)
+            projects = self.extract_projects(document)
+            skills = list(self.extract_skills(document))  # Convert skills set to list
+            summary = self.extract_summary(document)
             
             # Check resume sections
-            section_score = self.check_resume_sections(text)
+            section_score = self.check_resume_sections(document)
             
             # Check formatting
-            format_score, format_deductions = self.check_formatting(text)
+            format_score, format_deductions = self.check_formatting(document)
             
             # Generate section-specific suggestions
             contact_suggestions = []
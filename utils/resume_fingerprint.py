@@ -0,0 +1,359 @@
+"""
+Exact and near-duplicate detection for uploaded resumes.
+
+Every analyzed resume gets a fingerprint: the SHA-256 of its normalized
+text plus a MinHash signature of its word 3-shingles. The signature is cut
+into LSH bands whose hashes are indexed in resume_fingerprint_bands, so a
+lookup is one indexed probe for the exact hash and one per band for near
+duplicates, then a signature comparison against the few candidates - never
+a scan of every stored resume. Each new upload records its closest near
+duplicate (at or above cluster_threshold) and the admin report groups them.
+
+Analysis results are stored per fingerprint and scope (for example the ATS
+analysis for one role, or the AI analysis for a role and job description).
+An identical upload always reuses a stored result. Near duplicates reuse
+one only at or above RESUME_REUSE_THRESHOLD, which defaults to 1.0 (off):
+a near duplicate may differ in the one line that changes its score.
+
+Usage:
+    python -m utils.resume_fingerprint --report   # duplicate clusters
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+
+import numpy as np
+
+from config.database import get_database_connection, init_database
+
+NUM_PERM = 128
+BANDS = 16  # 16 bands of 8 rows: pairs above ~0.7 Jaccard share a band with high probability
+SHINGLE_SIZE = 3
+MERSENNE_PRIME = (1 << 31) - 1
+
+_random = np.random.RandomState(1)
+_PERM_A = _random.randint(1, MERSENNE_PRIME, size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _random.randint(0, MERSENNE_PRIME, size=NUM_PERM, dtype=np.uint64)
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+(?:[+#.][a-z0-9+#]*)*')
+
+
+def normalize_text(text):
+    """Lowercase word tokens of a resume, ignoring layout, punctuation and Unicode variants"""
+    return ' '.join(TOKEN_PATTERN.findall(unicodedata.normalize('NFKC', text or '').lower()))
+
+
+def content_hash(normalized):
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+
+def minhash_signature(normalized):
+    """MinHash signature (NUM_PERM uint32 values) of the text's word shingles"""
+    tokens = normalized.split()
+    shingles = {' '.join(tokens[i:i + SHINGLE_SIZE]) for i in range(max(1, len(tokens) - SHINGLE_SIZE + 1))}
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=4).digest(), 'little')
+         for shingle in shingles),
+        dtype=np.uint64, count=len(shingles))
+    # (a * x + b) mod p for every permutation and shingle; a, b, x < p < 2**31 so nothing overflows
+    permuted = (np.outer(hashes % np.uint64(MERSENNE_PRIME), _PERM_A) + _PERM_B) % np.uint64(MERSENNE_PRIME)
+    return permuted.min(axis=0).astype(np.uint32)
+
+
+def band_buckets(signature):
+    """Return the LSH bucket (a signed 64-bit hash) of each band of a signature"""
+    rows = NUM_PERM // BANDS
+    return [int.from_bytes(hashlib.blake2b(signature[band * rows:(band + 1) * rows].tobytes(),
+                                           digest_size=8).digest(), 'little', signed=True)
+            for band in range(BANDS)]
+
+
+def similarity(signature, other):
+    """Estimated Jaccard similarity of two signatures"""
+    return float(np.mean(signature == other))
+
+
+class Fingerprint:
+    def __init__(self, text):
+        self.normalized = normalize_text(text)
+        self.content_hash = content_hash(self.normalized)
+        self.signature = minhash_signature(self.normalized)
+
+
+class Match:
+    """A stored fingerprint matching an upload"""
+
+    def __init__(self, fingerprint_id, resume_id, similarity, exact):
+        self.fingerprint_id = fingerprint_id
+        self.resume_id = resume_id
+        self.similarity = similarity
+        self.exact = exact
+
+
+class ResumeFingerprintIndex:
+    """Fingerprint store with an LSH index.
+
+    reuse_threshold is the similarity at which a near duplicate's result is
+    reused (1.0: identical uploads only); cluster_threshold is the
+    similarity at which uploads are recorded and reported as near duplicates.
+    """
+
+    def __init__(self, reuse_threshold=1.0, cluster_threshold=0.8):
+        self.reuse_threshold = reuse_threshold
+        self.cluster_threshold = cluster_threshold
+
+    def matches(self, text_or_fingerprint, threshold=None):
+        """Return stored fingerprints at or above threshold (default cluster_threshold), most similar first.
+
+        A threshold of 1.0 or more matches identical text only.
+        """
+        fingerprint = self._fingerprint(text_or_fingerprint)
+        if not fingerprint.normalized:
+            return []
+        threshold = self.cluster_threshold if threshold is None else threshold
+        conn = get_database_connection()
+        try:
+            found = [Match(row[0], row[1], 1.0, True) for row in conn.execute(
+                'SELECT id, resume_id FROM resume_fingerprints WHERE content_hash = ?', (fingerprint.content_hash,))]
+            exact_ids = {match.fingerprint_id for match in found}
+            candidates = self._candidates(conn, fingerprint.signature) if threshold < 1.0 else []
+            for fingerprint_id, resume_id, signature in candidates:
+                score = similarity(fingerprint.signature, signature)
+                if score >= threshold and fingerprint_id not in exact_ids:
+                    # Equal signatures are not equal text, so a near match never counts as exact
+                    found.append(Match(fingerprint_id, resume_id, min(score, 0.999), False))
+        finally:
+            conn.close()
+        found.sort(key=lambda match: match.similarity, reverse=True)
+        return found
+
+    def _candidates(self, conn, signature):
+        buckets = band_buckets(signature)
+        placeholders = ' OR '.join(['(band = ? AND bucket = ?)'] * BANDS)
+        params = [value for band, bucket in enumerate(buckets) for value in (band, bucket)]
+        rows = conn.execute(f'''
+            SELECT f.id, f.resume_id, f.signature
+            FROM resume_fingerprints f
+            WHERE f.id IN (SELECT fingerprint_id FROM resume_fingerprint_bands WHERE {placeholders})
+        ''', params).fetchall()
+        return [(row[0], row[1], np.frombuffer(row[2], dtype=np.uint32)) for row in rows]
+
+    def add(self, text_or_fingerprint, resume_id=None):
+        """Store a fingerprint and its LSH bands; returns its id.
+
+        An exact duplicate returns the existing id and counts one more upload;
+        a new fingerprint records its closest near duplicate, if any.
+        """
+        fingerprint = self._fingerprint(text_or_fingerprint)
+        near = next((match for match in self.matches(fingerprint) if not match.exact), None)
+        conn = get_database_connection()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute('SELECT id FROM resume_fingerprints WHERE content_hash = ? ORDER BY id LIMIT 1',
+                               (fingerprint.content_hash,)).fetchone()
+            now = time.time()
+            if row:
+                conn.execute('''
+                    UPDATE resume_fingerprints
+                    SET uploads = uploads + 1, last_seen = ?, resume_id = COALESCE(resume_id, ?)
+                    WHERE id = ?
+                ''', (now, resume_id, row[0]))
+                conn.commit()
+                return row[0]
+            cursor = conn.execute('''
+                INSERT INTO resume_fingerprints (resume_id, content_hash, signature, created_at, last_seen,
+                                                 near_duplicate_of, near_similarity)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (resume_id, fingerprint.content_hash, fingerprint.signature.tobytes(), now, now,
+                  near.fingerprint_id if near else None, near.similarity if near else None))
+            fingerprint_id = cursor.lastrowid
+            conn.executemany('INSERT OR IGNORE INTO resume_fingerprint_bands (band, bucket, fingerprint_id) VALUES (?, ?, ?)',
+                             [(band, bucket, fingerprint_id)
+                              for band, bucket in enumerate(band_buckets(fingerprint.signature))])
+            conn.commit()
+            return fingerprint_id
+        except Exception as e:
+            print(f"Error saving resume fingerprint: {e}")
+            conn.rollback()
+            return None
+        finally:
+            conn.close()
+
+    def get_result(self, fingerprint_id, scope):
+        """Return the stored result for a fingerprint and scope, or None"""
+        conn = get_database_connection()
+        try:
+            row = conn.execute('SELECT result FROM fingerprint_results WHERE fingerprint_id = ? AND scope = ?',
+                               (fingerprint_id, scope)).fetchone()
+            return json.loads(row[0]) if row else None
+        finally:
+            conn.close()
+
+    def store_result(self, fingerprint_id, scope, result):
+        if fingerprint_id is None:
+            return
+        conn = get_database_connection()
+        try:
+            conn.execute('''
+                INSERT OR REPLACE INTO fingerprint_results (fingerprint_id, scope, result, created_at)
+                VALUES (?, ?, ?, ?)
+            ''', (fingerprint_id, scope, json.dumps(result, default=list), time.time()))
+            conn.commit()
+        except Exception as e:
+            print(f"Error saving fingerprint result: {e}")
+            conn.rollback()
+        finally:
+            conn.close()
+
+    def reuse(self, text_or_fingerprint, scope):
+        """Return (match, stored result) for the closest prior upload with a result in scope, else (None, None).
+
+        Only identical uploads match unless reuse_threshold is below 1.0.
+        """
+        for match in self.matches(text_or_fingerprint, self.reuse_threshold):
+            result = self.get_result(match.fingerprint_id, scope)
+            if result is not None:
+                self._count_reuse(match.fingerprint_id, scope)
+                return match, result
+        return None, None
+
+    def _count_reuse(self, fingerprint_id, scope):
+        conn = get_database_connection()
+        try:
+            conn.execute('UPDATE fingerprint_results SET reuses = reuses + 1 WHERE fingerprint_id = ? AND scope = ?',
+                         (fingerprint_id, scope))
+            conn.commit()
+        except Exception as e:
+            print(f"Error counting fingerprint reuse: {e}")
+            conn.rollback()
+        finally:
+            conn.close()
+
+    def remember(self, text_or_fingerprint, scope, result, resume_id=None):
+        """Fingerprint an analyzed upload and store its result for later (near-)identical uploads"""
+        fingerprint_id = self.add(text_or_fingerprint, resume_id)
+        self.store_result(fingerprint_id, scope, result)
+        return fingerprint_id
+
+    def duplicate_clusters(self, min_size=2):
+        """Group stored fingerprints into clusters of near duplicates (admin report), largest first"""
+        conn = get_database_connection()
+        try:
+            pairs = conn.execute('''
+                SELECT DISTINCT a.fingerprint_id, b.fingerprint_id
+                FROM resume_fingerprint_bands a
+                JOIN resume_fingerprint_bands b
+                  ON a.band = b.band AND a.bucket = b.bucket AND a.fingerprint_id < b.fingerprint_id
+            ''').fetchall()
+            repeat_uploads = conn.execute('SELECT COALESCE(SUM(uploads - 1), 0) FROM resume_fingerprints').fetchone()[0]
+            reused = conn.execute('SELECT COALESCE(SUM(reuses), 0) FROM fingerprint_results').fetchone()[0]
+            near_uploads = conn.execute(
+                'SELECT COUNT(*) FROM resume_fingerprints WHERE near_duplicate_of IS NOT NULL').fetchone()[0]
+            ids = {fingerprint_id for pair in pairs for fingerprint_id in pair}
+            details = {}
+            for chunk_start in range(0, len(ids), 500):
+                chunk = list(ids)[chunk_start:chunk_start + 500]
+                for row in conn.execute(f'''
+                    SELECT f.id, f.resume_id, f.signature, f.created_at, rd.name, rd.target_role,
+                           f.uploads, f.last_seen
+                    FROM resume_fingerprints f LEFT JOIN resume_data rd ON rd.id = f.resume_id
+                    WHERE f.id IN ({','.join('?' * len(chunk))})
+                ''', chunk):
+                    details[row[0]] = row
+        finally:
+            conn.close()
+
+        parent = {}
+
+        def find(item):
+            while parent.setdefault(item, item) != item:
+                parent[item] = parent[parent[item]]
+                item = parent[item]
+            return item
+
+        for left, right in pairs:
+            signature_left = np.frombuffer(details[left][2], dtype=np.uint32)
+            signature_right = np.frombuffer(details[right][2], dtype=np.uint32)
+            if similarity(signature_left, signature_right) >= self.cluster_threshold:
+                parent[find(left)] = find(right)
+
+        groups = {}
+        for fingerprint_id in parent:
+            groups.setdefault(find(fingerprint_id), []).append(fingerprint_id)
+        clusters = []
+        for members in groups.values():
+            if len(members) < min_size:
+                continue
+            members.sort()
+            rows = [details[member] for member in members]
+            clusters.append({
+                'size': len(members),
+                'fingerprint_ids': members,
+                'resume_ids': [row[1] for row in rows if row[1] is not None],
+                'names': sorted({row[4] for row in rows if row[4]}),
+                'roles': sorted({row[5] for row in rows if row[5]}),
+                'uploads': sum(row[6] for row in rows),
+                'first_seen': min(row[3] for row in rows),
+                'last_seen': max(row[7] or row[3] for row in rows)
+            })
+        clusters.sort(key=lambda cluster: (cluster['size'], cluster['uploads']), reverse=True)
+        return {'clusters': clusters, 'exact_duplicate_uploads': repeat_uploads,
+                'near_duplicate_uploads': near_uploads, 'reused_analyses': reused}
+
+    @staticmethod
+    def _fingerprint(text_or_fingerprint):
+        if isinstance(text_or_fingerprint, Fingerprint):
+            return text_or_fingerprint
+        return Fingerprint(text_or_fingerprint)
+
+
+def analysis_scope(kind, *parts):
+    """Scope key for a stored result, e.g. analysis_scope('ai', role, job_description)"""
+    digest = hashlib.sha256(json.dumps(parts, default=str).encode('utf-8')).hexdigest()[:16]
+    return f"{kind}:{digest}"
+
+
+_fingerprint_index = None
+_fingerprint_index_lock = threading.Lock()
+
+
+def get_fingerprint_index():
+    """Return the process-wide fingerprint index.
+
+    RESUME_REUSE_THRESHOLD sets the similarity at which a near duplicate's
+    analysis is reused (default 1.0: identical uploads only), and
+    RESUME_CLUSTER_THRESHOLD the similarity at which uploads count as near duplicates.
+    """
+    global _fingerprint_index
+    if _fingerprint_index is None:
+        with _fingerprint_index_lock:
+            if _fingerprint_index is None:
+                _fingerprint_index = ResumeFingerprintIndex(
+                    reuse_threshold=float(os.getenv("RESUME_REUSE_THRESHOLD", "1.0")),
+                    cluster_threshold=float(os.getenv("RESUME_CLUSTER_THRESHOLD", "0.8"))
+                )
+    return _fingerprint_index
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--report", action="store_true", help="Print clusters of near-duplicate resumes")
+    parser.add_argument("--min-size", type=int, default=2)
+    args = parser.parse_args()
+
+    init_database()
+    report = get_fingerprint_index().duplicate_clusters(args.min_size)
+    print(f"{len(report['clusters'])} duplicate clusters, {report['exact_duplicate_uploads']} exact re-uploads")
+    for cluster in report['clusters']:
+        print(f"{cluster['size']:4d}  resumes {cluster['resume_ids']}  {', '.join(cluster['names']) or '-'}"
+              f"  ({', '.join(cluster['roles']) or 'no role'})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+import re
+from dataclasses import dataclass, field
+
+from utils.keyword_matcher import KeywordMatcher
+
+# Matcher group for generic headers that end whichever section is open
+HEADER_GROUP = 'resume'
+
+BULLET_PREFIXES = ('•', '-', '*', '→')
+
+# Patterns used to pull contact details out of the resume
+CONTACT_PATTERNS = {
+    'email': re.compile(r'[\w\.-]+@[\w\.-]+\.\w+'),
+    'phone': re.compile(r'(\+\d{1,3}[-.]?)?\s*\(?\d{3}\)?[-.]?\s*\d{3}[-.]?\s*\d{4}'),
+    'linkedin': re.compile(r'linkedin\.com/in/[\w-]+'),
+    'github': re.compile(r'github\.com/[\w-]+'),
+}
+
+# Stricter patterns used by the formatting check to decide contact info is well formed
+FORMATTED_CONTACT_PATTERNS = [
+    re.compile(r'\b[\w\.-]+@[\w\.-]+\.\w+\b'),  # email
+    re.compile(r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b'),  # phone
+    re.compile(r'linkedin\.com/\w+'),  # LinkedIn
+]
+
+
+@dataclass
+class ResumeLine:
+    """One line of the resume, stripped, with the section keywords it contains"""
+    number: int
+    text: str
+    lower: str
+    start: int
+    groups_in: frozenset
+    groups_equal: frozenset
+
+    @property
+    def is_blank(self):
+        return not self.text
+
+    @property
+    def is_bullet(self):
+        return self.text.startswith(BULLET_PREFIXES)
+
+    @property
+    def is_upper(self):
+        return self.text.isupper()
+
+
+@dataclass
+class ResumeSection:
+    """A contiguous run of lines belonging to one section.
+
+    header_line is the line that opened the section and end_line is exclusive.
+    A section name may appear more than once in a resume.
+    """
+    name: str
+    header_line: int
+    end_line: int = -1
+    entries: list = field(default_factory=list)
+
+
+@dataclass
+class ResumeDocument:
+    """Resume text tokenized once: lines, section spans and contact tokens"""
+    text: str
+    text_lower: str
+    lines: list
+    sections: dict
+    contacts: dict
+    has_formatted_contact: bool
+
+    def entries(self, section):
+        """Return every entry of a section across all of its spans"""
+        return [entry for span in self.sections.get(section, []) for entry in span.entries]
+
+    def section_lines(self, span):
+        """Return the lines covered by a section span"""
+        return self.lines[span.header_line:span.end_line]
+
+    def head_lines(self, count):
+        """Return the first non-empty lines of the resume"""
+        head = []
+        for line in self.lines:
+            if line.text:
+                head.append(line)
+                if len(head) >= count:
+                    break
+        return head
+
+    @property
+    def first_line(self):
+        return self.lines[0].text if self.lines else ''
+
+    @property
+    def bullets(self):
+        return [line for line in self.lines if line.is_bullet]
+
+    @property
+    def word_count(self):
+        return len(self.text_lower.split())
+
+    @property
+    def has_upper_header(self):
+        return any(line.is_upper for line in self.lines)
+
+    @property
+    def has_double_blank(self):
+        return any(line.is_blank and next_line.is_blank
+                   for line, next_line in zip(self.lines[:-1], self.lines[1:]))
+
+
+class ResumeSegmenter:
+    """Split resume text into a ResumeDocument in a single pass over its lines.
+
+    Every section is tracked at once: a line containing one of a section's
+    keywords opens (or continues) that section, and a line containing any
+    generic resume header that is not one of its own keywords closes it.
+    Blank lines separate entries inside a section.
+    """
+
+    def __init__(self, section_keywords, header_keywords):
+        self.section_names = list(section_keywords)
+        self.matcher = KeywordMatcher({**section_keywords, HEADER_GROUP: header_keywords})
+
+    def segment(self, text):
+        """Tokenize resume text into a ResumeDocument"""
+        lines = []
+        offset = 0
+        for number, raw_line in enumerate(text.split('\n')):
+            stripped = raw_line.strip()
+            lower = stripped.lower()
+            lines.append(ResumeLine(number, stripped, lower, offset,
+                                    self.matcher.groups_in(lower), self.matcher.groups_equal(lower)))
+            offset += len(raw_line) + 1
+
+        sections = {name: [] for name in self.section_names}
+        open_spans = {}
+        current_entries = {name: [] for name in self.section_names}
+
+        for line in lines:
+            for name in self.section_names:
+                span = open_spans.get(name)
+                current_entry = current_entries[name]
+
+                # Check for section header
+                if name in line.groups_in:
+                    if name not in line.groups_equal:
+                        # This line contains section info, not just a header
+                        current_entry.append(line.text)
+                    if span is None:
+                        span = open_spans[name] = ResumeSection(name, line.number)
+                        sections[name].append(span)
+                    continue
+
+                if span is None:
+                    continue
+
+                # Check if we've hit another section
+                if line.text and HEADER_GROUP in line.groups_in:
+                    self._flush(span, current_entry)
+                    span.end_line = line.number
+                    del open_spans[name]
+                    continue
+
+                if line.text:
+                    current_entry.append(line.text)
+                elif current_entry:  # Empty line and we have content
+                    self._flush(span, current_entry)
+
+        for name, span in open_spans.items():
+            self._flush(span, current_entries[name])
+            span.end_line = len(lines)
+
+        return ResumeDocument(
+            text=text,
+            text_lower=text.lower(),
+            lines=lines,
+            sections=sections,
+            contacts={key: self._first_match(pattern, text) for key, pattern in CONTACT_PATTERNS.items()},
+            has_formatted_contact=any(pattern.search(text) for pattern in FORMATTED_CONTACT_PATTERNS)
+        )
+
+    @staticmethod
+    def _flush(span, current_entry):
+        if current_entry:
+            span.entries.append(' '.join(current_entry))
+            current_entry.clear()
+
+    @staticmethod
+    def _first_match(pattern, text):
+        match = pattern.search(text)
+        return match.group(0) if match else ''
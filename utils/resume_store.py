@@ -0,0 +1,281 @@
+"""
+Append-only segmented store for the resumes ExcelManager saves.
+
+Records are JSON lines appended to segment-NNNNNN.jsonl files. The newest
+segment takes appends until it reaches segment_bytes; it is then sealed
+and gets an index sidecar (segment-NNNNNN.index.json) mapping each user_id
+to the offsets of its records, so a reader can open it without scanning.
+Once more than max_closed_segments segments have been sealed since the
+last compaction they are merged into one, in order, dropping torn lines.
+
+Appends take a thread lock plus, where fcntl exists, an exclusive flock on
+the store's .lock file, so writers in other processes do not interleave.
+Readers hold a shared flock on the same file while they index and read, so
+they never see a compaction half done (the merged segment next to the
+segments it replaces). They keep a per-segment user_id index in memory and
+only scan bytes appended since their last look.
+"""
+
+import json
+import os
+import re
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends are only serialized within the process
+    fcntl = None
+
+SEGMENT_PATTERN = re.compile(r'^segment-(\d{6})\.jsonl$')
+COMPACTION_MARKER = 'compaction.json'
+ALL_USERS = object()
+
+
+def _segment_name(seq):
+    return f"segment-{seq:06d}.jsonl"
+
+
+def _index_name(segment):
+    return segment[:-len('.jsonl')] + '.index.json'
+
+
+def _json_default(value):
+    """Store numpy scalars (pandas rows from the legacy workbook) as native numbers, anything else as text"""
+    if hasattr(value, 'item') and hasattr(value, 'dtype'):
+        return value.item()
+    return str(value)
+
+
+class ResumeSegmentStore:
+    """Append-only JSONL segments with a user_id index"""
+
+    def __init__(self, directory, segment_bytes=8 * 1024 * 1024, max_closed_segments=8):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.max_closed_segments = max_closed_segments
+        self._append_lock = threading.Lock()
+        self._lock = threading.Lock()
+        # segment name -> {'inode', 'scanned', 'users': {user_id: [(offset, length)]}}
+        self._segments = {}
+        os.makedirs(directory, exist_ok=True)
+        with self._write_lock():
+            self._recover_compaction()
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def segment_names(self):
+        """Return segment file names, oldest first"""
+        return sorted(name for name in os.listdir(self.directory) if SEGMENT_PATTERN.match(name))
+
+    @contextmanager
+    def _write_lock(self):
+        with self._append_lock:
+            with self._file_lock(fcntl.LOCK_EX if fcntl else None):
+                yield
+
+    @contextmanager
+    def _read_lock(self):
+        if fcntl is None:
+            # Without flock only this process's writers can be kept out
+            with self._append_lock:
+                yield
+            return
+        with self._file_lock(fcntl.LOCK_SH):
+            yield
+
+    @contextmanager
+    def _file_lock(self, operation):
+        if fcntl is None:
+            yield
+            return
+        with open(self._path('.lock'), 'a') as lock_file:
+            fcntl.flock(lock_file, operation)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def append(self, record):
+        """Append one record (a JSON-serializable dict with a user_id key)"""
+        line = (json.dumps(record, ensure_ascii=False, default=_json_default) + '\n').encode('utf-8')
+        with self._write_lock():
+            names = self.segment_names()
+            if not names:
+                names = [_segment_name(1)]
+            elif os.path.getsize(self._path(names[-1])) >= self.segment_bytes:
+                self._write_index(names[-1])
+                names.append(_segment_name(int(SEGMENT_PATTERN.match(names[-1]).group(1)) + 1))
+            with open(self._path(names[-1]), 'ab') as segment:
+                segment.write(line)
+            # Only the sealed segments since the last compaction are merged, so
+            # each record is rewritten once rather than on every compaction
+            merged_bytes = self.segment_bytes * self.max_closed_segments
+            small = [name for name in names[:-1] if os.path.getsize(self._path(name)) < merged_bytes]
+            if len(small) > self.max_closed_segments:
+                self._compact(small)
+
+    # --- Reading ---
+
+    def refresh(self):
+        """Bring the in-memory index up to date with the segments on disk; returns their names"""
+        with self._read_lock():
+            return self._refresh()
+
+    def _refresh(self):
+        names = self.segment_names()
+        with self._lock:
+            for name in set(self._segments) - set(names):
+                del self._segments[name]
+            for name in names:
+                try:
+                    stat = os.stat(self._path(name))
+                except FileNotFoundError:
+                    continue  # compacted away since listdir; picked up next time
+                segment = self._segments.get(name)
+                if segment is None or segment['inode'] != stat.st_ino or segment['scanned'] > stat.st_size:
+                    segment = self._segments[name] = self._load_index(name, stat)
+                if segment['scanned'] < stat.st_size:
+                    self._scan(name, segment)
+        return names
+
+    def _load_index(self, name, stat):
+        segment = {'inode': stat.st_ino, 'scanned': 0, 'users': {}}
+        try:
+            with open(self._path(_index_name(name)), encoding='utf-8') as index_file:
+                index = json.load(index_file)
+            if index['size'] == stat.st_size:
+                segment['scanned'] = index['size']
+                segment['users'] = {user_id: [tuple(entry) for entry in entries]
+                                    for user_id, entries in index['users']}
+        except (OSError, ValueError, KeyError):
+            pass  # no sidecar (active segment) or a stale one: scan instead
+        return segment
+
+    def _scan(self, name, segment):
+        with open(self._path(name), 'rb') as segment_file:
+            segment_file.seek(segment['scanned'])
+            offset = segment['scanned']
+            for line in segment_file:
+                if not line.endswith(b'\n'):
+                    break  # an append in progress; read it next time
+                try:
+                    user_id = json.loads(line).get('user_id')
+                    segment['users'].setdefault(user_id, []).append((offset, len(line)))
+                except (ValueError, AttributeError, TypeError):
+                    pass  # torn or foreign line; compaction drops it
+                offset += len(line)
+            segment['scanned'] = offset
+
+    def _snapshot(self, user_id=ALL_USERS):
+        """Return [(name, inode, entries)] for every segment (entries for one user_id, if given)"""
+        names = self._refresh()
+        with self._lock:
+            snapshot = []
+            for name in names:
+                segment = self._segments.get(name)
+                if segment is None:
+                    continue
+                if user_id is ALL_USERS:
+                    entries = sorted(entry for entries in segment['users'].values() for entry in entries)
+                else:
+                    entries = list(segment['users'].get(user_id, ()))
+                snapshot.append((name, segment['inode'], entries))
+            return snapshot
+
+    def _read_snapshot(self, snapshot):
+        records = []
+        for name, inode, entries in snapshot:
+            if not entries:
+                continue
+            with open(self._path(name), 'rb') as segment_file:
+                if os.fstat(segment_file.fileno()).st_ino != inode:
+                    raise FileNotFoundError(name)
+                for offset, length in entries:
+                    segment_file.seek(offset)
+                    records.append(json.loads(segment_file.read(length)))
+        return records
+
+    def _read(self, user_id=ALL_USERS):
+        while True:
+            try:
+                with self._read_lock():
+                    return self._read_snapshot(self._snapshot(user_id))
+            except FileNotFoundError:
+                # Only without flock: another process compacted between indexing and reading
+                continue
+
+    def get(self, user_id):
+        """Return a user's records, oldest first, via the user_id index"""
+        return self._read(user_id)
+
+    def records(self):
+        """Return every record, oldest first"""
+        return self._read()
+
+    def count(self):
+        with self._read_lock():
+            self._refresh()
+        with self._lock:
+            return sum(len(entries) for segment in self._segments.values() for entries in segment['users'].values())
+
+    # --- Sealing and compaction (called with the write lock held) ---
+
+    def _write_index(self, name):
+        """Write the user_id index sidecar for a sealed segment"""
+        self._refresh()
+        with self._lock:
+            segment = self._segments[name]
+            index = {'size': segment['scanned'],
+                     'users': [[user_id, entries] for user_id, entries in segment['users'].items()]}
+        temp_path = self._path(_index_name(name) + '.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as index_file:
+            json.dump(index, index_file)
+        os.replace(temp_path, self._path(_index_name(name)))
+
+    def _compact(self, closed):
+        """Merge sealed segments into the last of them, keeping record order"""
+        target = closed[-1]
+        temp_path = self._path(target + '.compacting')
+        with open(temp_path, 'wb') as merged:
+            for name in closed:
+                with open(self._path(name), 'rb') as segment_file:
+                    for line in segment_file:
+                        try:
+                            json.loads(line)
+                        except ValueError:
+                            continue
+                        if line.endswith(b'\n'):
+                            merged.write(line)
+            size = merged.tell()
+            merged.flush()
+            os.fsync(merged.fileno())
+        # The marker lets a crashed compaction be finished (or abandoned) on the next open
+        with open(self._path(COMPACTION_MARKER), 'w', encoding='utf-8') as marker:
+            json.dump({'target': target, 'size': size, 'merged': closed[:-1]}, marker)
+        os.replace(temp_path, self._path(target))
+        self._recover_compaction()
+        self._write_index(target)
+
+    def _recover_compaction(self):
+        marker_path = self._path(COMPACTION_MARKER)
+        try:
+            with open(marker_path, encoding='utf-8') as marker:
+                state = json.load(marker)
+        except FileNotFoundError:
+            return
+        except ValueError:
+            os.remove(marker_path)
+            return
+        target = self._path(state['target'])
+        if os.path.exists(target) and os.path.getsize(target) == state['size']:
+            # The merged file is in place: the merged-in segments are now duplicates
+            for name in state['merged']:
+                for path in (self._path(name), self._path(_index_name(name))):
+                    if os.path.exists(path):
+                        os.remove(path)
+        leftover = target + '.compacting'
+        if os.path.exists(leftover):
+            os.remove(leftover)
+        os.remove(marker_path)
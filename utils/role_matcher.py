@@ -0,0 +1,99 @@
+import threading
+
+import numpy as np
+from scipy import sparse
+
+from config.job_roles import JOB_ROLES
+
+
+class RoleMatcher:
+    """Score resumes against every job role at once.
+
+    The required skills of all roles form one vocabulary, and the roles are
+    stored as a sparse role x skill incidence matrix. A resume is reduced to
+    a skill incidence vector with one substring test per unique skill, so its
+    keyword match score for every role is one sparse matrix product. The
+    scores equal ResumeAnalyzer.calculate_keyword_match run role by role.
+    """
+
+    def __init__(self, job_roles=JOB_ROLES):
+        self.roles = []
+        self.role_skills = []
+        self.vocabulary = {}
+        rows, cols = [], []
+        for category, roles in job_roles.items():
+            for role, info in roles.items():
+                row = len(self.roles)
+                required_skills = info.get('required_skills', [])
+                self.roles.append((category, role))
+                self.role_skills.append(required_skills)
+                for skill in required_skills:
+                    rows.append(row)
+                    cols.append(self.vocabulary.setdefault(skill.lower(), len(self.vocabulary)))
+
+        # Duplicate (role, skill) pairs are summed, matching a role listing a skill twice
+        self.matrix = sparse.csr_matrix(
+            (np.ones(len(rows)), (rows, cols)),
+            shape=(len(self.roles), len(self.vocabulary))
+        )
+        counts = np.array([len(skills) for skills in self.role_skills], dtype=float)
+        self._weights = np.divide(100.0, counts, out=np.zeros_like(counts), where=counts > 0)
+
+    def skills_in(self, text):
+        """Return the vocabulary skills (lowercased) contained in the text"""
+        text = text.lower()
+        return {skill for skill in self.vocabulary if skill in text}
+
+    def incidence_matrix(self, texts):
+        """Return the sparse resume x skill incidence matrix for a list of texts"""
+        rows, cols = [], []
+        for row, text in enumerate(texts):
+            for skill in self.skills_in(text):
+                rows.append(row)
+                cols.append(self.vocabulary[skill])
+        return sparse.csr_matrix(
+            (np.ones(len(rows)), (rows, cols)),
+            shape=(len(texts), len(self.vocabulary))
+        )
+
+    def score_matrix(self, texts):
+        """Return a dense resume x role array of keyword match scores (0-100)"""
+        hits = (self.incidence_matrix(texts) @ self.matrix.T).toarray()
+        return hits * self._weights
+
+    def rank_roles(self, text, top_n=5):
+        """Return the best-fit roles for one resume, highest keyword match first"""
+        present = self.skills_in(text)
+        hits = self.matrix @ np.array(
+            [1.0 if skill in present else 0.0 for skill in self.vocabulary], dtype=float
+        )
+        scores = hits * self._weights
+        # Stable sort keeps JOB_ROLES order between equal scores
+        ranked = np.argsort(-scores, kind='stable')[:top_n]
+
+        results = []
+        for index in ranked:
+            category, role = self.roles[index]
+            skills = self.role_skills[index]
+            results.append({
+                'category': category,
+                'role': role,
+                'score': float(scores[index]),
+                'found_skills': [skill for skill in skills if skill.lower() in present],
+                'missing_skills': [skill for skill in skills if skill.lower() not in present]
+            })
+        return results
+
+
+_role_matcher = None
+_role_matcher_lock = threading.Lock()
+
+
+def get_role_matcher():
+    """Return the process-wide role matcher built from JOB_ROLES"""
+    global _role_matcher
+    if _role_matcher is None:
+        with _role_matcher_lock:
+            if _role_matcher is None:
+                _role_matcher = RoleMatcher()
+    return _role_matcher
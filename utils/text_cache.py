@@ -0,0 +1,195 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+
+def read_file_bytes(file):
+    """Return the raw bytes of an uploaded file, file-like object or bytes value"""
+    if isinstance(file, (bytes, bytearray, memoryview)):
+        return bytes(file)
+    if hasattr(file, 'getvalue'):
+        return file.getvalue()
+    if hasattr(file, 'getbuffer'):
+        return bytes(file.getbuffer())
+    if hasattr(file, 'read'):
+        data = file.read()
+        file.seek(0)  # Reset file pointer for later readers
+        return data
+    raise TypeError(f"Unsupported file type: {type(file).__name__}")
+
+
+class ExtractedTextCache:
+    """Content-addressed LRU cache for text extracted from uploaded documents.
+
+    Entries are keyed by the SHA-256 of the uploaded bytes and store the
+    extracted text together with the backend that produced it (pdfplumber,
+    pypdf, ocr, docx). The in-memory tier is bounded by the total size of the
+    cached text; an optional on-disk tier keeps results across restarts.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, disk_dir=None, max_disk_entries=2000):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.max_disk_entries = max_disk_entries
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        if self.disk_dir:
+            try:
+                os.makedirs(self.disk_dir, exist_ok=True)
+            except OSError as e:
+                print(f"Disabling on-disk text cache: {e}")
+                self.disk_dir = None
+
+    @staticmethod
+    def hash_bytes(data):
+        """Return the cache key for a document's raw bytes"""
+        return hashlib.sha256(data).hexdigest()
+
+    @staticmethod
+    def _entry_size(entry):
+        # Ingestion entries also keep each page's text, a second copy of the document
+        return sum(len(text.encode('utf-8')) for text in [entry['text'], *(entry.get('pages') or [])]
+                   if isinstance(text, str))
+
+    def get(self, key):
+        """Return the cached entry ({'text', 'backend'}) for a key, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+
+        entry = self._read_disk(key)
+        if entry is not None:
+            # Promote disk hits into the memory tier
+            self._store(key, entry)
+            with self._lock:
+                self.hits += 1
+            return entry
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, text, backend):
+        """Cache the text extracted for a key along with the backend that produced it"""
+        self.put_entry(key, {'text': text, 'backend': backend})
+
+    def put_entry(self, key, entry):
+        """Cache a full entry; it must carry at least 'text' and 'backend'"""
+        text = entry.get('text')
+        if not text or not text.strip():
+            # Never cache failed extractions, a later caller may try a stronger backend
+            return
+        self._store(key, entry)
+        self._write_disk(key, entry)
+
+    def clear(self):
+        """Drop all in-memory entries"""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self):
+        """Return hit/miss counters and the current memory usage"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self._entries),
+                'bytes': self._size
+            }
+
+    def _store(self, key, entry):
+        size = self._entry_size(entry)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._size -= self._entry_size(self._entries.pop(key))
+            self._entries[key] = entry
+            self._size += size
+            # Evict least recently used entries until we are within budget
+            while self._size > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= self._entry_size(evicted)
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.json")
+
+    def _read_disk(self, key):
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            os.utime(path)  # Track recency for disk eviction
+            return entry
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            print(f"Error reading cached text for {key}: {e}")
+            return None
+
+    def _write_disk(self, key, entry):
+        if not self.disk_dir:
+            return
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.disk_dir, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(entry, f)
+                os.replace(tmp_path, self._disk_path(key))
+            except Exception:
+                # Don't leave a half-written temp file behind in the cache directory
+                os.unlink(tmp_path)
+                raise
+            self._prune_disk()
+        except (OSError, TypeError, ValueError) as e:
+            print(f"Error writing cached text for {key}: {e}")
+
+    def _prune_disk(self):
+        files = [
+            os.path.join(self.disk_dir, name)
+            for name in os.listdir(self.disk_dir)
+            if name.endswith('.json')
+        ]
+        if len(files) <= self.max_disk_entries:
+            return
+        files.sort(key=os.path.getmtime)
+        for path in files[:len(files) - self.max_disk_entries]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+_text_cache = None
+_text_cache_lock = threading.Lock()
+
+
+def get_text_cache():
+    """Return the process-wide extracted text cache.
+
+    RESUME_TEXT_CACHE_MB bounds the memory tier and RESUME_TEXT_CACHE_DIR
+    enables the on-disk tier.
+    """
+    global _text_cache
+    if _text_cache is None:
+        with _text_cache_lock:
+            if _text_cache is None:
+                max_mb = int(os.getenv("RESUME_TEXT_CACHE_MB", "64"))
+                _text_cache = ExtractedTextCache(
+                    max_bytes=max_mb * 1024 * 1024,
+                    disk_dir=os.getenv("RESUME_TEXT_CACHE_DIR") or None
+                )
+    return _text_cache